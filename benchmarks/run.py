@@ -0,0 +1,189 @@
+# Offline benchmark of the core pipeline stages on synthetic prices
+#
+#   python -m benchmarks.run                          # N = 10 .. 500, results in benchmarks/results/<commit>.json
+#   python -m benchmarks.run --sizes 10 50 --days 504 --output quick.json
+#   python -m benchmarks.run --compare benchmarks/results/abc1234.json
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import MARKET_TICKER, RISK_FREE_TICKER, correlated_gbm, write_csv_fixtures
+
+DEFAULT_SIZES = [10, 25, 50, 100, 250, 500]
+FIXTURE_RISK_FREE_RATE = 0.03
+EQUITY_PREMIUM = 0.06
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def time_call(fn: Callable[[], object], repeat: int = 3, warmup: int = 1) -> Dict:
+    """
+    Times ``fn`` ``repeat`` times after ``warmup`` untimed calls; failures are recorded, not raised.
+    """
+    try:
+        for _ in range(warmup):
+            fn()
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}"}
+    return {"min": min(samples), "median": statistics.median(samples), "samples": samples}
+
+
+def benchmark_size(n_assets: int, n_days: int, workdir: Path, repeat: int = 3, seed: int = 0) -> Dict[str, Dict]:
+    """
+    Times every pipeline stage for one universe size.
+    """
+    from src.core import black_litterman, pipeline
+    from src.core.estimators import RollingEstimator
+    from src.core.expected_return import CapmCalculator
+    from src.core.factor_model import FactorModel
+    from src.core.market_data import DataLoader
+    from src.core.price_store import CSVFetcher, PriceStore
+    from src.utils.downsample import downsample
+
+    synthetic = correlated_gbm(n_assets, n_days, seed=seed)
+    tickers = [t for t in synthetic.columns if t != MARKET_TICKER]
+    fixtures = write_csv_fixtures(synthetic, workdir / f"csv-{n_assets}", FIXTURE_RISK_FREE_RATE)
+    start, end = str(synthetic.index[0].date()), str((synthetic.index[-1] + pd.Timedelta(days=1)).date())
+    universe = tickers + [MARKET_TICKER, RISK_FREE_TICKER]
+
+    cold_runs = iter(range(10 ** 6))
+
+    def load_cold():
+        store = PriceStore(workdir / f"store-{n_assets}-{next(cold_runs)}", fetcher=CSVFetcher(fixtures))
+        return DataLoader.load(universe, start, end, store=store)
+
+    warm_store = PriceStore(workdir / f"store-{n_assets}-warm", fetcher=CSVFetcher(fixtures))
+    panel = DataLoader.load(universe, start, end, store=warm_store).panel
+    prices = panel.to_frame()
+    assets = prices[tickers]
+
+    mu, S = pipeline.estimate(assets)
+    market_weights = pd.Series(1 / n_assets, index=tickers)
+    # Realized drifts of a short synthetic history can all fall below the risk-free rate, which leaves
+    # max_sharpe undefined; BL gets CAPM views with a fixed equity premium instead
+    betas = CapmCalculator.from_prices(prices, start, end).calculate_betas(tickers).fillna(1)
+    views = FIXTURE_RISK_FREE_RATE + EQUITY_PREMIUM * betas
+
+    def bl_cold():
+        # Drop the shared engines so each run pays for the prior preparation
+        black_litterman._engines.clear()
+        return black_litterman.BlackLittermanModelWrapper(S, market_weights, views).get_all()
+
+    bl_returns, bl_cov = bl_cold()
+    weights, _ = pipeline.optimize(bl_returns, bl_cov, "min_volatility")
+
+    def growth():
+        held = weights[weights > 0]
+        held_panel = panel.select(held.index)
+        series = pd.Series(held_panel.growth(held[held_panel.tickers].to_numpy()), index=held_panel.dates)
+        return downsample(series, 1000)
+
+    stages = {
+        "data_loader_cold": load_cold,
+        "data_loader_warm": lambda: DataLoader.load(universe, start, end, store=warm_store),
+        "capm_betas": lambda: CapmCalculator.from_prices(prices, start, end).calculate_betas(tickers),
+        "capm_expected_returns": lambda: CapmCalculator.from_prices(prices, start, end).calculate_expected_return(tickers),
+        "sample_cov": lambda: pipeline.estimate(assets),
+        "ledoit_wolf": lambda: RollingEstimator.from_prices(assets).ledoit_wolf(),
+        "factor_model": lambda: FactorModel.from_prices(assets),
+        "black_litterman": bl_cold,
+        "max_sharpe": lambda: pipeline.optimize(bl_returns, bl_cov, "max_sharpe"),
+        "min_volatility": lambda: pipeline.optimize(bl_returns, bl_cov, "min_volatility"),
+        "max_sharpe_factor": lambda: pipeline.optimize_factor(assets, mu, "max_sharpe"),
+        "min_volatility_factor": lambda: pipeline.optimize_factor(assets, mu, "min_volatility"),
+        "min_cvar": lambda: pipeline.optimize_cvar(assets, mu),
+        "hrp": lambda: pipeline.optimize(bl_returns, bl_cov, "hrp"),
+        "growth": growth
+    }
+    return {name: time_call(fn, repeat=repeat) for name, fn in stages.items()}
+
+
+def run(sizes: List[int], n_days: int, repeat: int = 3, seed: int = 0, log: Callable[[str], None] = print) -> Dict:
+    """
+    Runs the benchmark over every size and returns a JSON-serializable report.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_assets in sizes:
+            timings = benchmark_size(n_assets, n_days, Path(tmp), repeat=repeat, seed=seed)
+            for stage, timing in timings.items():
+                results.append({"n_assets": n_assets, "stage": stage, **timing})
+                shown = f"{timing['median'] * 1000:10.2f} ms" if "median" in timing else f"  failed: {timing['error']}"
+                log(f"N={n_assets:<4} {stage:<22} {shown}")
+    return {"meta": _metadata(n_days, repeat, seed), "results": results}
+
+
+def compare(report: Dict, baseline: Dict) -> pd.DataFrame:
+    """
+    Median timings of two reports side by side, with the ratio current / baseline.
+    """
+    def medians(data):
+        rows = [r for r in data["results"] if "median" in r]
+        return pd.DataFrame(rows).set_index(["n_assets", "stage"])["median"] if rows else pd.Series(dtype=float)
+
+    table = pd.concat({"baseline": medians(baseline), "current": medians(report)}, axis=1).dropna()
+    table["ratio"] = table["current"] / table["baseline"]
+    return table
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the portfolio pipeline on synthetic, offline data.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Universe sizes to sweep")
+    parser.add_argument("--days", type=int, default=756, help="Trading days of synthetic history")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic prices")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.days, repeat=args.repeat, seed=args.seed)
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{report['meta']['commit'] or 'local'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Wrote {output}")
+
+    if args.compare:
+        with pd.option_context("display.float_format", "{:.4f}".format, "display.max_rows", None):
+            print(compare(report, json.loads(Path(args.compare).read_text())))
+    return 0
+
+
+def _metadata(n_days: int, repeat: int, seed: int) -> Dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "n_days": n_days,
+        "repeat": repeat,
+        "seed": seed
+    }
+
+
+if __name__ == "__main__":
+    sys.exit(main())
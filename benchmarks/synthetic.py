@@ -0,0 +1,67 @@
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+MARKET_TICKER = "^GSPC"
+RISK_FREE_TICKER = "^IRX"
+
+
+def correlated_gbm(
+        n_assets: int,
+        n_days: int,
+        n_factors: int = 3,
+        start: str = "2015-01-02",
+        seed: Optional[int] = 0
+        ) -> pd.DataFrame:
+    """
+    Synthetic daily prices from a correlated geometric Brownian motion.
+
+    Correlation comes from ``n_factors`` common drivers with random exposures;
+    the first driver is the market, returned as the ``^GSPC`` column.
+
+    :param n_assets: Number of assets (columns besides the market)
+    :param n_days: Number of business days
+    :param n_factors: Common factors driving the correlation
+    :param start: First date
+    :param seed: Random seed (None for a fresh draw)
+    :return: Date-indexed prices with columns A0000.. plus ^GSPC
+    """
+    rng = np.random.default_rng(seed)
+    dt = 1 / 252
+    factor_vol = np.r_[0.16, np.full(n_factors - 1, 0.08)]
+    factors = rng.standard_normal((n_days, n_factors)) * factor_vol * np.sqrt(dt)
+
+    exposures = rng.normal(0.3, 0.25, (n_assets, n_factors))
+    exposures[:, 0] = rng.uniform(0.5, 1.5, n_assets)
+    drift = rng.uniform(0.02, 0.15, n_assets)
+    idio_vol = rng.uniform(0.1, 0.35, n_assets)
+
+    shocks = factors @ exposures.T + rng.standard_normal((n_days, n_assets)) * idio_vol * np.sqrt(dt)
+    total_var = (exposures ** 2) @ (factor_vol ** 2) + idio_vol ** 2
+    log_returns = (drift - total_var / 2) * dt + shocks
+    market_log_returns = (0.08 - factor_vol[0] ** 2 / 2) * dt + factors[:, 0]
+
+    dates = pd.bdate_range(start, periods=n_days)
+    prices = pd.DataFrame(
+        100 * np.exp(np.cumsum(log_returns, axis=0)),
+        index=dates,
+        columns=[f"A{i:04d}" for i in range(n_assets)]
+    )
+    prices[MARKET_TICKER] = 3000 * np.exp(np.cumsum(market_log_returns))
+    return prices
+
+
+def write_csv_fixtures(prices: pd.DataFrame, directory, risk_free_rate: float = 0.03) -> Path:
+    """
+    Writes one ``<ticker>.csv`` per column (plus a flat ^IRX yield in percent) for CSVFetcher.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    columns = dict(prices.items())
+    columns[RISK_FREE_TICKER] = pd.Series(risk_free_rate * 100, index=prices.index)
+    for ticker, close in columns.items():
+        frame = pd.DataFrame({"Close": close, "Adj Close": close}, index=pd.Index(prices.index, name="Date"))
+        frame.to_csv(directory / f"{ticker}.csv")
+    return directory
@@ -0,0 +1,103 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class ForecastCache:
+    """
+    Disk-backed forecast cache with TTL expiry and size-bounded LRU eviction.
+
+    Entries are keyed by (model, prompt version, ticker, date bucket) and stored
+    in SQLite, so they survive restarts and can be shared by worker threads.
+    """
+
+    def __init__(self, path: str, ttl: float = 24 * 3600, max_entries: int = 10000):
+        """
+        :param path: SQLite database file (":memory:" for a throwaway cache)
+        :param ttl: Seconds a forecast stays usable
+        :param max_entries: Entries kept before the least recently used are evicted
+        """
+        self.path = str(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS forecasts ("
+                " model TEXT, prompt_version TEXT, ticker TEXT, bucket TEXT,"
+                " payload TEXT, created REAL, accessed REAL,"
+                " PRIMARY KEY (model, prompt_version, ticker, bucket))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS forecasts_accessed ON forecasts (accessed)")
+
+    @classmethod
+    def default(cls) -> "ForecastCache":
+        """
+        Returns the process-wide cache under ``$PORTFOLIO_FORECAST_CACHE`` or ``~/.cache``.
+        """
+        global _default_cache
+        if _default_cache is None:
+            path = os.environ.get("PORTFOLIO_FORECAST_CACHE") or Path.home() / ".cache" / "portfolio-optimizer" / "forecasts.sqlite"
+            _default_cache = cls(path)
+        return _default_cache
+
+    def get(self, model: str, prompt_version: str, ticker: str, bucket: str) -> Optional[Dict[str, float]]:
+        return self.get_many(model, prompt_version, [ticker], bucket).get(ticker)
+
+    def get_many(self, model: str, prompt_version: str, tickers: List[str], bucket: str) -> Dict[str, Dict[str, float]]:
+        """
+        Returns the fresh cached forecasts among ``tickers`` and marks them as recently used.
+        """
+        if not tickers:
+            return {}
+        now = time.time()
+        placeholders = ",".join("?" * len(tickers))
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                f"SELECT ticker, payload FROM forecasts WHERE model = ? AND prompt_version = ? AND bucket = ?"
+                f" AND created > ? AND ticker IN ({placeholders})",
+                [model, prompt_version, bucket, now - self.ttl, *tickers]
+            ).fetchall()
+            if rows:
+                self._conn.execute(
+                    f"UPDATE forecasts SET accessed = ? WHERE model = ? AND prompt_version = ? AND bucket = ?"
+                    f" AND ticker IN ({','.join('?' * len(rows))})",
+                    [now, model, prompt_version, bucket, *[ticker for ticker, _ in rows]]
+                )
+        return {ticker: json.loads(payload) for ticker, payload in rows}
+
+    def put(self, model: str, prompt_version: str, ticker: str, bucket: str, forecast: Dict[str, float]) -> None:
+        self.put_many(model, prompt_version, {ticker: forecast}, bucket)
+
+    def put_many(self, model: str, prompt_version: str, forecasts: Dict[str, Dict[str, float]], bucket: str) -> None:
+        """
+        Stores forecasts, then drops expired entries and evicts beyond ``max_entries``.
+        """
+        if not forecasts:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO forecasts VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(model, prompt_version, t, bucket, json.dumps(f), now, now) for t, f in forecasts.items()]
+            )
+            self._conn.execute("DELETE FROM forecasts WHERE created <= ?", (now - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM forecasts WHERE rowid IN ("
+                " SELECT rowid FROM forecasts ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM forecasts").fetchone()[0]
+
+
+_default_cache: Optional[ForecastCache] = None
@@ -1,10 +1,65 @@
-import openai
-import streamlit as st
+import json
+import logging
 import os
-from typing import List, Dict
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple
 
-# Load API key from secrets.toml file
-client = openai.OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+from src.ai.forecast_cache import ForecastCache
+from src.utils import profiling
+from src.utils.rate_limit import RateLimiter
+from src.utils.retry import retry_with_backoff
+
+if TYPE_CHECKING:
+    import openai
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def resolve_api_key(api_key: Optional[str] = None) -> str:
+    """
+    Picks the OpenAI key: the explicit argument, then $OPENAI_API_KEY, then Streamlit's secrets.toml.
+    """
+    if api_key:
+        return api_key
+    if os.getenv("OPENAI_API_KEY"):
+        return os.environ["OPENAI_API_KEY"]
+    try:
+        import streamlit as st
+        return st.secrets["OPENAI_API_KEY"]
+    except Exception as e:
+        raise RuntimeError("No OpenAI API key: pass api_key, set OPENAI_API_KEY or add it to secrets.toml.") from e
+
+
+def get_default_client(api_key: Optional[str] = None) -> "openai.OpenAI":
+    """
+    Returns a shared OpenAI client for the resolved key, created on first use.
+    """
+    key = resolve_api_key(api_key)
+    with _clients_lock:
+        if key not in _clients:
+            import openai
+            # GPTForecaster retries failed requests itself
+            _clients[key] = openai.OpenAI(api_key=key, max_retries=0)
+        return _clients[key]
+
+
+class ForecastParseError(ValueError):
+    """Raised when a completion is not a well-formed forecast."""
+
+
+def transient_errors() -> Tuple[type, ...]:
+    """
+    Errors worth retrying: connection trouble, timeouts, rate limits, server errors and malformed
+    replies (the model samples a new one). Missing keys, auth failures and bad requests are not.
+    """
+    import openai
+    return (
+        openai.APIConnectionError, openai.APITimeoutError, openai.RateLimitError, openai.InternalServerError,
+        json.JSONDecodeError, ForecastParseError
+    )
 
 
 class GPTForecaster:
@@ -12,8 +67,55 @@ class GPTForecaster:
     Uses OpenAI's GPT model to generate market outlooks (bullish/bearish + confidence).
     """
 
-    def __init__(self, model: str = "gpt-3.5-turbo"):
+    # Bump whenever the prompts change so cached answers to old prompts are not reused
+    PROMPT_VERSION = "2"
+    SYSTEM_PROMPT = (
+        "You are a financial analyst. Given a stock ticker, generate a brief expected return forecast "
+        "(annualized % return) and a confidence level between 0 and 100. Use real market patterns, earnings context, "
+        'and realistic analysis. Respond with a JSON object like: {"expected_return": 0.07, "confidence": 82}'
+    )
+    MULTI_SYSTEM_PROMPT = (
+        "You are a financial analyst. Given a list of stock tickers, generate a brief expected return forecast "
+        "(annualized % return) and a confidence level between 0 and 100 for each one. Use real market patterns, "
+        "earnings context, and realistic analysis. Respond with a JSON object keyed by ticker like: "
+        '{"AAPL": {"expected_return": 0.07, "confidence": 82}, "MSFT": {"expected_return": 0.05, "confidence": 64}}'
+    )
+    FALLBACK = {"expected_return": 0.05, "confidence": 50}
+
+    def __init__(
+        self,
+        model: str = "gpt-3.5-turbo",
+        client: Optional["openai.OpenAI"] = None,
+        api_key: Optional[str] = None,
+        max_concurrency: int = 8,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_retries: int = 3,
+        timeout: float = 30.0,
+        cache: Optional[ForecastCache] = None,
+        tickers_per_request: int = 1
+    ):
+        """
+        :param model: Chat completion model name
+        :param client: OpenAI-compatible client (defaults to a shared one built on the first request)
+        :param api_key: Key for the default client (defaults to $OPENAI_API_KEY, then secrets.toml)
+        :param max_concurrency: Maximum requests in flight during batch_forecast
+        :param requests_per_minute: Request budget shared by all workers (None = unlimited)
+        :param tokens_per_minute: Estimated token budget shared by all workers (None = unlimited)
+        :param max_retries: Retries per ticker after a transient failure (see ``transient_errors``)
+        :param timeout: Per-request timeout in seconds
+        :param cache: Forecast cache consulted before asking the model (None = no caching)
+        :param tickers_per_request: Tickers per completion in batch_forecast; above 1 uses the multi-ticker prompt
+        """
         self.model = model
+        self.client = client
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.rate_limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.cache = cache
+        self.tickers_per_request = tickers_per_request
 
     def generate_forecast(self, ticker: str) -> Dict[str, float]:
         """
@@ -22,39 +124,149 @@ class GPTForecaster:
         Returns:
         - Dict with expected return estimate and confidence score
         """
-        system_prompt = (
-            "You are a financial analyst. Given a stock ticker, generate a brief expected return forecast "
-            "(annualized % return) and a confidence level between 0 and 100. Use real market patterns, earnings context, "
-            "and realistic analysis. Respond in JSON format like: {'expected_return': 0.07, 'confidence': 82}"
-        )
+        bucket = self._date_bucket()
+        if self.cache is not None:
+            cached = self.cache.get(self.model, self.PROMPT_VERSION, ticker, bucket)
+            profiling.count("gpt.cache_hits" if cached is not None else "gpt.cache_misses")
+            if cached is not None:
+                return cached
 
-        user_prompt = f"Forecast the outlook for {ticker} over the next year."
+        try:
+            forecast = retry_with_backoff(
+                lambda: self._request_forecast(ticker),
+                retries=self.max_retries,
+                retry_on=transient_errors(),
+                description=f"Forecast for {ticker}"
+            )
+        except Exception as e:
+            logging.warning(f"Forecast for {ticker} failed, using the fallback: {e}")
+            return dict(self.FALLBACK)
+
+        if self.cache is not None:
+            self.cache.put(self.model, self.PROMPT_VERSION, ticker, bucket, forecast)
+        return forecast
+
+    def batch_forecast(self, tickers: List[str], max_concurrency: Optional[int] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Forecasts expected returns for a batch of tickers concurrently.
+
+        Cached forecasts are served first. Remaining tickers run on a thread pool,
+        either one per request or ``tickers_per_request`` per multi-ticker prompt.
+        Requests share the rate limiter and are retried individually; tickers a
+        multi-ticker reply leaves out are asked for one at a time.
 
+        Returns:
+        - Dict mapping each ticker to its forecast dict
+        """
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers:
+            return {}
+
+        with profiling.span("gpt.batch_forecast", tickers=len(tickers)) as span:
+            results = {}
+            if self.cache is not None:
+                results = self.cache.get_many(self.model, self.PROMPT_VERSION, tickers, self._date_bucket())
+                profiling.count("gpt.cache_hits", len(results))
+            missing = [t for t in tickers if t not in results]
+            span.set(cached=len(results))
+
+            if missing:
+                size = max(1, self.tickers_per_request)
+                chunks = [missing[i:i + size] for i in range(0, len(missing), size)]
+                workers = min(max_concurrency or self.max_concurrency, len(chunks))
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    if size == 1:
+                        # generate_forecast looks each ticker up again, so it counts their misses
+                        results.update(zip(missing, pool.map(profiling.bind(self.generate_forecast), missing)))
+                    else:
+                        profiling.count("gpt.cache_misses", len(missing))
+                        for forecasts in pool.map(profiling.bind(self._forecast_chunk), chunks):
+                            results.update(forecasts)
+
+        return {t: results[t] for t in tickers}
+
+    def _forecast_chunk(self, tickers: List[str]) -> Dict[str, Dict[str, float]]:
         try:
+            forecasts = retry_with_backoff(
+                lambda: self._request_multi_forecast(tickers),
+                retries=self.max_retries,
+                retry_on=transient_errors(),
+                description=f"Forecast for {len(tickers)} tickers"
+            )
+        except Exception as e:
+            logging.warning(f"Multi-ticker forecast failed, asking for each ticker individually: {e}")
+            forecasts = {}
+
+        if self.cache is not None:
+            self.cache.put_many(self.model, self.PROMPT_VERSION, forecasts, self._date_bucket())
+        for ticker in tickers:
+            if ticker not in forecasts:
+                forecasts[ticker] = self.generate_forecast(ticker)
+        return forecasts
+
+    def _request_forecast(self, ticker: str) -> Dict[str, float]:
+        user_prompt = f"Forecast the outlook for {ticker} over the next year."
+        content = self._complete(self.SYSTEM_PROMPT, user_prompt, expected_tokens=50)
+        return self.parse_forecast(json.loads(content))
+
+    def _request_multi_forecast(self, tickers: List[str]) -> Dict[str, Dict[str, float]]:
+        user_prompt = f"Forecast the outlook for each of these tickers over the next year: {', '.join(tickers)}."
+        content = self._complete(self.MULTI_SYSTEM_PROMPT, user_prompt, expected_tokens=30 * len(tickers))
+        data = json.loads(content)
+        if not isinstance(data, dict):
+            raise ForecastParseError(f"Expected a JSON object keyed by ticker, got {type(data).__name__}")
+
+        forecasts = {}
+        for ticker in tickers:
+            if ticker in data:
+                try:
+                    forecasts[ticker] = self.parse_forecast(data[ticker])
+                except ForecastParseError as e:
+                    logging.info(f"Discarding malformed forecast for {ticker}: {e}")
+        return forecasts
+
+    def _complete(self, system_prompt: str, user_prompt: str, expected_tokens: int) -> str:
+        # Rough token estimate: ~4 characters per token plus room for the reply
+        with profiling.span("gpt.rate_limit_wait"):
+            self.rate_limiter.acquire(tokens=(len(system_prompt) + len(user_prompt)) / 4 + expected_tokens)
+
+        client = self.client if self.client is not None else get_default_client(self.api_key)
+        with profiling.span("gpt.request", model=self.model):
             response = client.chat.completions.create(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
-                temperature=0.7
+                temperature=0.7,
+                response_format={"type": "json_object"},
+                timeout=self.timeout
             )
-            forecast_text = response.choices[0].message.content
-            forecast_data = eval(forecast_text)  # Use json.loads() if strict JSON
-            return forecast_data
-
-        except Exception as e:
-            print(f"Error generating forecast for {ticker}: {e}")
-            return {"expected_return": 0.05, "confidence": 50}  # fallback
+        content = response.choices[0].message.content
+        profiling.count("gpt.requests")
+        profiling.count("network.bytes", len(system_prompt) + len(user_prompt) + len(content or ""))
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            profiling.count("gpt.prompt_tokens", getattr(usage, "prompt_tokens", 0) or 0)
+            profiling.count("gpt.completion_tokens", getattr(usage, "completion_tokens", 0) or 0)
+        return content
 
-    def batch_forecast(self, tickers: List[str]) -> Dict[str, Dict[str, float]]:
+    @staticmethod
+    def parse_forecast(data) -> Dict[str, float]:
         """
-        Forecasts expected returns for a batch of tickers.
-
-        Returns:
-        - Dict mapping each ticker to its forecast dict
+        Validates one decoded forecast and returns it with float fields.
         """
-        results = {}
-        for ticker in tickers:
-            results[ticker] = self.generate_forecast(ticker)
-        return results
+        if not isinstance(data, dict):
+            raise ForecastParseError(f"Expected a JSON object, got {type(data).__name__}")
+        try:
+            forecast = {"expected_return": float(data["expected_return"]), "confidence": float(data["confidence"])}
+        except (KeyError, TypeError, ValueError) as e:
+            raise ForecastParseError(f"Invalid forecast {data!r}: {e}") from e
+        if not 0 <= forecast["confidence"] <= 100:
+            raise ForecastParseError(f"Confidence out of range: {forecast['confidence']}")
+        return forecast
+
+    @staticmethod
+    def _date_bucket() -> str:
+        # Forecasts are reused within a calendar day
+        return date.today().isoformat()
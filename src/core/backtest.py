@@ -0,0 +1,201 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.core.black_litterman import BlackLittermanModelWrapper
+from src.core.estimators import RollingEstimator
+from src.core.optimizer import PortfolioOptimizer
+from src.core.pipeline import OBJECTIVES
+
+# Objectives that need nothing beyond each window's mu and covariance
+BACKTEST_OBJECTIVES = ("max_sharpe", "min_volatility", "hrp")
+
+
+@dataclass
+class BacktestResult:
+    """
+    Output of a walk-forward backtest.
+
+    :param equity: Portfolio value over time, starting at ``initial_value``
+    :param returns: Daily portfolio returns net of transaction costs
+    :param weights: Target weights chosen on each rebalance date
+    :param turnover: Sum of absolute weight changes traded on each rebalance date
+    :param costs: Transaction costs paid on each rebalance date, in currency
+    """
+    equity: pd.Series
+    returns: pd.Series
+    weights: pd.DataFrame
+    turnover: pd.Series
+    costs: pd.Series
+
+
+class WalkForwardBacktest:
+    """
+    Walk-forward backtest of the estimation -> (Black-Litterman) -> optimization pipeline.
+
+    On each rebalance date the expected returns and covariance are re-estimated
+    over the trailing ``lookback`` days, optionally passed through
+    BlackLittermanModelWrapper, and re-optimized with PortfolioOptimizer. Between
+    rebalances the holdings drift with prices; trades pay a proportional cost.
+    """
+
+    def __init__(
+        self,
+        prices: pd.DataFrame,
+        lookback: int = 252,
+        rebalance_every: int = 21,
+        objective: str = "max_sharpe",
+        use_black_litterman: bool = False,
+        views_fn: Optional[Callable[[pd.Timestamp, pd.Series], pd.Series]] = None,
+        transaction_cost: float = 0.001,
+        risk_free_rate: float = 0.02,
+        initial_value: float = 1.0,
+        n_workers: int = 1
+    ):
+        """
+        :param prices: Date-indexed prices, one column per asset
+        :param lookback: Trading days in each estimation window
+        :param rebalance_every: Trading days between rebalances
+        :param objective: "max_sharpe", "min_volatility" or "hrp"
+        :param use_black_litterman: Run the estimates through BlackLittermanModelWrapper
+        :param views_fn: Maps (date, historical mu) to BL views; defaults to the historical mu
+        :param transaction_cost: Cost per unit of turnover (0.001 = 10bp)
+        :param risk_free_rate: Risk-free rate used by the optimizer
+        :param initial_value: Starting portfolio value
+        :param n_workers: Processes used to optimize rebalance windows (1 = in-process)
+        """
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Unknown objective '{objective}' (expected one of {OBJECTIVES})")
+        if objective not in BACKTEST_OBJECTIVES:
+            raise ValueError(f"The backtest does not support '{objective}' (expected one of {BACKTEST_OBJECTIVES})")
+        prices = prices.dropna(how="all").ffill()
+        dropped = prices.columns[prices.isna().any()]
+        if len(dropped):
+            logging.warning(f"Backtest drops assets without full history: {list(dropped)}")
+        self.prices = prices.drop(columns=dropped)
+        self.lookback = lookback
+        self.rebalance_every = rebalance_every
+        self.objective = objective
+        self.use_black_litterman = use_black_litterman
+        self.views_fn = views_fn
+        self.transaction_cost = transaction_cost
+        self.risk_free_rate = risk_free_rate
+        self.initial_value = initial_value
+        self.n_workers = n_workers
+
+    def rebalance_positions(self) -> List[int]:
+        """
+        Row positions (in the returns array) of every rebalance date.
+        """
+        n_returns = len(self.prices) - 1
+        return list(range(self.lookback - 1, n_returns - 1, self.rebalance_every))
+
+    def window_estimates(self) -> List[Tuple[pd.Timestamp, pd.Series, pd.DataFrame]]:
+        """
+        Expected returns and covariance for each rebalance window, updated incrementally.
+
+        :return: List of (rebalance date, mu, cov) tuples
+        """
+        tickers = self.prices.columns
+        returns = self.prices.pct_change().to_numpy()[1:]
+        dates = self.prices.index[1:]
+        estimator = RollingEstimator(list(tickers))
+
+        estimates = []
+        added = 0
+        for position in self.rebalance_positions():
+            # Slide the window to end at this position: add new rows, evict stale ones
+            estimator.append(returns[added:position + 1])
+            evict_from, evict_to = max(0, added - self.lookback), max(0, position + 1 - self.lookback)
+            estimator.evict(returns[evict_from:evict_to])
+            added = position + 1
+            estimates.append((dates[position], estimator.mean_historical_return(), estimator.sample_cov()))
+        return estimates
+
+    def run(self) -> BacktestResult:
+        """
+        Runs the backtest and returns equity, returns, weights, turnover and costs.
+        """
+        estimates = self.window_estimates()
+        if not estimates:
+            raise ValueError("Not enough price history for a single rebalance window.")
+
+        tasks = []
+        for date, mu, cov in estimates:
+            views = self.views_fn(date, mu) if self.views_fn is not None else mu
+            tasks.append((mu, cov, views, self.objective, self.use_black_litterman, self.risk_free_rate))
+
+        # Windows are independent once their estimates are known, so solve them in parallel
+        if self.n_workers > 1:
+            with ProcessPoolExecutor(max_workers=self.n_workers) as pool:
+                targets = list(pool.map(_optimize_window, tasks, chunksize=max(1, len(tasks) // (4 * self.n_workers))))
+        else:
+            targets = [_optimize_window(task) for task in tasks]
+
+        return self._simulate([date for date, _, _ in estimates], targets)
+
+    def _simulate(self, rebalance_dates: List[pd.Timestamp], targets: List[Optional[np.ndarray]]) -> BacktestResult:
+        tickers = self.prices.columns
+        growth = (self.prices / self.prices.shift(1)).to_numpy()
+        positions = [self.prices.index.get_loc(date) for date in rebalance_dates] + [len(self.prices) - 1]
+
+        value = self.initial_value
+        holdings = np.zeros(len(tickers))  # current weights
+        chosen, turnovers, costs = [], [], []
+        values = [value]
+        for k, target in enumerate(targets):
+            if target is None:
+                logging.warning(f"Optimization failed on {rebalance_dates[k].date()}, keeping current holdings")
+                target = holdings if holdings.any() else np.full(len(tickers), 1 / len(tickers))
+            turnover = np.abs(target - holdings).sum()
+            cost = turnover * self.transaction_cost * value
+            value -= cost
+            chosen.append(target)
+            turnovers.append(turnover)
+            costs.append(cost)
+
+            # Holdings drift with prices until the next rebalance
+            path = np.cumprod(growth[positions[k] + 1:positions[k + 1] + 1], axis=0)
+            if len(path):
+                period_values = value * path @ target
+                values.extend(period_values)
+                holdings = target * path[-1] / (path[-1] @ target)
+                value = period_values[-1]
+            else:
+                holdings = target
+
+        # Values on rebalance dates are recorded before costs, so costs show up in the next day's return
+        index = self.prices.index[positions[0]:positions[-1] + 1]
+        equity = pd.Series(values, index=index, name="equity")
+        return BacktestResult(
+            equity=equity,
+            returns=equity.pct_change().iloc[1:],
+            weights=pd.DataFrame(chosen, index=rebalance_dates, columns=tickers),
+            turnover=pd.Series(turnovers, index=rebalance_dates),
+            costs=pd.Series(costs, index=rebalance_dates)
+        )
+
+
+def _optimize_window(task) -> Optional[np.ndarray]:
+    mu, cov, views, objective, use_black_litterman, risk_free_rate = task
+    try:
+        if use_black_litterman:
+            views = views.reindex(mu.index).dropna()
+            market_weights = pd.Series(1 / len(views), index=views.index)
+            bl = BlackLittermanModelWrapper(cov.loc[views.index, views.index], market_weights, views)
+            mu, cov = bl.get_all()
+        optimizer = PortfolioOptimizer(expected_returns=mu, cov_matrix=cov, risk_free_rate=risk_free_rate)
+        solve = {
+            "max_sharpe": optimizer.maximize_sharpe,
+            "min_volatility": optimizer.minimize_volatility,
+            "hrp": optimizer.hierarchical_risk_parity
+        }[objective]
+        weights = solve()
+        return weights.reindex(task[0].index, fill_value=0).to_numpy()
+    except Exception as e:
+        logging.debug(f"Window optimization failed: {e}")
+        return None
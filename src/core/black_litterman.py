@@ -1,12 +1,226 @@
+import threading
 import pandas as pd
-from typing import Optional
-from pypfopt.black_litterman import BlackLittermanModel
-from pypfopt.risk_models import sample_cov
+import numpy as np
+from collections import OrderedDict
+from typing import TYPE_CHECKING, List, Optional, Tuple, Union
+from scipy.linalg import cho_factor, cho_solve, solve_triangular
+
+from src.utils import profiling
+
+if TYPE_CHECKING:
+    from pypfopt.black_litterman import BlackLittermanModel
+
+
+class BlackLittermanEngine:
+    """
+    Black-Litterman posterior engine that prepares the prior once per covariance matrix.
+
+    τΣ and the implied returns π are fixed at construction; τΣ itself is never
+    factorized. For each view structure (pick matrix P and uncertainty Ω) the
+    engine forms τΣPᵀ and Cholesky-factorizes only the k x k view system
+    PτΣPᵀ + Ω, then reuses that factor for every set of view values Q: each
+    scenario costs a k x k triangular solve pair and an N x k product.
+    Posteriors are memoized by view set; the caches are safe to share across threads.
+    """
+
+    def __init__(
+        self,
+        cov_matrix: pd.DataFrame,
+        pi: Optional[pd.Series] = None,
+        tau: float = 0.05,
+        cache_size: int = 256
+    ):
+        """
+        :param cov_matrix: Covariance matrix of asset returns
+        :param pi: Prior expected returns (None = zero prior, as PyPortfolioOpt does without one)
+        :param tau: Scalar indicating uncertainty in the prior estimate
+        :param cache_size: Number of posteriors and view factorizations kept in memory
+        """
+        self.tickers = list(cov_matrix.index)
+        self.cov = cov_matrix.loc[self.tickers, self.tickers].to_numpy(dtype=float)
+        self.tau = tau
+        self.tau_sigma = tau * self.cov
+        self.pi = np.zeros(len(self.tickers)) if pi is None else pi.reindex(self.tickers).to_numpy(dtype=float)
+        self.cache_size = cache_size
+        self._posteriors = OrderedDict()
+        self._structures = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def market_implied(
+        cls,
+        cov_matrix: pd.DataFrame,
+        market_weights: pd.Series,
+        risk_aversion: float = 1.0,
+        tau: float = 0.05
+    ) -> "BlackLittermanEngine":
+        """
+        Engine whose prior is the market-implied return π = δΣw.
+        """
+        weights = market_weights.reindex(cov_matrix.index).fillna(0)
+        pi = risk_aversion * cov_matrix.dot(weights)
+        return cls(cov_matrix, pi=pi, tau=tau)
+
+    def posterior(
+        self,
+        views: Union[pd.Series, np.ndarray],
+        P: Optional[pd.DataFrame] = None,
+        omega: Optional[np.ndarray] = None
+    ) -> Tuple[pd.Series, pd.DataFrame]:
+        """
+        Posterior expected returns and covariance for one set of views.
+
+        :param views: Absolute views as a Series indexed by ticker, or the k view
+                      values Q when ``P`` is given
+        :param P: k x N pick matrix with ticker columns for relative views
+        :param omega: k x k view uncertainty (default: diag(τPΣPᵀ), He-Litterman)
+        :return: (posterior returns, posterior covariance)
+        """
+        P_arr, Q = self._parse_views(views, P)
+        key = (P_arr.tobytes(), P_arr.shape, Q.tobytes(), None if omega is None else np.asarray(omega).tobytes())
+        with self._lock:
+            cached = self._posteriors.get(key)
+            if cached is not None:
+                self._posteriors.move_to_end(key)
+        if cached is None:
+            profiling.count("black_litterman.cache_misses")
+            with profiling.span("black_litterman.posterior", views=len(Q)):
+                structure = self._structure(P_arr, omega)
+                returns = self._posterior_returns(structure, Q[None, :])[0]
+            cached = (returns, structure)
+            with self._lock:
+                self._remember(self._posteriors, key, cached)
+        else:
+            profiling.count("black_litterman.cache_hits")
+
+        # Hand out fresh pandas objects so callers cannot mutate the cached arrays
+        returns, structure = cached
+        return pd.Series(returns, index=self.tickers), self._posterior_cov(structure).copy()
+
+    def posterior_returns_batch(
+        self,
+        views: Union[pd.DataFrame, np.ndarray],
+        P: Optional[pd.DataFrame] = None,
+        omega: Optional[np.ndarray] = None
+    ) -> pd.DataFrame:
+        """
+        Posterior expected returns for many view scenarios sharing one view structure.
+
+        The posterior covariance does not depend on the view values, so it is the
+        same for every row and available from ``posterior``.
+
+        :param views: S x k view values; a DataFrame with ticker columns for absolute views
+        :param P: k x N pick matrix with ticker columns for relative views
+        :param omega: k x k view uncertainty shared by all scenarios
+        :return: S x N DataFrame of posterior returns
+        """
+        index = views.index if isinstance(views, pd.DataFrame) else None
+        if P is None:
+            P_arr, _ = self._parse_views(views.iloc[0], None)
+            Q = views.to_numpy(dtype=float)
+        else:
+            P_arr, _ = self._parse_views(np.zeros(len(P)), P)
+            Q = np.atleast_2d(np.asarray(views, dtype=float))
+        returns = self._posterior_returns(self._structure(P_arr, omega), Q)
+        return pd.DataFrame(returns, index=index, columns=self.tickers)
+
+    def posterior_many(self, view_sets: List) -> List[Tuple[pd.Series, pd.DataFrame]]:
+        """
+        Posteriors for a list of view sets, each a Series of absolute views or a (Q, P) pair.
+
+        View sets that share a pick matrix reuse the same factorization.
+        """
+        results = []
+        for view_set in view_sets:
+            if isinstance(view_set, tuple):
+                results.append(self.posterior(view_set[0], P=view_set[1]))
+            else:
+                results.append(self.posterior(view_set))
+        return results
+
+    def _parse_views(self, views, P) -> Tuple[np.ndarray, np.ndarray]:
+        if P is None:
+            views = pd.Series(views)
+            unknown = set(views.index) - set(self.tickers)
+            if unknown:
+                raise ValueError(f"Views on tickers outside the covariance matrix: {sorted(unknown)}")
+            P_arr = np.zeros((len(views), len(self.tickers)))
+            P_arr[np.arange(len(views)), [self.tickers.index(t) for t in views.index]] = 1
+            return P_arr, views.to_numpy(dtype=float)
+
+        P_arr = P.reindex(columns=self.tickers, fill_value=0).to_numpy(dtype=float)
+        Q = np.asarray(views, dtype=float).ravel()
+        if len(Q) != len(P_arr):
+            raise ValueError(f"Got {len(Q)} view values for {len(P_arr)} rows of P")
+        return P_arr, Q
+
+    def _structure(self, P: np.ndarray, omega: Optional[np.ndarray]) -> dict:
+        key = (P.tobytes(), P.shape, None if omega is None else np.asarray(omega).tobytes())
+        with self._lock:
+            if key in self._structures:
+                self._structures.move_to_end(key)
+                return self._structures[key]
+
+        tau_sigma_P = self.tau_sigma @ P.T                       # N x k
+        view_cov = P @ tau_sigma_P                               # k x k
+        omega = np.diag(np.diag(view_cov)) if omega is None else np.asarray(omega, dtype=float)
+        factor = cho_factor(view_cov + omega, lower=True)
+        structure = {"P": P, "tau_sigma_P": tau_sigma_P, "factor": factor}
+        with self._lock:
+            # Another thread may have built the same structure meanwhile; keep the first
+            structure = self._structures.setdefault(key, structure)
+            self._remember(self._structures, key, structure)
+        return structure
+
+    def _posterior_returns(self, structure: dict, Q: np.ndarray) -> np.ndarray:
+        # π + τΣPᵀ (PτΣPᵀ + Ω)⁻¹ (Q - Pπ), for every row of Q at once
+        residual = Q - structure["P"] @ self.pi
+        return self.pi + cho_solve(structure["factor"], residual.T).T @ structure["tau_sigma_P"].T
+
+    def _posterior_cov(self, structure: dict) -> pd.DataFrame:
+        if "cov" not in structure:
+            # Σ + τΣ - τΣPᵀ (PτΣPᵀ + Ω)⁻¹ PτΣ, with the correction formed as HᵀH to stay symmetric
+            lower, _ = structure["factor"]
+            H = solve_triangular(lower, structure["tau_sigma_P"].T, lower=True)
+            cov = self.cov + self.tau_sigma - H.T @ H
+            with self._lock:
+                structure.setdefault("cov", pd.DataFrame(cov, index=self.tickers, columns=self.tickers))
+        return structure["cov"]
+
+    def _remember(self, cache: OrderedDict, key, value) -> None:
+        # Callers hold self._lock
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+
+_engines = OrderedDict()
+_engines_lock = threading.Lock()
+
+
+def get_engine(cov_matrix: pd.DataFrame, tau: float = 0.05, max_engines: int = 16) -> BlackLittermanEngine:
+    """
+    Returns a shared zero-prior engine for this covariance matrix, building it on first use.
+    """
+    key = (tuple(cov_matrix.index), cov_matrix.to_numpy(dtype=float).tobytes(), tau)
+    with _engines_lock:
+        if key in _engines:
+            _engines.move_to_end(key)
+            return _engines[key]
+        engine = BlackLittermanEngine(cov_matrix, tau=tau)
+        _engines[key] = engine
+        if len(_engines) > max_engines:
+            _engines.popitem(last=False)
+        return engine
 
 
 class BlackLittermanModelWrapper:
     """
     Wrapper around PyPortfolioOpt's Black-Litterman Model for easy integration.
+
+    Posteriors are computed by a BlackLittermanEngine shared by every wrapper
+    built on the same covariance matrix, so only the views change per request.
     """
 
     def __init__(
@@ -32,29 +246,41 @@ class BlackLittermanModelWrapper:
         self.omega = omega
         self.tau = tau
 
-        self.bl = BlackLittermanModel(
-            cov_matrix=self.cov_matrix,
-            pi=None,
-            absolute_views=self.views,
-            omega=self.omega,
-            market_caps=self.market_weights,
-            tau=self.tau
-        )
+        self.engine = get_engine(self.cov_matrix, tau=self.tau)
+        self._bl = None
+
+    @property
+    def bl(self) -> "BlackLittermanModel":
+        """
+        The equivalent PyPortfolioOpt model, built on first access.
+        """
+        if self._bl is None:
+            from pypfopt.black_litterman import BlackLittermanModel
+            self._bl = BlackLittermanModel(
+                cov_matrix=self.cov_matrix,
+                pi=None,
+                absolute_views=self.views,
+                omega=self.omega,
+                market_caps=self.market_weights,
+                tau=self.tau
+            )
+        return self._bl
 
     def get_bl_returns(self) -> pd.Series:
         """
         Returns the adjusted expected returns from the Black-Litterman model.
         """
-        return self.bl.bl_returns()
+        return self.get_all()[0]
 
     def get_bl_cov(self) -> pd.DataFrame:
         """
         Returns the adjusted covariance matrix.
         """
-        return self.bl.bl_cov()
+        return self.get_all()[1]
 
     def get_all(self) -> tuple:
         """
         Returns both BL-adjusted returns and covariance matrix.
         """
-        return self.get_bl_returns(), self.get_bl_cov()
+        omega = None if self.omega is None else np.asarray(self.omega, dtype=float)
+        return self.engine.posterior(self.views, omega=omega)
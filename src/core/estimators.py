@@ -0,0 +1,252 @@
+from collections import deque
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class RollingEstimator:
+    """
+    Incremental estimator of expected returns and covariance from running statistics.
+
+    Appending or evicting one day of returns updates the sufficient statistics in
+    O(N²), so a shifted window never needs a full recompute. The covariance is
+    kept as a running mean and centred sum of squares, merged block by block
+    (Chan et al.), so it does not suffer the cancellation of Σrrᵀ/W - mmᵀ.
+    Returns must not contain gaps. Three modes:
+
+    - expanding (default): every appended day counts equally
+    - ``window``: only the last ``window`` days count; older days are evicted automatically
+    - ``halflife``: exponentially weighted, older days decay (no eviction)
+
+    Besides the sample covariance it offers Ledoit-Wolf and Oracle Approximating
+    shrinkage towards a scaled identity, computed from the same statistics. All
+    outputs are annualized pandas objects that can be passed straight to
+    PortfolioOptimizer or BlackLittermanModelWrapper.
+    """
+
+    def __init__(
+        self,
+        tickers: List[str],
+        window: Optional[int] = None,
+        halflife: Optional[float] = None,
+        frequency: int = 252
+    ):
+        """
+        :param tickers: Asset names, in the column order of appended returns
+        :param window: Number of most recent days to keep (None = expanding)
+        :param halflife: Half-life in days for exponential weighting (excludes ``window``)
+        :param frequency: Periods per year used for annualization
+        """
+        if window is not None and halflife is not None:
+            raise ValueError("Use either a window or a halflife, not both.")
+        self.tickers = list(tickers)
+        self.window = window
+        self.halflife = halflife
+        self.frequency = frequency
+        self.decay = 0.5 ** (1 / halflife) if halflife is not None else 1.0
+        self._rows = deque() if window is not None else None
+
+        n = len(self.tickers)
+        self.count = 0
+        self.weight = 0.0            # Σw
+        self.weight_sq = 0.0         # Σw²
+        self.sum_log = np.zeros(n)   # Σw log(1 + r)
+        self._mean = np.zeros(n)     # Σw r / Σw
+        self.m2 = np.zeros((n, n))   # Σw (r - mean)(r - mean)ᵀ
+        # Fourth-moment sums for Ledoit-Wolf, over x = r - shift with the shift fixed at the first append
+        self.shift = np.zeros(n)
+        self.sum_cube = np.zeros((n, n))     # Σw x_i² x_j
+        self.sum_quad = np.zeros((n, n))     # Σw x_i² x_j²
+
+    @classmethod
+    def from_prices(cls, prices: pd.DataFrame, **kwargs) -> "RollingEstimator":
+        """
+        Builds an estimator over the daily returns of ``prices``.
+
+        Rows where every price is missing are skipped; any other gap raises, so
+        fill or drop it first (e.g. ``prices.ffill()`` or ``prices.dropna()``).
+        """
+        estimator = cls(list(prices.columns), **kwargs)
+        estimator.append(prices.pct_change().dropna(how="all").to_numpy())
+        return estimator
+
+    # === Updates ===
+
+    def append(self, returns) -> None:
+        """
+        Adds one day (N,) or a block of days (T, N) of returns, oldest first.
+        """
+        block = _as_block(returns)
+        if not len(block):
+            return
+        if self.decay != 1.0:
+            # Row t of the block ends up with weight decay^(T-1-t); older sums decay by decay^T
+            weights = self.decay ** np.arange(len(block) - 1, -1, -1)
+            factor = self.decay ** len(block)
+            self._scale(factor)
+            self._accumulate(block, weights)
+        else:
+            self._accumulate(block, np.ones(len(block)))
+
+        if self._rows is not None:
+            self._rows.extend(block)
+            if len(self._rows) > self.window:
+                stale = np.array([self._rows.popleft() for _ in range(len(self._rows) - self.window)])
+                self._accumulate(stale, -np.ones(len(stale)))
+
+    def evict(self, returns) -> None:
+        """
+        Removes one day (N,) or a block of days (T, N) previously appended.
+
+        Only for equally weighted estimators that manage their own window.
+        """
+        if self.decay != 1.0 or self._rows is not None:
+            raise ValueError("evict is only available for expanding estimators without a window or halflife.")
+        block = _as_block(returns)
+        if len(block):
+            self._accumulate(block, -np.ones(len(block)))
+
+    def append_prices(self, previous: pd.Series, current: pd.Series) -> None:
+        """
+        Adds the return between two consecutive price rows.
+        """
+        self.append((current[self.tickers] / previous[self.tickers] - 1).to_numpy())
+
+    # === Estimates ===
+
+    def mean(self) -> np.ndarray:
+        return self._mean
+
+    def mean_historical_return(self) -> pd.Series:
+        """
+        Annualized expected returns.
+
+        Equally weighted modes compound the geometric mean like pypfopt's
+        mean_historical_return; the halflife mode compounds the weighted
+        arithmetic mean like ema_historical_return.
+        """
+        if self.decay != 1.0:
+            values = (1 + self.mean()) ** self.frequency - 1
+        else:
+            values = np.expm1(self.sum_log * self.frequency / self.weight)
+        return pd.Series(values, index=self.tickers)
+
+    def sample_cov(self) -> pd.DataFrame:
+        """
+        Annualized unbiased (weighted) sample covariance.
+        """
+        return self._frame(self._biased_cov() * self._bias_correction() * self.frequency)
+
+    def ledoit_wolf(self) -> pd.DataFrame:
+        """
+        Annualized Ledoit-Wolf shrinkage towards a scaled identity (as in scikit-learn).
+        """
+        cov, shrinkage, target = self._ledoit_wolf()
+        return self._frame(((1 - shrinkage) * cov + shrinkage * target * np.eye(len(cov))) * self.frequency)
+
+    def oracle_approximating(self) -> pd.DataFrame:
+        """
+        Annualized Oracle Approximating Shrinkage towards a scaled identity (as in scikit-learn).
+        """
+        cov = self._biased_cov()
+        n_features = len(cov)
+        target = np.trace(cov) / n_features
+        alpha = np.mean(cov ** 2)
+        numerator = alpha + target ** 2
+        denominator = (self.weight + 1) * (alpha - target ** 2 / n_features)
+        shrinkage = 1.0 if denominator == 0 else min(numerator / denominator, 1.0)
+        return self._frame(((1 - shrinkage) * cov + shrinkage * target * np.eye(n_features)) * self.frequency)
+
+    def shrinkage_intensity(self) -> float:
+        """
+        Ledoit-Wolf shrinkage intensity in [0, 1].
+        """
+        return self._ledoit_wolf()[1]
+
+    # === Internals ===
+
+    def _accumulate(self, block: np.ndarray, weights: np.ndarray) -> None:
+        # Weights all share one sign: +1 (or decayed) to add the block, -1 to remove it
+        if self.count == 0:
+            self.shift = block.mean(axis=0)
+        block_weight = weights.sum()
+        block_mean = weights @ block / block_weight
+        centered = block - block_mean
+        block_m2 = (centered * weights[:, None]).T @ centered
+
+        total = self.weight + block_weight
+        self.count += int(np.sign(weights).sum())
+        if self.count == 0:
+            self._reset()
+            return
+        delta = block_mean - self._mean
+        self.m2 += block_m2 + np.outer(delta, delta) * (self.weight * block_weight / total)
+        self._mean = self._mean + delta * (block_weight / total)
+        self.weight = total
+        self.weight_sq += np.sign(weights) @ weights ** 2
+        self.sum_log += np.log1p(block).T @ weights
+
+        shifted = block - self.shift
+        squared = shifted ** 2
+        self.sum_cube += (squared * weights[:, None]).T @ shifted
+        self.sum_quad += (squared * weights[:, None]).T @ squared
+
+    def _scale(self, factor: float) -> None:
+        self.weight *= factor
+        self.weight_sq *= factor ** 2
+        for stat in (self.sum_log, self.m2, self.sum_cube, self.sum_quad):
+            stat *= factor
+
+    def _reset(self) -> None:
+        # Everything appended has been evicted again; start from exact zeros instead of rounding residue
+        self.weight = self.weight_sq = 0.0
+        for stat in (self.sum_log, self._mean, self.m2, self.sum_cube, self.sum_quad):
+            stat[...] = 0.0
+
+    def _biased_cov(self) -> np.ndarray:
+        if self.weight <= 0:
+            raise ValueError("No returns have been appended yet.")
+        return self.m2 / self.weight
+
+    def _bias_correction(self) -> float:
+        # W² / (W² - Σw²); equals n / (n - 1) for equal weights
+        return self.weight ** 2 / (self.weight ** 2 - self.weight_sq)
+
+    def _ledoit_wolf(self):
+        n_samples = self.weight
+        cov = self._biased_cov()
+        n_features = len(cov)
+
+        # Σ_t y_i² y_j² for centered returns y = x - m, expanded in terms of the sums over shifted returns x
+        m = self._mean - self.shift
+        total = n_samples * m
+        outer = self.m2 + n_samples * np.outer(m, m)
+        sq = np.diag(outer)
+        centered_quad = (
+            self.sum_quad
+            - 2 * self.sum_cube * m[None, :]
+            - 2 * self.sum_cube.T * m[:, None]
+            + np.outer(sq, m ** 2) + np.outer(m ** 2, sq)
+            + 4 * np.outer(m, m) * outer
+            - 2 * np.outer(total * m, m ** 2)
+            - 2 * np.outer(m ** 2, total * m)
+            + n_samples * np.outer(m ** 2, m ** 2)
+        )
+
+        target = np.trace(cov) / n_features
+        beta = (centered_quad.sum() / n_samples - (cov ** 2).sum()) / (n_features * n_samples)
+        delta = ((cov ** 2).sum() - 2 * target * np.trace(cov) + n_features * target ** 2) / n_features
+        beta = min(beta, delta)
+        shrinkage = 0.0 if beta == 0 else beta / delta
+        return cov, shrinkage, target
+
+    def _frame(self, values: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame(values, index=self.tickers, columns=self.tickers)
+
+
+def _as_block(returns) -> np.ndarray:
+    block = np.atleast_2d(np.asarray(returns, dtype=float))
+    if np.isnan(block).any():
+        raise ValueError("Returns must not contain gaps; fill or drop them first.")
+    return block
@@ -1,87 +1,143 @@
-import yfinance as yf
+import logging
+from typing import List, Optional
+
 import pandas as pd
 import numpy as np
 
+from src.core.market_data import DataLoader
+from src.core.price_store import PriceStore
+from src.utils import profiling
+
 
 class CapmCalculator:
-    def __init__(self, start_date, end_date):
+    """
+    Computes CAPM expected returns for a universe of tickers.
+
+    All tickers, the market benchmark and the risk-free series are loaded with
+    one batched DataLoader request and shared by every calculation.
+    """
+
+    MARKET_TICKER = "^GSPC"
+    RISK_FREE_TICKER = "^IRX"
+
+    def __init__(self, start_date, end_date, store: Optional[PriceStore] = None):
+        """
+        :param start_date: Start of the estimation window
+        :param end_date: End of the estimation window (exclusive)
+        :param store: PriceStore to load prices from (defaults to PriceStore.default())
+        """
         self.start_date = start_date
         self.end_date = end_date
+        self.store = store
+        self._prices = pd.DataFrame()
+        self._requested = set()
+
+    @classmethod
+    def from_prices(cls, prices: pd.DataFrame, start_date, end_date) -> "CapmCalculator":
+        """
+        Calculator over already loaded prices (columns must include ^GSPC and ^IRX); never downloads.
+        """
+        capm = cls(start_date, end_date)
+        capm._prices = prices
+        capm._requested = set(prices.columns) | {cls.MARKET_TICKER, cls.RISK_FREE_TICKER}
+        return capm
+
+    @profiling.timed("capm.load_prices")
+    def load_prices(self, tickers: List[str]) -> pd.DataFrame:
+        """
+        Loads prices for ``tickers`` plus the benchmark and risk-free series in one request.
+
+        Results are kept on the instance, so later calls only load tickers not seen yet.
+        """
+        wanted = list(dict.fromkeys(list(tickers) + [self.MARKET_TICKER, self.RISK_FREE_TICKER]))
+        missing = [t for t in wanted if t not in self._requested]
+        if not missing:
+            return self._prices
+
+        self._requested.update(missing)
+        try:
+            result = DataLoader.load(missing, self.start_date, self.end_date, frequency="Adj Close", store=self.store)
+        except ValueError as e:
+            logging.warning(f"CAPM data unavailable for {missing}: {e}")
+            return self._prices
+
+        self._prices = result.prices if self._prices.empty else self._prices.join(result.prices, how="outer")
+        return self._prices
 
     def calculate_risk_free_rate(self):
-        rf_data = yf.download("^IRX", start=self.start_date, end=self.end_date, auto_adjust=True, progress=False)
-        prices = self._extract_adj_close(rf_data, "^IRX")
-        return prices.dropna().iloc[-1] / 100
+        prices = self._series(self.RISK_FREE_TICKER)
+        return prices.iloc[-1] / 100
 
     def calculate_market_return(self):
-        market_data = yf.download("^GSPC", start=self.start_date, end=self.end_date, auto_adjust=True, progress=False)
-        prices = self._extract_adj_close(market_data, "^GSPC")
-        returns = prices.pct_change().dropna()
+        returns = self._series(self.MARKET_TICKER).pct_change().dropna()
         return (1 + returns.mean()) ** 252 - 1
 
     def calculate_historical_return(self, ticker):
-        data = yf.download(ticker, start=self.start_date, end=self.end_date, auto_adjust=True, progress=False)
-        prices = self._extract_adj_close(data, ticker)
-        returns = prices.pct_change().dropna()
+        return self.calculate_historical_returns([ticker])[ticker]
+
+    def calculate_historical_returns(self, tickers: List[str]) -> pd.Series:
+        """
+        Annualized mean daily return for each ticker, computed column-wise in one pass.
+        """
+        prices = self.load_prices(tickers).reindex(columns=tickers)
+        returns = prices.pct_change(fill_method=None)
         return (1 + returns.mean()) ** 252 - 1
 
     def calculate_beta(self, ticker):
-        stock = yf.download(ticker, start=self.start_date, end=self.end_date, auto_adjust=True, progress=False)
-        market = yf.download("^GSPC", start=self.start_date, end=self.end_date, auto_adjust=True, progress=False)
-
-        stock_prices = self._extract_adj_close(stock, ticker).resample("M").last().pct_change().dropna()
-        market_prices = self._extract_adj_close(market, "^GSPC").resample("M").last().pct_change().dropna()
-
-        aligned = pd.concat([stock_prices, market_prices], axis=1).dropna()
-        aligned.columns = ["stock", "market"]
-
-        if aligned.shape[0] < 3:
-            raise ValueError(f"Not enough overlapping return data for {ticker}")
-
-        cov = np.cov(aligned["stock"], aligned["market"])[0, 1]
-        var_market = np.var(aligned["market"])
-
-        beta = cov / var_market
+        beta = self.calculate_betas([ticker])[ticker]
         if np.isnan(beta):
-            raise ValueError(f"Beta is NaN for {ticker}")
+            raise ValueError(f"Not enough overlapping return data for {ticker}")
         return beta
 
+    @profiling.timed("capm.betas")
+    def calculate_betas(self, tickers: List[str]) -> pd.Series:
+        """
+        Estimates every beta with a single vectorized regression on monthly returns.
+
+        Each ticker uses the months where both it and the market have a return.
+        Betas backed by fewer than 3 observations are NaN.
+        """
+        prices = self.load_prices(tickers)
+        if self.MARKET_TICKER not in prices.columns:
+            raise ValueError(f"No data for {self.MARKET_TICKER}")
+
+        monthly = prices.resample("ME").last().pct_change(fill_method=None)
+        stock = monthly.reindex(columns=tickers).to_numpy()
+        market = monthly[self.MARKET_TICKER].to_numpy()[:, None]
+
+        mask = np.isfinite(stock) & np.isfinite(market)
+        n = mask.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            stock_mean = np.where(mask, stock, 0).sum(axis=0) / n
+            market_mean = np.where(mask, market, 0).sum(axis=0) / n
+            stock_dev = np.where(mask, stock - stock_mean, 0)
+            market_dev = np.where(mask, market - market_mean, 0)
+            betas = (stock_dev * market_dev).sum(axis=0) / (market_dev ** 2).sum(axis=0)
+
+        betas[n < 3] = np.nan
+        return pd.Series(betas, index=tickers)
+
+    @profiling.timed("capm.expected_return")
     def calculate_expected_return(self, tickers):
+        tickers = list(dict.fromkeys(tickers))
+        self.load_prices(tickers)
+
         rf = self.calculate_risk_free_rate()
         rm = self.calculate_market_return()
 
-        expected = {}
-        for ticker in tickers:
-            try:
-                beta = self.calculate_beta(ticker)
-                expected[ticker] = rf + beta * (rm - rf)
-            except Exception as e:
-                print(f"CAPM error for {ticker}: {e}")
-                try:
-                    expected[ticker] = self.calculate_historical_return(ticker)
-                    print(f"Fallback: using historical return for {ticker}")
-                except Exception as fallback_e:
-                    print(f"Fallback failed for {ticker}: {fallback_e}")
-                    expected[ticker] = np.nan
-
-        return pd.Series(expected).dropna()
-
-    def _extract_adj_close(self, df, ticker): 
-        """Handles both single and multi-index yfinance DataFrames, with fallbacks for ^IRX and ^GSPC."""
-        if df is None or df.empty:
-            raise ValueError(f"No data for {ticker}")
+        betas = self.calculate_betas(tickers)
+        expected = rf + betas * (rm - rf)
 
-        # Handle multi-index structure
-        if isinstance(df.columns, pd.MultiIndex):
-            for col in ["Adj Close", "Close"]:
-                if (col, ticker) in df.columns:
-                    return df[(col, ticker)].dropna()
-                elif col in df.columns.get_level_values(0):
-                    return df[col].iloc[:, 0].dropna()
-            raise ValueError(f"Neither 'Adj Close' nor 'Close' found for {ticker} in multi-index") 
-        # Handle flat structure
-        for col in ["Adj Close", "Close"]:
-            if col in df.columns:
-                return df[col].dropna()
-
-        raise ValueError(f"Neither 'Adj Close' nor 'Close' found for {ticker}")
+        # Fallback: historical return for tickers without a usable beta
+        fallback = expected.index[expected.isna()]
+        if len(fallback):
+            logging.warning(f"CAPM beta unavailable, using historical return for: {list(fallback)}")
+            expected[fallback] = self.calculate_historical_returns(list(fallback))
+
+        return expected.dropna()
+
+    def _series(self, ticker):
+        prices = self.load_prices([])
+        if ticker not in prices.columns or prices[ticker].dropna().empty:
+            raise ValueError(f"No data for {ticker}")
+        return prices[ticker].dropna()
@@ -0,0 +1,111 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class FactorModel:
+    """
+    Low-rank plus diagonal covariance: Σ = B F Bᵀ + diag(d).
+
+    Stores O(N·k) numbers instead of the N² of a dense covariance matrix, which
+    keeps large universes (the full S&P 500) cheap to estimate, store and optimize.
+
+    :param tickers: Asset names, in the row order of ``loadings``
+    :param loadings: Factor exposures B, shape (N, k)
+    :param factor_cov: Annualized factor covariance F, shape (k, k)
+    :param specific_var: Annualized idiosyncratic variances d, shape (N,)
+    """
+    tickers: List[str]
+    loadings: np.ndarray
+    factor_cov: np.ndarray
+    specific_var: np.ndarray
+
+    @classmethod
+    def from_prices(cls, prices: pd.DataFrame, n_factors: int = 15, frequency: int = 252) -> "FactorModel":
+        """
+        Statistical (PCA) factor model from a date-indexed price matrix.
+        """
+        returns = prices.pct_change(fill_method=None).iloc[1:].dropna(axis=1, how="all")
+        return cls.from_returns(returns, n_factors=n_factors, frequency=frequency)
+
+    @classmethod
+    def from_returns(cls, returns: pd.DataFrame, n_factors: int = 15, frequency: int = 252) -> "FactorModel":
+        """
+        Statistical (PCA) factor model from daily returns; missing returns count as the asset's mean.
+
+        The leading ``n_factors`` principal components of the demeaned returns are
+        the factors; whatever they leave unexplained becomes specific variance.
+        """
+        X = returns.to_numpy(dtype=float)
+        X = np.where(np.isnan(X), 0.0, X - np.nanmean(X, axis=0))
+        n_obs = len(X)
+        if n_obs < 2:
+            raise ValueError("At least two observations are needed to fit a factor model.")
+        k = max(1, min(n_factors, n_obs - 1, X.shape[1]))
+
+        _, singular_values, vt = np.linalg.svd(X, full_matrices=False)
+        loadings = vt[:k].T
+        factor_var = singular_values[:k] ** 2 / (n_obs - 1) * frequency
+        total_var = (X ** 2).sum(axis=0) / (n_obs - 1) * frequency
+        specific_var = total_var - (loadings ** 2) @ factor_var
+
+        # Floor the residuals so the model stays positive definite
+        floor = 1e-4 * np.median(total_var[total_var > 0]) if (total_var > 0).any() else 1e-10
+        return cls(
+            tickers=list(returns.columns),
+            loadings=loadings,
+            factor_cov=np.diag(factor_var),
+            specific_var=np.maximum(specific_var, floor)
+        )
+
+    @property
+    def n_factors(self) -> int:
+        return self.loadings.shape[1]
+
+    def risk_factor(self) -> np.ndarray:
+        """
+        N x k matrix G with G Gᵀ = B F Bᵀ, so wᵀΣw = ‖Gᵀw‖² + Σ d w².
+        """
+        return self.loadings @ np.linalg.cholesky(self.factor_cov)
+
+    def variances(self, weights: np.ndarray) -> np.ndarray:
+        """
+        Portfolio variances for a (K, N) weight matrix or a single (N,) vector, without forming Σ.
+        """
+        weights = np.atleast_2d(np.asarray(weights, dtype=float))
+        exposures = weights @ self.risk_factor()
+        return (exposures ** 2).sum(axis=1) + (weights ** 2) @ self.specific_var
+
+    def solve(self, b: np.ndarray) -> np.ndarray:
+        """
+        Σ⁻¹b by the Woodbury identity, in O(N·k²) without forming Σ.
+
+        Σ⁻¹ = D⁻¹ - D⁻¹G (I + GᵀD⁻¹G)⁻¹ GᵀD⁻¹ with G = ``risk_factor()`` and D = diag(d).
+        """
+        from scipy.linalg import cho_factor, cho_solve
+        G = self.risk_factor()
+        scaled = np.asarray(b, dtype=float) / self.specific_var
+        G_scaled = G / self.specific_var[:, None]
+        capacitance = np.eye(self.n_factors) + G.T @ G_scaled
+        return scaled - G_scaled @ cho_solve(cho_factor(capacitance), G.T @ scaled)
+
+    def cov(self) -> pd.DataFrame:
+        """
+        Dense covariance matrix (only sensible for small universes).
+        """
+        dense = self.loadings @ self.factor_cov @ self.loadings.T + np.diag(self.specific_var)
+        return pd.DataFrame(dense, index=self.tickers, columns=self.tickers)
+
+    def subset(self, tickers: Optional[List[str]]) -> "FactorModel":
+        """
+        The same model restricted to (and ordered by) ``tickers``.
+        """
+        if tickers is None or list(tickers) == self.tickers:
+            return self
+        positions = pd.Index(self.tickers).get_indexer(tickers)
+        if (positions < 0).any():
+            raise ValueError(f"Tickers outside the factor model: {[t for t, p in zip(tickers, positions) if p < 0]}")
+        return FactorModel(list(tickers), self.loadings[positions], self.factor_cov, self.specific_var[positions])
@@ -0,0 +1,171 @@
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import cvxpy as cp
+import numpy as np
+import pandas as pd
+
+from src.core.factor_model import FactorModel
+from src.core.portfolio_math import evaluate_portfolios
+from src.utils import profiling
+
+
+@dataclass
+class Frontier:
+    """
+    Points on the efficient frontier, stored as arrays.
+
+    :param returns: Expected annual return of each point, shape (K,)
+    :param volatilities: Annual volatility of each point, shape (K,)
+    :param sharpe_ratios: Sharpe ratio of each point, shape (K,)
+    :param weights: Portfolio weights, shape (K, N)
+    :param tickers: Asset names for the weight columns
+    """
+    returns: np.ndarray
+    volatilities: np.ndarray
+    sharpe_ratios: np.ndarray
+    weights: np.ndarray
+    tickers: List[str]
+
+    def __len__(self) -> int:
+        return len(self.returns)
+
+    def max_sharpe(self) -> pd.Series:
+        """
+        Weights of the highest-Sharpe point on the sweep.
+        """
+        return pd.Series(self.weights[np.argmax(self.sharpe_ratios)], index=self.tickers)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        One row per point with return, volatility, Sharpe ratio and weights.
+        """
+        stats = pd.DataFrame({
+            "expected_annual_return": self.returns,
+            "annual_volatility": self.volatilities,
+            "sharpe_ratio": self.sharpe_ratios
+        })
+        return pd.concat([stats, pd.DataFrame(self.weights, columns=self.tickers)], axis=1)
+
+
+class FrontierSweep:
+    """
+    Traces the efficient frontier by re-solving one parametrized cvxpy problem.
+
+    The problem is compiled once with the target return (or risk aversion) as a
+    cvxpy Parameter; each point only updates the parameter value and re-solves,
+    skipping cvxpy's canonicalization. With a FactorModel the risk term is built
+    from the factor form, so no N x N matrix is formed.
+    """
+
+    def __init__(
+        self,
+        expected_returns: pd.Series,
+        cov_matrix: Optional[pd.DataFrame] = None,
+        risk_free_rate: float = 0.02,
+        weight_bounds: Tuple[float, float] = (0, 1),
+        solver: Optional[str] = "CLARABEL",
+        factor_model: Optional[FactorModel] = None
+    ):
+        """
+        :param expected_returns: Expected annual returns as a pandas Series
+        :param cov_matrix: Annual covariance matrix of asset returns
+        :param risk_free_rate: Risk-free rate used for Sharpe ratio calculation
+        :param weight_bounds: Lower and upper bound on each weight
+        :param solver: cvxpy solver name (None lets cvxpy choose)
+        :param factor_model: Low-rank plus diagonal covariance, used instead of ``cov_matrix``
+        """
+        if cov_matrix is None and factor_model is None:
+            raise ValueError("Either a covariance matrix or a factor model is required.")
+        self.tickers = list(expected_returns.index)
+        self.mu = expected_returns.to_numpy(dtype=float)
+        self.factor_model = None if factor_model is None else factor_model.subset(self.tickers)
+        self.cov = None if self.factor_model is not None else cov_matrix.loc[self.tickers, self.tickers].to_numpy(dtype=float)
+        self.risk_free_rate = risk_free_rate
+        self.solver = solver
+
+        n = len(self.tickers)
+        self._w = cp.Variable(n)
+        risk = _risk_term(self._w, self.cov, self.factor_model)
+        constraints = [cp.sum(self._w) == 1, self._w >= weight_bounds[0], self._w <= weight_bounds[1]]
+
+        self._target = cp.Parameter()
+        self._return_problem = cp.Problem(cp.Minimize(risk), constraints + [self.mu @ self._w >= self._target])
+
+        self._risk_aversion = cp.Parameter(nonneg=True)
+        self._utility_problem = cp.Problem(cp.Maximize(self.mu @ self._w - self._risk_aversion * risk), constraints)
+
+        self._max_return_problem = cp.Problem(cp.Maximize(self.mu @ self._w), constraints)
+
+    def sweep(self, n_points: int = 100, method: str = "return") -> Frontier:
+        """
+        Solves ``n_points`` frontier portfolios.
+
+        :param n_points: Number of points to solve
+        :param method: "return" sweeps target returns evenly between the minimum-variance
+                       and maximum-return portfolios; "risk_aversion" sweeps a log-spaced
+                       risk-aversion grid through the mean-variance utility
+        :return: Frontier with one entry per solved point (infeasible or failed points are skipped)
+        """
+        if method == "return":
+            problem, parameter, values = self._return_problem, self._target, self.target_returns(n_points)
+        elif method == "risk_aversion":
+            problem, parameter, values = self._utility_problem, self._risk_aversion, np.logspace(-2, 3, n_points)[::-1]
+        else:
+            raise ValueError(f"Unknown frontier method '{method}'")
+
+        weights = []
+        for value in values:
+            parameter.value = value
+            try:
+                problem.solve(solver=self.solver)
+            except cp.SolverError:
+                continue
+            profiling.record_solve(problem)
+            if self._w.value is not None and problem.status in ("optimal", "optimal_inaccurate"):
+                weights.append(self._w.value.copy())
+        return self._frontier(np.array(weights).reshape(-1, len(self.tickers)))
+
+    def target_returns(self, n_points: int) -> np.ndarray:
+        """
+        Evenly spaced target returns from the minimum-variance return to the maximum return.
+        """
+        # A target below every asset's return leaves the constraint slack: minimum variance
+        self._target.value = self.mu.min() - 1
+        self._return_problem.solve(solver=self.solver)
+        low = float(self.mu @ self._w.value)
+        self._max_return_problem.solve(solver=self.solver)
+        high = float(self.mu @ self._w.value)
+        return np.linspace(low, high, n_points)
+
+    def _frontier(self, weights: np.ndarray) -> Frontier:
+        # Drop solver noise around zero
+        weights = np.where(np.abs(weights) < 1e-8, 0.0, weights)
+        if self.factor_model is None:
+            returns, volatilities, sharpe = evaluate_portfolios(weights, self.mu, self.cov, self.risk_free_rate)
+        else:
+            returns = weights @ self.mu
+            volatilities = np.sqrt(self.factor_model.variances(weights))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                sharpe = (returns - self.risk_free_rate) / volatilities
+        return Frontier(returns, volatilities, sharpe, weights, self.tickers)
+
+
+def _risk_term(x, cov: Optional[np.ndarray], factor_model: Optional[FactorModel]):
+    """
+    cvxpy expression for xᵀΣx: ‖Gᵀx‖² + Σ d x² for a factor model, ‖Lᵀx‖² for a dense Σ = LLᵀ.
+    """
+    if factor_model is None:
+        return cp.sum_squares(_cov_factor(cov).T @ x)
+    return cp.sum_squares(factor_model.risk_factor().T @ x) + cp.sum_squares(cp.multiply(np.sqrt(factor_model.specific_var), x))
+
+
+def _cov_factor(cov: np.ndarray) -> np.ndarray:
+    """
+    Returns L with L @ L.T == cov, tolerating positive semi-definite input.
+    """
+    try:
+        return np.linalg.cholesky(cov)
+    except np.linalg.LinAlgError:
+        values, vectors = np.linalg.eigh(cov)
+        return vectors * np.sqrt(values.clip(min=0))
@@ -0,0 +1,96 @@
+from typing import Optional
+
+import numpy as np
+
+
+def correlation_distance(cov: np.ndarray) -> np.ndarray:
+    """
+    López de Prado's correlation distance sqrt((1 - ρ) / 2), computed for every pair at once.
+    """
+    sd = np.sqrt(np.diag(cov))
+    corr = cov / np.outer(sd, sd)
+    dist = np.sqrt(np.clip((1 - corr) / 2, 0, 1))
+    np.fill_diagonal(dist, 0)
+    return dist
+
+
+def cluster_order(cov: np.ndarray, linkage_method: str = "single") -> np.ndarray:
+    """
+    Asset order that places correlated assets next to each other (the leaves of the linkage tree).
+    """
+    from scipy.cluster.hierarchy import leaves_list, linkage
+    from scipy.spatial.distance import squareform
+
+    if len(cov) < 2:
+        return np.arange(len(cov))
+    condensed = squareform(correlation_distance(cov), checks=False)
+    return leaves_list(linkage(condensed, linkage_method))
+
+
+def hrp_weights(cov: np.ndarray, linkage_method: str = "single") -> np.ndarray:
+    """
+    Hierarchical Risk Parity weights: cluster, order, then split by recursive bisection.
+
+    Each split gives the two halves weights inversely proportional to their
+    inverse-variance-portfolio variances. All cluster variances come from one
+    2D prefix sum of the reordered covariance scaled by the inverse variances,
+    so every bisection level is a handful of vectorized operations and no
+    sub-matrix is ever sliced or solved.
+
+    :param cov: Covariance matrix, shape (N, N)
+    :param linkage_method: scipy linkage method ("single", "complete", "average", "ward", ...)
+    :return: Long-only weights summing to 1, in the input order
+    """
+    n = len(cov)
+    order = cluster_order(cov, linkage_method)
+    ordered = cov[np.ix_(order, order)]
+    inverse_var = 1 / np.diag(ordered)
+
+    # Block sums of u_i u_j Σ_ij over any [a, b) x [a, b) are four lookups into P
+    scaled = ordered * inverse_var[:, None]
+    scaled *= inverse_var[None, :]
+    P = np.zeros((n + 1, n + 1))
+    np.cumsum(scaled, axis=0, out=scaled)
+    np.cumsum(scaled, axis=1, out=P[1:, 1:])
+    U = np.r_[0.0, np.cumsum(inverse_var)]
+
+    def cluster_var(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        return (P[b, b] - P[a, b] - P[b, a] + P[a, a]) / (U[b] - U[a]) ** 2
+
+    log_weights = np.zeros(n + 1)
+    starts, ends = np.array([0]), np.array([n])
+    while True:
+        split = ends - starts > 1
+        starts, ends = starts[split], ends[split]
+        if not len(starts):
+            break
+        mids = (starts + ends) // 2
+        first, second = cluster_var(starts, mids), cluster_var(mids, ends)
+        alpha = 1 - first / (first + second)
+        # The clusters of one level are disjoint, so their multipliers go into one difference array
+        np.add.at(log_weights, starts, np.log(alpha))
+        np.add.at(log_weights, mids, np.log1p(-alpha) - np.log(alpha))
+        np.add.at(log_weights, ends, -np.log1p(-alpha))
+        starts, ends = np.concatenate([starts, mids]), np.concatenate([mids, ends])
+
+    weights = np.empty(n)
+    weights[order] = np.exp(np.cumsum(log_weights[:-1]))
+    return weights / weights.sum()
+
+
+def cap_weights(weights: np.ndarray, max_weight: Optional[float]) -> np.ndarray:
+    """
+    Caps weights at ``max_weight``, handing the excess to uncapped assets in proportion to their weight.
+    """
+    if max_weight is None:
+        return weights
+    if max_weight * len(weights) < 1 - 1e-9:
+        raise ValueError(f"A max weight of {max_weight} cannot be fully invested across {len(weights)} assets.")
+    weights = weights.copy()
+    while weights.max() > max_weight + 1e-12:
+        capped = weights >= max_weight
+        excess = (weights[capped] - max_weight).sum()
+        weights[capped] = max_weight
+        free = ~capped
+        weights[free] += excess * weights[free] / weights[free].sum()
+    return weights
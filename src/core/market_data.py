@@ -1,13 +1,41 @@
 import logging
-import yfinance as yf
-from typing import List, Optional, Tuple
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
 import pandas as pd
 
+from src.core.price_panel import PricePanel
+from src.core.price_store import PriceStore
+from src.utils import profiling
+
+
+@dataclass
+class LoadResult:
+    """
+    Outcome of a DataLoader request.
+
+    :param panel: Price data, one row per valid ticker
+    :param valid_tickers: Tickers that returned data for the requested range
+    :param dropped: Maps each dropped ticker to the reason it was dropped
+    """
+    panel: PricePanel
+    valid_tickers: List[str]
+    dropped: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def prices(self) -> pd.DataFrame:
+        """
+        Date-indexed price data, one column per valid ticker (a view of the panel).
+        """
+        return self.panel.to_frame()
+
 
 class DataLoader:
     """
-    Handles fetching and preprocessing of stock price data using yfinance.
+    Handles fetching and preprocessing of stock price data from Yahoo Finance.
     Provides cleaned Adjusted Close data for valid tickers.
+
+    Prices are served from a local PriceStore; only date ranges it does not
+    cover yet are downloaded, through the shared MarketDataClient.
     """
 
     @staticmethod
@@ -17,7 +45,8 @@ class DataLoader:
             end_date: Optional[str] = None,
             period: Optional[str] = "6mo",        # Default range: past 6 months
             frequency: str = "Adj Close",         # Type of price data to extract
-            return_updated_tickers: bool = False  # Return cleaned ticker list too
+            return_updated_tickers: bool = False, # Return cleaned ticker list too
+            store: Optional[PriceStore] = None    # Local price store (defaults to PriceStore.default())
             ) -> Tuple[pd.DataFrame, Optional[List[str]]]:
         """
         Downloads and filters historical stock data.
@@ -28,47 +57,97 @@ class DataLoader:
         - period: Shorthand like '6mo', '1y', 'max'
         - frequency: Column to extract: 'Adj Close', 'Close', 'Open', etc.
         - return_updated_tickers: Whether to return cleaned/valid tickers list
+        - store: PriceStore to read from and fill; pass one with a CSVFetcher to run offline
 
         Returns:
         - DataFrame of price data (date-indexed)
         - Optional: list of valid tickers that returned data
         """
+        result = DataLoader.load(tickers, start_date, end_date, period, frequency, store)
+        return (result.prices, result.valid_tickers) if return_updated_tickers else (result.prices, None)
 
-        valid_tickers = []
+    @staticmethod
+    @profiling.timed("data.load")
+    def load(
+            tickers: List[str],
+            start_date: Optional[str] = None,
+            end_date: Optional[str] = None,
+            period: Optional[str] = "6mo",
+            frequency: str = "Adj Close",
+            store: Optional[PriceStore] = None
+            ) -> LoadResult:
+        """
+        Loads price data and reports which tickers were dropped and why.
 
-        # Step 1: Validate each ticker individually using a short 1mo test
-        for ticker in tickers:
-            try:
-                hist = yf.download(ticker, period="1mo")
-                if hist is not None and not hist.empty:
-                    valid_tickers.append(ticker)
-                else:
-                    print(f"Ticker '{ticker}' is invalid or has no recent data.")
-            except Exception as e:
-                print(f"Error while validating ticker '{ticker}': {e}")
+        Validity is derived from the single bulk download: a ticker is valid if it
+        returned data. Tickers found invalid are remembered in the store's validity
+        index and skipped without a request until the entry expires.
 
-        # Step 2: Fail fast if no tickers were valid
-        if not valid_tickers:
-            raise ValueError("No valid tickers provided.")
+        Parameters: same as get_data
 
-        try:
-            # Step 3: Download historical price data for all valid tickers
+        Returns:
+        - LoadResult with prices, valid tickers and dropped tickers
+        """
+        store = store if store is not None else PriceStore.default()
+        dropped = {}
 
-            if start_date and end_date:
-                data = yf.download(valid_tickers, start=start_date, end=end_date, group_by="ticker", auto_adjust=False)
-            else:
-                data = yf.download(valid_tickers, period=period, group_by="ticker", auto_adjust=False)
-            # Step 4: Handle column extraction depending on number of tickers
-            if len(valid_tickers) > 1:
-                # Multi-index dataframe: (date, ticker, field)
-                extracted = data.xs(frequency, axis=1, level=1)
+        # Step 1: Skip tickers recently found invalid
+        candidates = []
+        for ticker in dict.fromkeys(tickers):
+            if store.validity.is_invalid(ticker):
+                dropped[ticker] = "cached as invalid"
             else:
-                # Single ticker: flat dataframe
-                extracted = data[[frequency]].rename(columns={frequency: valid_tickers[0]})
+                candidates.append(ticker)
 
-            # Step 5: Return data + optionally the cleaned ticker list
-            return (extracted, valid_tickers) if return_updated_tickers else (extracted, None)
+        if start_date and end_date:
+            start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        else:
+            start, end = DataLoader._period_to_range(period)
 
+        try:
+            # Step 2: One bulk request for the uncovered ranges, then read the requested field
+            failed = store.refresh(candidates, start, end) if candidates else []
+            panel = store.read_panel(candidates, start, end, field=frequency)
         except Exception as e:
             logging.error(f"Error fetching data: {e}")
             raise
+
+        # Step 3: Derive validity from what the bulk download returned; failed fetches say nothing about validity
+        newly_invalid = [t for t in candidates if t not in failed and not store.contains(t)]
+        store.validity.mark_invalid(newly_invalid)
+        # A ticker that was once invalid (e.g. before its listing) and now has data loses its stale entry
+        store.validity.clear([t for t in candidates if t in panel])
+        for ticker in candidates:
+            if ticker in failed and ticker not in panel:
+                dropped[ticker] = "fetch failed after retries"
+            elif ticker in newly_invalid:
+                dropped[ticker] = "no data returned"
+            elif ticker not in panel:
+                dropped[ticker] = "no data in date range"
+
+        valid_tickers = list(panel.tickers)
+        if dropped:
+            logging.info(f"Dropped tickers: {dropped}")
+
+        # Step 4: Fail fast if no tickers were valid
+        if not valid_tickers:
+            raise ValueError("No valid tickers provided.")
+
+        return LoadResult(panel, valid_tickers, dropped)
+
+    @staticmethod
+    def _period_to_range(period: str) -> Tuple[pd.Timestamp, pd.Timestamp]:
+        """
+        Converts a yfinance period string ('6mo', '1y', 'ytd', 'max', ...) into a date range.
+        """
+        end = pd.Timestamp.today().normalize() + pd.Timedelta(days=1)
+        if period == "max":
+            return pd.Timestamp("1900-01-01"), end
+        if period == "ytd":
+            return pd.Timestamp(year=end.year, month=1, day=1), end
+
+        units = {"d": "days", "wk": "weeks", "mo": "months", "y": "years"}
+        for suffix, unit in units.items():
+            if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+                return end - pd.DateOffset(**{unit: int(period[:-len(suffix)])}), end
+        raise ValueError(f"Unsupported period '{period}'")
@@ -0,0 +1,245 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.core.price_store import FetchError, PriceFetcher
+from src.utils import profiling
+from src.utils.retry import retry_with_backoff
+
+
+class TransientFetchError(Exception):
+    """
+    A provider failure worth retrying: throttling, timeouts, dropped connections.
+    """
+
+
+class MarketDataProvider:
+    """
+    Source of daily OHLCV history, one symbol per request.
+
+    ``history`` returns a date-indexed frame with one column per field, None
+    when the symbol has no data, and raises TransientFetchError for failures
+    that may succeed on a retry.
+    """
+
+    def history(self, ticker: str, start: str, end: str) -> Optional[pd.DataFrame]:
+        raise NotImplementedError
+
+
+class YahooProvider(MarketDataProvider):
+    """
+    Yahoo Finance through yfinance, sharing one HTTP session across all requests.
+    """
+
+    def __init__(self, timeout: float = 10.0):
+        """
+        :param timeout: Per-request timeout in seconds
+        """
+        self.timeout = timeout
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        """
+        Shared curl_cffi session (connection reuse across threads), or None to let yfinance pick.
+        """
+        with self._lock:
+            if self._session is None:
+                try:
+                    from curl_cffi import requests as curl_requests
+                except ImportError:
+                    return None
+                self._session = curl_requests.Session(impersonate="chrome")
+            return self._session
+
+    def history(self, ticker: str, start: str, end: str) -> Optional[pd.DataFrame]:
+        import yfinance as yf
+        from yfinance.exceptions import YFRateLimitError, YFTickerMissingError, YFTzMissingError
+
+        try:
+            with profiling.span("yfinance.history", ticker=ticker):
+                frame = yf.Ticker(ticker, session=self.session).history(
+                    start=start, end=end, auto_adjust=False, actions=False, timeout=self.timeout, raise_errors=True
+                )
+        except YFTzMissingError as e:
+            # yfinance also reports a failed connection as a missing timezone; only believe it if Yahoo answers
+            if not self._reachable():
+                raise TransientFetchError(f"Yahoo Finance unreachable while fetching {ticker}") from e
+            return None
+        except YFTickerMissingError:
+            # Also covers YFPricesMissingError: the symbol has no data in the range
+            return None
+        except (YFRateLimitError, OSError) as e:
+            # OSError covers connection resets, timeouts and curl errors
+            raise TransientFetchError(f"{type(e).__name__}: {e}") from e
+        if frame is None or frame.empty:
+            return None
+        # yfinance hides the raw responses; the decoded payload size is a close proxy
+        profiling.count("network.bytes", int(frame.memory_usage(deep=True).sum()))
+        return frame
+
+    def _reachable(self) -> bool:
+        session = self.session
+        if session is None:
+            return True
+        try:
+            session.head("https://query2.finance.yahoo.com", timeout=self.timeout)
+        except OSError:
+            return False
+        return True
+
+
+class StubProvider(MarketDataProvider):
+    """
+    In-memory provider for tests and offline runs.
+
+    Serves fixed frames, records every request and can simulate throttling
+    (the first ``failures`` requests raise TransientFetchError) and latency.
+    """
+
+    def __init__(self, frames: Dict[str, pd.DataFrame], failures: int = 0, delay: float = 0.0):
+        """
+        :param frames: OHLCV frame per ticker
+        :param failures: Number of requests that fail transiently before requests succeed
+        :param delay: Seconds each request takes
+        """
+        self.frames = frames
+        self.failures = failures
+        self.delay = delay
+        self.calls: List[Tuple[str, str, str]] = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_prices(cls, prices: pd.DataFrame, **kwargs) -> "StubProvider":
+        """
+        Stub serving a wide price frame as both Close and Adj Close.
+        """
+        frames = {
+            ticker: pd.DataFrame({"Close": series, "Adj Close": series}).dropna()
+            for ticker, series in prices.items()
+        }
+        return cls(frames, **kwargs)
+
+    def history(self, ticker: str, start: str, end: str) -> Optional[pd.DataFrame]:
+        with self._lock:
+            self.calls.append((ticker, start, end))
+            throttled = self.failures > 0
+            self.failures -= throttled
+        if self.delay:
+            time.sleep(self.delay)
+        if throttled:
+            raise TransientFetchError("Too Many Requests (stub)")
+        frame = self.frames.get(ticker)
+        if frame is None:
+            return None
+        frame = frame.loc[(frame.index >= pd.Timestamp(start)) & (frame.index < pd.Timestamp(end))]
+        return None if frame.empty else frame
+
+
+class MarketDataClient(PriceFetcher):
+    """
+    The single path by which prices are downloaded.
+
+    Symbols are fetched concurrently on a bounded thread pool shared by every
+    caller, each with retries and jittered exponential backoff on transient
+    failures. Concurrent requests for the same symbol and date range are
+    coalesced: later callers wait on the fetch already in flight instead of
+    issuing their own.
+    """
+
+    def __init__(
+        self,
+        provider: Optional[MarketDataProvider] = None,
+        max_workers: int = 8,
+        retries: int = 4,
+        base_delay: float = 1.0,
+        timeout: Optional[float] = 300.0
+    ):
+        """
+        :param provider: Where prices come from (defaults to Yahoo Finance)
+        :param max_workers: Maximum requests in flight across all callers
+        :param retries: Retries per symbol after a transient failure
+        :param base_delay: Delay before the first retry, in seconds
+        :param timeout: Seconds to wait for one symbol, retries included (None = no limit)
+        """
+        self.provider = provider if provider is not None else YahooProvider()
+        self.retries = retries
+        self.base_delay = base_delay
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="market-data")
+        self._inflight: Dict[Tuple[str, str, str], Future] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def default(cls) -> "MarketDataClient":
+        """
+        Returns the process-wide client, so every caller shares its pool and session.
+        """
+        global _default_client
+        with _default_lock:
+            if _default_client is None:
+                _default_client = cls()
+            return _default_client
+
+    def fetch(self, tickers: List[str], start: str, end: str) -> Dict[str, pd.DataFrame]:
+        """
+        Fetches every ticker concurrently; tickers without data are left out.
+
+        :raises FetchError: If some tickers still failed after their retries (carries the rest)
+        """
+        futures = {ticker: self.submit(ticker, start, end) for ticker in dict.fromkeys(tickers)}
+        result, failed = {}, []
+        for ticker, future in futures.items():
+            try:
+                frame = future.result(timeout=self.timeout)
+            except (TransientFetchError, TimeoutError) as e:
+                logging.warning(f"Price fetch for {ticker} failed: {e}")
+                failed.append(ticker)
+                continue
+            if frame is not None:
+                result[ticker] = frame
+        if failed:
+            raise FetchError(failed, result)
+        return result
+
+    def submit(self, ticker: str, start: str, end: str) -> Future:
+        """
+        Schedules one symbol, or joins the identical request already in flight.
+        """
+        key = (ticker, str(start), str(end))
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                profiling.count("market_data.coalesced")
+                return future
+            future = self._pool.submit(profiling.bind(self._fetch_one), *key)
+            self._inflight[key] = future
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def _fetch_one(self, ticker: str, start: str, end: str) -> Optional[pd.DataFrame]:
+        def request():
+            profiling.count("market_data.requests")
+            return self.provider.history(ticker, start, end)
+
+        return retry_with_backoff(
+            request,
+            retries=self.retries,
+            base_delay=self.base_delay,
+            retry_on=(TransientFetchError,),
+            description=f"Price fetch for {ticker}"
+        )
+
+    def _forget(self, key: Tuple[str, str, str], future: Future) -> None:
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+
+_default_client: Optional[MarketDataClient] = None
+_default_lock = threading.Lock()
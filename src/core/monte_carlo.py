@@ -0,0 +1,259 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.utils import profiling
+
+
+@dataclass
+class SimulationResult:
+    """
+    Aggregated outcome of a Monte Carlo simulation.
+
+    :param bands: Portfolio value percentiles per step (rows 0..horizon, one column per percentile)
+    :param terminal_values: Final portfolio value of every path
+    :param max_drawdowns: Maximum drawdown of every path, as a positive fraction of the running peak
+    :param initial_value: Starting portfolio value
+    """
+    bands: pd.DataFrame
+    terminal_values: np.ndarray
+    max_drawdowns: np.ndarray
+    initial_value: float
+
+    @property
+    def n_paths(self) -> int:
+        return len(self.terminal_values)
+
+    def var(self, level: float = 0.95) -> float:
+        """
+        Value at Risk: the loss (in currency) not exceeded with probability ``level``.
+        """
+        return self.initial_value - np.quantile(self.terminal_values, 1 - level)
+
+    def cvar(self, level: float = 0.95) -> float:
+        """
+        Conditional VaR: the average loss over the worst ``1 - level`` of paths.
+        """
+        cutoff = np.quantile(self.terminal_values, 1 - level)
+        return self.initial_value - self.terminal_values[self.terminal_values <= cutoff].mean()
+
+    def drawdown_percentiles(self, percentiles: Sequence[float] = (50, 90, 95, 99)) -> pd.Series:
+        return pd.Series(np.percentile(self.max_drawdowns, percentiles), index=list(percentiles))
+
+    def summary(self, level: float = 0.95) -> dict:
+        return {
+            "n_paths": self.n_paths,
+            "mean_terminal_value": float(self.terminal_values.mean()),
+            "median_terminal_value": float(np.median(self.terminal_values)),
+            "probability_of_loss": float((self.terminal_values < self.initial_value).mean()),
+            "var": float(self.var(level)),
+            "cvar": float(self.cvar(level)),
+            "median_max_drawdown": float(np.median(self.max_drawdowns))
+        }
+
+
+class MonteCarloSimulator:
+    """
+    Simulates future portfolio values under a multivariate GBM for asset prices.
+
+    Asset log returns per step are N((μ - σ²/2)·dt, Σ·dt), drawn as L·z with L the
+    Cholesky factor of Σ. Paths are generated chunk by chunk so memory stays
+    bounded however many paths are requested: each chunk only feeds per-step
+    histograms (for the percentile bands) and per-path terminal values and
+    maximum drawdowns (for exact VaR, CVaR and drawdown statistics).
+
+    Every chunk draws from its own generator spawned from one SeedSequence, so
+    results are identical for a given seed whatever the number of workers.
+
+    Weights must be long-only and invest at most the portfolio value (the rest is
+    cash): a short or leveraged portfolio can lose more than its value, and its
+    log value is then undefined.
+    """
+
+    def __init__(
+        self,
+        expected_returns: pd.Series,
+        cov_matrix: pd.DataFrame,
+        weights: pd.Series,
+        initial_value: float = 1.0,
+        frequency: int = 252
+    ):
+        """
+        :param expected_returns: Expected annual returns, e.g. the Black-Litterman posterior
+        :param cov_matrix: Annual covariance matrix of asset returns
+        :param weights: Long-only portfolio weights summing to at most 1 (assets not in ``weights`` are not held)
+        :param initial_value: Starting portfolio value
+        :param frequency: Simulation steps per year
+        """
+        weights = pd.Series(weights, dtype=float)
+        # Tolerates weights that only exceed 1 through rounding
+        if (weights < 0).any() or weights.sum() > 1 + 1e-3:
+            raise ValueError("Monte Carlo simulation needs long-only weights summing to at most 1 (no shorts or leverage).")
+        self.tickers = list(weights[weights != 0].index)
+        self.weights = weights[self.tickers].to_numpy()
+        self.mu = expected_returns[self.tickers].to_numpy(dtype=float)
+        self.cov = cov_matrix.loc[self.tickers, self.tickers].to_numpy(dtype=float)
+        self.initial_value = initial_value
+        self.frequency = frequency
+
+    @classmethod
+    def from_black_litterman(cls, bl_model, weights: pd.Series, **kwargs) -> "MonteCarloSimulator":
+        """
+        Simulator driven by a BlackLittermanModelWrapper's posterior returns and covariance.
+        """
+        bl_returns, bl_cov = bl_model.get_all()
+        return cls(bl_returns, bl_cov, weights, **kwargs)
+
+    @profiling.timed("monte_carlo.simulate")
+    def simulate(
+        self,
+        n_paths: int = 10000,
+        horizon: int = 252,
+        seed: Optional[int] = None,
+        method: str = "assets",
+        rebalance: bool = True,
+        percentiles: Sequence[float] = (5, 25, 50, 75, 95),
+        chunk_size: Optional[int] = None,
+        memory_limit: int = 64 * 2 ** 20,
+        bins: int = 2000,
+        n_workers: int = 1
+    ) -> SimulationResult:
+        """
+        Runs the simulation.
+
+        :param n_paths: Number of simulated paths
+        :param horizon: Steps per path (252 = one year of trading days)
+        :param seed: Seed for reproducible results
+        :param method: "assets" simulates every asset; "projected" simulates the portfolio's
+                       own log return, N(wᵀμ - wᵀΣw/2, wᵀΣw) per unit time, which is exact for a
+                       continuously rebalanced portfolio and N times cheaper
+        :param rebalance: With "assets", rebalance to ``weights`` every step (else buy and hold)
+        :param percentiles: Percentiles reported in the bands
+        :param chunk_size: Paths per chunk (default: as many as fit in ``memory_limit``)
+        :param memory_limit: Approximate bytes of simulated values per chunk (peak use is a few times this)
+        :param bins: Histogram bins per step used for the bands
+        :param n_workers: Processes used to run chunks (1 = in-process)
+        """
+        if method not in ("assets", "projected"):
+            raise ValueError(f"Unknown method '{method}'")
+        width = len(self.tickers) if method == "assets" else 1
+        chunk_size = chunk_size or max(1, memory_limit // (8 * horizon * width))
+        sizes = [min(chunk_size, n_paths - start) for start in range(0, n_paths, chunk_size)]
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        edges = self._bin_edges(horizon, bins)
+
+        tasks = ((self, size, horizon, child, method, rebalance, edges) for size, child in zip(sizes, seeds))
+        counts = np.zeros((horizon, bins), dtype=np.int64)
+        terminal, drawdowns = np.empty(n_paths), np.empty(n_paths)
+        with ProcessPoolExecutor(max_workers=n_workers) if n_workers > 1 and len(sizes) > 1 else _InProcess() as pool:
+            start = 0
+            # Chunks come back in submission order, so each lands in the same slots whatever the worker count
+            for size, (chunk_counts, chunk_terminal, chunk_drawdowns) in zip(sizes, pool.map(_simulate_chunk, tasks)):
+                counts += chunk_counts
+                terminal[start:start + size] = chunk_terminal
+                drawdowns[start:start + size] = chunk_drawdowns
+                start += size
+        profiling.count("monte_carlo.paths", n_paths)
+
+        log_bands = _histogram_percentiles(counts, edges, percentiles)
+        bands = pd.DataFrame(
+            self.initial_value * np.exp(np.vstack([np.zeros(len(percentiles)), log_bands])),
+            columns=[f"p{p:g}" for p in percentiles]
+        )
+        bands.index.name = "step"
+        return SimulationResult(bands, self.initial_value * np.exp(terminal), drawdowns, self.initial_value)
+
+    def portfolio_moments(self) -> Tuple[float, float]:
+        """
+        Per-step drift and volatility of the portfolio's log value (continuous rebalancing).
+        """
+        dt = 1 / self.frequency
+        variance = float(self.weights @ self.cov @ self.weights)
+        return (float(self.weights @ self.mu) - variance / 2) * dt, float(np.sqrt(variance * dt))
+
+    def _bin_edges(self, horizon: int, bins: int) -> "_BinEdges":
+        # Per-step histogram ranges of ±8σ around the expected log value cover any practical band
+        drift, vol = self.portfolio_moments()
+        steps = np.arange(1, horizon + 1)
+        spread = 8 * max(vol, 1e-12) * np.sqrt(steps) + 1e-9
+        return _BinEdges(drift * steps - spread, 2 * spread / bins, bins)
+
+    def _draw(self, rng: np.random.Generator, size: int, horizon: int, method: str, rebalance: bool) -> np.ndarray:
+        """
+        Log portfolio value relative to the start, shape (horizon, size).
+        """
+        dt = 1 / self.frequency
+        if method == "projected" or len(self.tickers) == 1 and rebalance:
+            drift, vol = self.portfolio_moments()
+            return np.cumsum(drift + vol * rng.standard_normal((horizon, size)), axis=0)
+
+        factor = np.linalg.cholesky(self.cov * dt + 1e-14 * np.eye(len(self.cov)))
+        drift = (self.mu - np.diag(self.cov) / 2) * dt
+        log_returns = rng.standard_normal((horizon, size, len(self.tickers))) @ factor.T + drift
+        if rebalance:
+            return np.cumsum(np.log(np.expm1(log_returns) @ self.weights + 1), axis=0)
+        # Buy and hold: the uninvested remainder stays in cash
+        return np.log(np.exp(np.cumsum(log_returns, axis=0)) @ self.weights + (1 - self.weights.sum()))
+
+
+class _BinEdges(NamedTuple):
+    """Per-step histogram layout: bin i of step t starts at lower[t] + i * width[t]."""
+    lower: np.ndarray
+    width: np.ndarray
+    bins: int
+
+
+class _InProcess:
+    """Stand-in for a process pool that runs chunks lazily in the calling process."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def map(self, fn, iterable):
+        return map(fn, iterable)
+
+
+def _simulate_chunk(task):
+    simulator, size, horizon, seed, method, rebalance, (lower, width, n_bins) = task
+    rng = np.random.default_rng(seed)
+    log_values = simulator._draw(rng, size, horizon, method, rebalance)
+
+    terminal = log_values[-1].copy()
+    peaks = np.maximum.accumulate(log_values, axis=0)
+    np.maximum(peaks, 0, out=peaks)
+    np.subtract(log_values, peaks, out=peaks)
+    max_drawdowns = -np.expm1(peaks.min(axis=0))
+    del peaks
+
+    # One bincount for every step's histogram, with bin indices offset by step; reuses the path array
+    log_values -= lower[:, None]
+    log_values /= width[:, None]
+    np.clip(log_values, 0, n_bins - 1, out=log_values)
+    index = log_values.astype(np.int64)
+    index += (np.arange(horizon) * n_bins)[:, None]
+    counts = np.bincount(index.ravel(), minlength=horizon * n_bins).reshape(horizon, n_bins)
+    return counts, terminal, max_drawdowns
+
+
+def _histogram_percentiles(counts: np.ndarray, edges: _BinEdges, percentiles: Sequence[float]) -> np.ndarray:
+    """
+    Percentiles of every step's distribution from its histogram, interpolating within bins.
+    """
+    lower, width, _ = edges
+    cdf = np.cumsum(counts, axis=1)
+    total = cdf[:, -1:]
+    out = np.empty((len(counts), len(percentiles)))
+    for k, p in enumerate(percentiles):
+        target = p / 100 * total
+        position = np.minimum((cdf < target).sum(axis=1), counts.shape[1] - 1)
+        below = np.take_along_axis(cdf, position[:, None], axis=1) - np.take_along_axis(counts, position[:, None], axis=1)
+        inside = np.take_along_axis(counts, position[:, None], axis=1)
+        fraction = np.where(inside > 0, (target - below) / np.maximum(inside, 1), 0.5)
+        out[:, k] = lower + (position + fraction[:, 0]) * width
+    return out
@@ -1,48 +1,295 @@
+from typing import TYPE_CHECKING, Optional
+
 import pandas as pd
 import numpy as np
-from pypfopt import EfficientFrontier, risk_models, expected_returns
+
+from src.core.factor_model import FactorModel
+from src.core.portfolio_math import evaluate_portfolios, min_variance_weights, tangency_weights
+from src.utils import profiling
+
+if TYPE_CHECKING:
+    from src.core.frontier import Frontier
+    from src.core.rebalance import RebalancePlan
+    from src.core.resampling import ResampledResult
 
 
 class PortfolioOptimizer:
     """
     Optimizes a portfolio based on expected returns and covariance matrix using PyPortfolioOpt.
-    Supports maximizing Sharpe ratio and minimizing volatility.
+    Supports maximizing Sharpe ratio, minimizing volatility, minimizing CVaR over return scenarios,
+    solver-free Hierarchical Risk Parity and bootstrap-resampled max-Sharpe / min-volatility weights.
+
+    For large universes pass a FactorModel instead of a dense covariance matrix:
+    the problem is then solved directly in factor form, in O(N·k) memory (except
+    HRP, which clusters on the dense correlation matrix).
     """
 
-    def __init__(self, expected_returns: pd.Series, cov_matrix: pd.DataFrame, risk_free_rate: float = 0.02):
+    # Weights below this are dropped, as PyPortfolioOpt's clean_weights does
+    WEIGHT_CUTOFF = 1e-4
+    # Largest factor-model universe expanded to a dense covariance (HRP clusters on the full correlation matrix)
+    MAX_DENSE_ASSETS = 2000
+
+    def __init__(
+        self,
+        expected_returns: pd.Series,
+        cov_matrix: Optional[pd.DataFrame] = None,
+        risk_free_rate: float = 0.02,
+        factor_model: Optional[FactorModel] = None
+    ):
         """
         Initialize the optimizer with expected returns and covariance matrix.
 
         :param expected_returns: Expected annual returns as a pandas Series
         :param cov_matrix: Covariance matrix of asset returns
         :param risk_free_rate: Risk-free rate used for Sharpe ratio calculation
+        :param factor_model: Low-rank plus diagonal covariance, used instead of ``cov_matrix``
         """
+        if cov_matrix is None and factor_model is None:
+            raise ValueError("Either a covariance matrix or a factor model is required.")
         self.expected_returns = expected_returns
         self.cov_matrix = cov_matrix
         self.risk_free_rate = risk_free_rate
+        self.factor_model = None if factor_model is None else factor_model.subset(list(expected_returns.index))
 
-    def maximize_sharpe(self) -> pd.Series:
+    @profiling.timed("optimizer.max_sharpe")
+    def maximize_sharpe(self, max_weight: Optional[float] = None, max_assets: Optional[int] = None) -> pd.Series:
         """
         Optimize portfolio to maximize the Sharpe ratio.
 
+        :param max_weight: Upper bound on each weight
+        :param max_assets: Maximum number of holdings (heuristic: relax, keep the largest, re-solve)
         :return: Cleaned weights as a pandas Series
         """
+        if self.factor_model is not None or max_weight is not None or max_assets is not None:
+            return self._solve_structured("max_sharpe", max_weight, max_assets)
+        from pypfopt import EfficientFrontier
         ef = EfficientFrontier(self.expected_returns, self.cov_matrix)
         ef.max_sharpe(risk_free_rate=self.risk_free_rate)
+        # _opt is PyPortfolioOpt's private cvxpy problem; without it only the solve is counted
+        profiling.record_solve(getattr(ef, "_opt", None))
         cleaned_weights = ef.clean_weights()
         return pd.Series(cleaned_weights)
 
-    def minimize_volatility(self) -> pd.Series:
+    @profiling.timed("optimizer.min_volatility")
+    def minimize_volatility(self, max_weight: Optional[float] = None, max_assets: Optional[int] = None) -> pd.Series:
         """
         Optimize portfolio to minimize total volatility.
 
+        :param max_weight: Upper bound on each weight
+        :param max_assets: Maximum number of holdings (heuristic: relax, keep the largest, re-solve)
         :return: Cleaned weights as a pandas Series
         """
+        if self.factor_model is not None or max_weight is not None or max_assets is not None:
+            return self._solve_structured("min_volatility", max_weight, max_assets)
+        from pypfopt import EfficientFrontier
         ef = EfficientFrontier(self.expected_returns, self.cov_matrix)
         ef.min_volatility()
+        profiling.record_solve(getattr(ef, "_opt", None))
         cleaned_weights = ef.clean_weights()
         return pd.Series(cleaned_weights)
 
+    @profiling.timed("optimizer.min_cvar")
+    def minimize_cvar(
+        self,
+        scenarios: pd.DataFrame,
+        alpha: float = 0.95,
+        target_return: Optional[float] = None,
+        max_drawdown: Optional[float] = None,
+        max_weight: Optional[float] = None,
+        max_assets: Optional[int] = None,
+        n_scenarios: Optional[int] = None,
+        seed: Optional[int] = None
+    ) -> pd.Series:
+        """
+        Optimize portfolio to minimize CVaR (expected shortfall) over return scenarios.
+
+        :param scenarios: Per-period asset returns, historical (in time order) or simulated
+        :param alpha: Confidence level; CVaR averages the worst 1 - alpha of scenarios
+        :param target_return: Minimum expected annual return (from ``expected_returns``)
+        :param max_drawdown: Largest allowed drawdown of the scenario path, as a fraction
+        :param max_weight: Upper bound on each weight
+        :param max_assets: Maximum number of holdings (heuristic: relax, keep the largest, re-solve)
+        :param n_scenarios: Optimize over a random subsample of this many scenarios
+        :param seed: Seed for the subsample
+        :return: Cleaned weights as a pandas Series
+        """
+        from src.core.tail_risk import CVaROptimizer
+        tickers = self.expected_returns.index
+        scenarios = scenarios[tickers]
+        solver = CVaROptimizer(scenarios, self.expected_returns, max_weight, n_scenarios, seed)
+        weights = solver.min_cvar(alpha, target_return, max_drawdown)
+        if max_assets is not None and (weights > self.WEIGHT_CUTOFF).sum() > max_assets:
+            # Cardinality heuristic, as for the mean-variance objectives
+            active = tickers[tickers.isin(weights.nlargest(max_assets).index)]
+            solver = CVaROptimizer(scenarios[active], self.expected_returns[active], max_weight, n_scenarios, seed)
+            weights = solver.min_cvar(alpha, target_return, max_drawdown).reindex(tickers, fill_value=0)
+
+        weights[weights < self.WEIGHT_CUTOFF] = 0
+        return (weights / weights.sum()).round(5)
+
+    @profiling.timed("optimizer.hrp")
+    def hierarchical_risk_parity(
+        self,
+        linkage_method: str = "single",
+        max_weight: Optional[float] = None,
+        max_assets: Optional[int] = None
+    ) -> pd.Series:
+        """
+        Allocate by Hierarchical Risk Parity: cluster on correlation, then split risk by recursive bisection.
+
+        Needs only the covariance matrix and no solver, so it stays fast and
+        stable for large or ill-conditioned universes. Expected returns are not used.
+        The clustering needs every pairwise correlation, so a factor model is expanded
+        to the dense matrix; universes above ``MAX_DENSE_ASSETS`` are rejected.
+
+        :param linkage_method: scipy linkage method for the clustering ("single", "average", "ward", ...)
+        :param max_weight: Upper bound on each weight (excess is handed to the other assets)
+        :param max_assets: Maximum number of holdings (keep the largest, re-allocate among them)
+        :return: Cleaned weights as a pandas Series
+        """
+        from src.core.hrp import cap_weights, hrp_weights
+        tickers = self.expected_returns.index
+        cov = self._cov_array()
+        weights = hrp_weights(cov, linkage_method)
+        if max_assets is not None and len(tickers) > max_assets:
+            keep = np.sort(np.argsort(weights)[-max_assets:])
+            weights = np.zeros(len(tickers))
+            weights[keep] = hrp_weights(cov[np.ix_(keep, keep)], linkage_method)
+            weights[keep] = cap_weights(weights[keep], max_weight)
+        else:
+            weights = cap_weights(weights, max_weight)
+
+        weights = pd.Series(weights, index=tickers)
+        weights[weights < self.WEIGHT_CUTOFF] = 0
+        return (weights / weights.sum()).round(5)
+
+    @profiling.timed("optimizer.resampled")
+    def resampled(
+        self,
+        returns: pd.DataFrame,
+        objective: str = "max_sharpe",
+        n_resamples: int = 1000,
+        block_size: Optional[int] = None,
+        max_weight: Optional[float] = None,
+        seed: int = 0,
+        n_workers: int = 1
+    ) -> "ResampledResult":
+        """
+        Resampled optimization: average the weights of portfolios re-optimized on bootstrapped return histories.
+
+        Estimates are redrawn from ``returns`` for every sample, so ``expected_returns`` only selects the assets.
+
+        :param returns: Daily asset returns without gaps
+        :param objective: "max_sharpe" or "min_volatility"
+        :param n_resamples: Number of bootstrap samples
+        :param block_size: Days per bootstrap block (None = i.i.d. days)
+        :param max_weight: Upper bound on each weight
+        :param seed: Root seed; results are reproducible for any ``n_workers``
+        :param n_workers: Processes used for the samples
+        :return: Averaged weights with per-asset dispersion
+        """
+        from src.core.resampling import ResampledOptimizer
+        resampler = ResampledOptimizer(
+            returns[self.expected_returns.index], objective, self.risk_free_rate, max_weight, block_size
+        )
+        return resampler.run(n_resamples, seed=seed, n_workers=n_workers)
+
+    @profiling.timed("optimizer.rebalance")
+    def rebalance(
+        self,
+        prices: pd.Series,
+        investment: float,
+        current_shares: Optional[pd.Series] = None,
+        current_weights: Optional[pd.Series] = None,
+        objective: str = "max_sharpe",
+        turnover_penalty: float = 0.001,
+        max_weight: Optional[float] = None,
+        transaction_cost: float = 0.001
+    ) -> "RebalancePlan":
+        """
+        Re-optimize from existing holdings: trade towards the ``objective`` portfolio only where it pays.
+
+        For repeated (e.g. daily) rebalancing keep a Rebalancer instead, so its compiled problem is reused.
+
+        :param prices: Latest price per ticker
+        :param investment: Portfolio value after rebalancing
+        :param current_shares: Shares held per ticker (or pass ``current_weights``)
+        :param current_weights: Weights held per ticker
+        :param objective: "max_sharpe", "min_volatility" or "hrp" for the target portfolio
+        :param turnover_penalty: Penalty per unit of turnover, in annual tracking-variance units
+        :param max_weight: Upper bound on each weight
+        :param transaction_cost: Cost per unit of traded value, used for the cost estimate
+        :return: Weights, integer shares and the trade list
+        """
+        from src.core.rebalance import Rebalancer
+        solvers = {
+            "max_sharpe": self.maximize_sharpe,
+            "min_volatility": self.minimize_volatility,
+            "hrp": self.hierarchical_risk_parity
+        }
+        if objective not in solvers:
+            raise ValueError(f"Unknown objective '{objective}' (expected one of {tuple(solvers)})")
+        target = solvers[objective](max_weight=max_weight)
+        tickers = self.expected_returns.index
+        if self.factor_model is not None:
+            rebalancer = Rebalancer(None, turnover_penalty, max_weight, transaction_cost, factor_model=self.factor_model)
+        else:
+            rebalancer = Rebalancer(self.cov_matrix.loc[tickers, tickers], turnover_penalty, max_weight, transaction_cost)
+        return rebalancer.plan(target, prices, investment, current_shares, current_weights)
+
+    @profiling.timed("optimizer.efficient_frontier")
+    def efficient_frontier(self, n_points: int = 100, method: str = "return") -> "Frontier":
+        """
+        Trace the efficient frontier with one compiled problem re-solved per point.
+
+        :param n_points: Number of frontier points
+        :param method: "return" (target-return sweep) or "risk_aversion" (utility sweep)
+        :return: Frontier with returns, volatilities, Sharpe ratios and weights as arrays
+        """
+        from src.core.frontier import FrontierSweep
+        sweep = FrontierSweep(
+            self.expected_returns, self.cov_matrix, risk_free_rate=self.risk_free_rate, factor_model=self.factor_model
+        )
+        return sweep.sweep(n_points=n_points, method=method)
+
+    def min_variance_analytic(self) -> pd.Series:
+        """
+        Closed-form minimum-variance portfolio without weight bounds (shorting allowed).
+
+        :return: Weights as a pandas Series
+        """
+        cov = self.factor_model if self.factor_model is not None else self._cov_array()
+        return pd.Series(min_variance_weights(cov), index=self.expected_returns.index)
+
+    def tangency_analytic(self) -> pd.Series:
+        """
+        Closed-form maximum-Sharpe portfolio without weight bounds (shorting allowed).
+
+        :return: Weights as a pandas Series
+        """
+        cov = self.factor_model if self.factor_model is not None else self._cov_array()
+        weights = tangency_weights(self.expected_returns.to_numpy(dtype=float), cov, self.risk_free_rate)
+        return pd.Series(weights, index=self.expected_returns.index)
+
+    def evaluate(self, weights_matrix) -> pd.DataFrame:
+        """
+        Score many candidate portfolios in one pass.
+
+        :param weights_matrix: K x N array (columns in expected_returns order) or a DataFrame
+                               with one row per portfolio and ticker columns
+        :return: DataFrame with expected return, volatility and Sharpe ratio per portfolio
+        """
+        index = None
+        if isinstance(weights_matrix, pd.DataFrame):
+            index = weights_matrix.index
+            weights_matrix = weights_matrix.reindex(columns=self.expected_returns.index, fill_value=0).to_numpy(dtype=float)
+        returns, vols, sharpe = self._evaluate(weights_matrix)
+        return pd.DataFrame({
+            "expected_annual_return": returns,
+            "annual_volatility": vols,
+            "sharpe_ratio": sharpe
+        }, index=index)
+
     def portfolio_performance(self, weights: dict) -> dict:
         """
         Calculate expected performance metrics for a given set of weights.
@@ -50,11 +297,102 @@ class PortfolioOptimizer:
         :param weights: Dictionary or Series of asset weights
         :return: Dict containing expected return, volatility, and Sharpe ratio
         """
-        ef = EfficientFrontier(self.expected_returns, self.cov_matrix)
-        ef.set_weights(weights)
-        perf = ef.portfolio_performance(verbose=False)
+        w = pd.Series(weights, dtype=float).reindex(self.expected_returns.index, fill_value=0).to_numpy()
+        returns, vols, sharpe = self._evaluate(w)
         return {
-            "expected_annual_return": perf[0],
-            "annual_volatility": perf[1],
-            "sharpe_ratio": perf[2]
+            "expected_annual_return": returns[0],
+            "annual_volatility": vols[0],
+            "sharpe_ratio": sharpe[0]
         }
+
+    def _evaluate(self, weights: np.ndarray):
+        mu = self.expected_returns.to_numpy(dtype=float)
+        if self.factor_model is None:
+            return evaluate_portfolios(weights, mu, self._cov_array(), self.risk_free_rate)
+        weights = np.atleast_2d(weights)
+        returns = weights @ mu
+        vols = np.sqrt(self.factor_model.variances(weights))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return returns, vols, (returns - self.risk_free_rate) / vols
+
+    def _cov_frame(self) -> pd.DataFrame:
+        if self.cov_matrix is not None:
+            return self.cov_matrix
+        n = len(self.factor_model.tickers)
+        if n > self.MAX_DENSE_ASSETS:
+            raise ValueError(
+                f"Hierarchical Risk Parity needs the dense covariance matrix, too large for {n} assets "
+                f"(limit {self.MAX_DENSE_ASSETS}); use max_sharpe or min_volatility."
+            )
+        return self.factor_model.cov()
+
+    def _cov_array(self) -> np.ndarray:
+        tickers = self.expected_returns.index
+        return self._cov_frame().loc[tickers, tickers].to_numpy(dtype=float)
+
+    def _solve_structured(self, objective: str, max_weight: Optional[float], max_assets: Optional[int]) -> pd.Series:
+        """
+        Long-only max-Sharpe / min-volatility in factor form: wᵀΣw = ‖Gᵀw‖² + Σ d w².
+
+        A dense covariance is handled as G = its Cholesky factor and d = 0.
+        """
+        tickers = self.expected_returns.index
+        mu = self.expected_returns.to_numpy(dtype=float)
+        if self.factor_model is not None:
+            G, d = self.factor_model.risk_factor(), self.factor_model.specific_var
+        else:
+            from src.core.frontier import _cov_factor
+            G, d = _cov_factor(self._cov_array()), np.zeros(len(tickers))
+
+        active = np.arange(len(tickers))
+        weights = _solve_factor_problem(objective, mu, G, d, self.risk_free_rate, max_weight)
+        if max_assets is not None and (weights > self.WEIGHT_CUTOFF).sum() > max_assets:
+            # Cardinality heuristic: keep the largest holdings of the relaxed solution and re-solve on them
+            active = np.sort(np.argsort(-weights)[:max_assets])
+            weights = np.zeros(len(tickers))
+            weights[active] = _solve_factor_problem(
+                objective, mu[active], G[active], d[active], self.risk_free_rate, max_weight
+            )
+
+        weights[weights < self.WEIGHT_CUTOFF] = 0
+        return pd.Series((weights / weights.sum()).round(5), index=tickers)
+
+
+def _solve_factor_problem(
+        objective: str,
+        mu: np.ndarray,
+        G: np.ndarray,
+        d: np.ndarray,
+        risk_free_rate: float,
+        max_weight: Optional[float]
+        ) -> np.ndarray:
+    import cvxpy as cp
+
+    n = len(mu)
+    if max_weight is not None and max_weight * n < 1 - 1e-9:
+        raise ValueError(f"A max weight of {max_weight} cannot be fully invested across {n} assets.")
+
+    # Only the k factor exposures and the diagonal enter the problem, never an N x N matrix
+    w = cp.Variable(n, nonneg=True)
+    risk = cp.sum_squares(G.T @ w) + cp.sum_squares(cp.multiply(np.sqrt(d), w))
+    if objective == "max_sharpe":
+        # Homogenized form: minimize risk of z with (μ - rf)ᵀz = 1; weights are z / sum(z)
+        excess = mu - risk_free_rate
+        if (excess <= 0).all():
+            raise ValueError("At least one asset must have an expected return above the risk-free rate.")
+        kappa = cp.Variable(nonneg=True)
+        constraints = [excess @ w == 1, cp.sum(w) == kappa]
+        if max_weight is not None:
+            constraints.append(w <= max_weight * kappa)
+    else:
+        constraints = [cp.sum(w) == 1]
+        if max_weight is not None:
+            constraints.append(w <= max_weight)
+
+    problem = cp.Problem(cp.Minimize(risk), constraints)
+    problem.solve(solver="CLARABEL")
+    profiling.record_solve(problem)
+    if w.value is None:
+        raise ValueError(f"Optimization failed ({problem.status}).")
+    weights = np.clip(w.value, 0, None)
+    return weights / weights.sum()
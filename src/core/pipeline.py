@@ -0,0 +1,353 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from src.core.black_litterman import BlackLittermanModelWrapper
+from src.core.factor_model import FactorModel
+from src.core.optimizer import PortfolioOptimizer
+from src.core.price_panel import PricePanel
+from src.utils import profiling
+
+if TYPE_CHECKING:
+    from src.core.rebalance import RebalancePlan
+
+FORECAST_SOURCES = ("historical", "capm", "gpt")
+OBJECTIVES = ("max_sharpe", "min_volatility", "min_cvar", "hrp")
+
+# Above this many assets jobs use a factor-model covariance instead of dense BL
+LARGE_UNIVERSE = 100
+
+
+@dataclass
+class PortfolioJob:
+    """
+    One portfolio to optimize: the inputs a user would pick in the app.
+
+    :param job_id: Identifier echoed back in the result
+    :param tickers: Candidate assets
+    :param start_date: Start of the estimation window
+    :param end_date: End of the estimation window (exclusive)
+    :param forecast_source: "historical", "capm" or "gpt"
+    :param objective: "max_sharpe", "min_volatility", "min_cvar" or "hrp"
+    :param investment: Amount to allocate, used for the dollar allocation
+    :param risk_free_rate: Risk-free rate used by the optimizer
+    :param max_weight: Upper bound on each weight (None = unconstrained)
+    :param max_assets: Maximum number of holdings (None = unconstrained)
+    :param cvar_alpha: Confidence level of the "min_cvar" objective
+    :param max_drawdown: Largest allowed historical drawdown for "min_cvar" (None = unconstrained)
+    :param resamples: Average the weights over this many bootstrapped histories (0 = off)
+    :param block_size: Days per bootstrap block when resampling (None = i.i.d. days)
+    :param current_shares: Shares already held per ticker; adds a turnover-aware trade list to the result
+    :param turnover_penalty: Penalty per unit of turnover when rebalancing from ``current_shares``
+    """
+    job_id: str
+    tickers: List[str]
+    start_date: str
+    end_date: str
+    forecast_source: str = "historical"
+    objective: str = "max_sharpe"
+    investment: float = 10000
+    risk_free_rate: float = 0.02
+    max_weight: Optional[float] = None
+    max_assets: Optional[int] = None
+    cvar_alpha: float = 0.95
+    max_drawdown: Optional[float] = None
+    resamples: int = 0
+    block_size: Optional[int] = None
+    current_shares: Optional[Dict[str, float]] = None
+    turnover_penalty: float = 0.001
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PortfolioJob":
+        if isinstance(data["tickers"], str):
+            raise ValueError("tickers must be a list of symbols, not a single string.")
+        job = cls(
+            job_id=str(data["job_id"]),
+            tickers=list(data["tickers"]),
+            start_date=str(data["start_date"]),
+            end_date=str(data["end_date"]),
+            forecast_source=data.get("forecast_source", "historical"),
+            objective=data.get("objective", "max_sharpe"),
+            investment=float(data.get("investment", 10000)),
+            risk_free_rate=float(data.get("risk_free_rate", 0.02)),
+            max_weight=None if data.get("max_weight") is None else float(data["max_weight"]),
+            max_assets=None if data.get("max_assets") is None else int(data["max_assets"]),
+            cvar_alpha=float(data.get("cvar_alpha", 0.95)),
+            max_drawdown=None if data.get("max_drawdown") is None else float(data["max_drawdown"]),
+            resamples=int(data.get("resamples") or 0),
+            block_size=None if data.get("block_size") is None else int(data["block_size"]),
+            current_shares={t: float(n) for t, n in data["current_shares"].items()} if data.get("current_shares") else None,
+            turnover_penalty=float(data.get("turnover_penalty", 0.001))
+        )
+        try:
+            start, end = pd.Timestamp(job.start_date), pd.Timestamp(job.end_date)
+        except ValueError:
+            start = end = pd.NaT
+        if pd.isna(start) or pd.isna(end):
+            raise ValueError(f"Invalid date range {job.start_date!r} to {job.end_date!r}.")
+        if not start < end:
+            raise ValueError(f"start_date {job.start_date} must be before end_date {job.end_date}.")
+        if job.forecast_source not in FORECAST_SOURCES:
+            raise ValueError(f"Unknown forecast source '{job.forecast_source}' (expected one of {FORECAST_SOURCES})")
+        if job.objective not in OBJECTIVES:
+            raise ValueError(f"Unknown objective '{job.objective}' (expected one of {OBJECTIVES})")
+        if job.resamples and (job.objective not in ("max_sharpe", "min_volatility")
+                              or job.forecast_source != "historical" or job.max_assets is not None):
+            raise ValueError("Resampling needs a max_sharpe or min_volatility objective, historical forecasts "
+                             "and no max_assets.")
+        return job
+
+
+# === Pipeline stages (shared by the app and the batch runner) ===
+
+@profiling.timed("pipeline.historical_returns")
+def historical_returns(prices: pd.DataFrame) -> pd.Series:
+    """
+    Historical expected returns.
+    """
+    from pypfopt import expected_returns
+    return expected_returns.mean_historical_return(prices)
+
+
+@profiling.timed("pipeline.estimate")
+def estimate(prices: pd.DataFrame) -> Tuple[pd.Series, pd.DataFrame]:
+    """
+    Historical expected returns and sample covariance.
+    """
+    from pypfopt import risk_models
+    return historical_returns(prices), risk_models.sample_cov(prices)
+
+
+@profiling.timed("pipeline.capm_views")
+def capm_views(prices: pd.DataFrame, tickers: List[str], start_date: str, end_date: str) -> pd.Series:
+    """
+    CAPM expected returns computed from already loaded prices (must include ^GSPC and ^IRX).
+    """
+    from src.core.expected_return import CapmCalculator
+    capm = CapmCalculator.from_prices(prices, start_date, end_date)
+    return capm.calculate_expected_return(tickers)
+
+
+@profiling.timed("pipeline.black_litterman")
+def black_litterman(cov_matrix: pd.DataFrame, views: pd.Series) -> Tuple[pd.Series, pd.DataFrame]:
+    """
+    Aligns views with the covariance matrix and returns the BL posterior (equal market weights).
+    """
+    views = views[~views.index.duplicated(keep="last")].dropna()
+    common_assets = views.index.intersection(cov_matrix.columns).intersection(cov_matrix.index)
+    if len(common_assets) < 2:
+        raise ValueError("Not enough overlapping assets after alignment.")
+    views = views.loc[common_assets]
+    market_weights = pd.Series(1 / len(common_assets), index=common_assets)
+    bl_model = BlackLittermanModelWrapper(cov_matrix.loc[common_assets, common_assets], market_weights, views)
+    return bl_model.get_all()
+
+
+@profiling.timed("pipeline.optimize")
+def optimize(
+        bl_returns: pd.Series,
+        bl_cov: pd.DataFrame,
+        objective: str,
+        risk_free_rate: float = 0.02,
+        max_weight: Optional[float] = None,
+        max_assets: Optional[int] = None
+        ) -> Tuple[pd.Series, dict]:
+    """
+    Optimizes the BL posterior and returns (weights, performance).
+    """
+    optimizer = PortfolioOptimizer(expected_returns=bl_returns, cov_matrix=bl_cov, risk_free_rate=risk_free_rate)
+    return _solve(optimizer, objective, max_weight, max_assets)
+
+
+@profiling.timed("pipeline.optimize_factor")
+def optimize_factor(
+        prices: pd.DataFrame,
+        views: pd.Series,
+        objective: str,
+        risk_free_rate: float = 0.02,
+        n_factors: int = 15,
+        max_weight: Optional[float] = None,
+        max_assets: Optional[int] = None
+        ) -> Tuple[pd.Series, dict]:
+    """
+    Large-universe optimization: views used directly as expected returns, PCA factor-model covariance.
+    """
+    views = views.dropna()
+    model = FactorModel.from_prices(prices[views.index], n_factors=n_factors)
+    optimizer = PortfolioOptimizer(expected_returns=views, risk_free_rate=risk_free_rate, factor_model=model)
+    return _solve(optimizer, objective, max_weight, max_assets)
+
+
+@profiling.timed("pipeline.optimize_cvar")
+def optimize_cvar(
+        prices: pd.DataFrame,
+        expected_returns: pd.Series,
+        alpha: float = 0.95,
+        max_drawdown: Optional[float] = None,
+        risk_free_rate: float = 0.02,
+        max_weight: Optional[float] = None,
+        max_assets: Optional[int] = None,
+        n_scenarios: Optional[int] = None
+        ) -> Tuple[pd.Series, dict]:
+    """
+    Minimum-CVaR optimization over historical daily returns; performance adds daily CVaR and max drawdown.
+    """
+    from src.core.tail_risk import CVaROptimizer
+    expected_returns = expected_returns.dropna()
+    # A missing price (e.g. before a listing) counts as a flat day
+    scenarios = prices[expected_returns.index].pct_change().iloc[1:].fillna(0)
+    optimizer = PortfolioOptimizer(expected_returns, scenarios.cov() * 252, risk_free_rate=risk_free_rate)
+    weights = optimizer.minimize_cvar(
+        scenarios, alpha, max_drawdown=max_drawdown, max_weight=max_weight, max_assets=max_assets,
+        n_scenarios=n_scenarios, seed=0
+    )
+    risk = CVaROptimizer(scenarios)
+    performance = optimizer.portfolio_performance(weights)
+    performance["cvar"] = risk.cvar(weights, alpha)
+    performance["max_drawdown"] = risk.max_drawdown(weights)
+    return weights, performance
+
+
+@profiling.timed("pipeline.optimize_resampled")
+def optimize_resampled(
+        prices: pd.DataFrame,
+        objective: str,
+        risk_free_rate: float = 0.02,
+        max_weight: Optional[float] = None,
+        n_resamples: int = 1000,
+        block_size: Optional[int] = None,
+        n_workers: int = 1,
+        seed: int = 0
+        ) -> Tuple[pd.Series, dict]:
+    """
+    Resampled optimization over bootstrapped daily returns; performance uses the historical
+    estimates and adds each asset's weight standard deviation across resamples.
+    """
+    # A missing price (e.g. before a listing) counts as a flat day
+    returns = prices.pct_change().iloc[1:].fillna(0)
+    mu, S = estimate(prices)
+    optimizer = PortfolioOptimizer(mu, S, risk_free_rate=risk_free_rate)
+    result = optimizer.resampled(returns, objective, n_resamples, block_size, max_weight, seed, n_workers)
+    performance = optimizer.portfolio_performance(result.weights)
+    performance["weight_std"] = result.dispersion["std"]
+    return result.weights, performance
+
+
+@profiling.timed("pipeline.rebalance")
+def rebalance(
+        prices: pd.DataFrame,
+        target: pd.Series,
+        investment: float,
+        current_shares: Dict[str, float],
+        turnover_penalty: float = 0.001,
+        max_weight: Optional[float] = None
+        ) -> "RebalancePlan":
+    """
+    Turnover-aware trade list from the current shares towards ``target``, at the latest prices.
+    """
+    from src.core.rebalance import Rebalancer
+    unknown = sorted(set(current_shares) - set(prices.columns))
+    if unknown:
+        raise ValueError(f"No prices for current holdings {unknown}; include them in the tickers.")
+    _, S = estimate(prices)
+    rebalancer = Rebalancer(S, turnover_penalty, max_weight)
+    return rebalancer.plan(target, prices.ffill().iloc[-1], investment, current_shares=pd.Series(current_shares))
+
+
+def _solve(optimizer: PortfolioOptimizer, objective: str, max_weight, max_assets) -> Tuple[pd.Series, dict]:
+    solvers = {
+        "max_sharpe": optimizer.maximize_sharpe,
+        "min_volatility": optimizer.minimize_volatility,
+        "hrp": optimizer.hierarchical_risk_parity
+    }
+    if objective not in solvers:
+        raise ValueError(f"Objective '{objective}' needs return scenarios; use optimize_cvar.")
+    solve = solvers[objective]
+    weights = solve(max_weight=max_weight, max_assets=max_assets)
+    return weights, optimizer.portfolio_performance(weights)
+
+
+def run_job(
+        job: PortfolioJob,
+        prices: Union[PricePanel, pd.DataFrame],
+        gpt_views: Optional[Dict[str, float]] = None,
+        n_workers: int = 1
+        ) -> dict:
+    """
+    Runs one job against shared prices and returns a JSON-serializable result.
+
+    :param job: The job to run
+    :param prices: Prices covering at least the job's tickers and dates (plus ^GSPC/^IRX for CAPM)
+    :param gpt_views: Precomputed GPT expected returns by ticker, for "gpt" jobs
+    :param n_workers: Processes used for a resampled job's bootstrap samples (results do not depend on it)
+    """
+    panel = prices if isinstance(prices, PricePanel) else PricePanel.from_frame(prices)
+    # Views of the shared panel; only the job's own rows are copied
+    window = panel.between(job.start_date, job.end_date)
+    job_panel = window.select(dict.fromkeys(job.tickers)).dropna()
+    if len(job_panel) < 2 or len(job_panel.dates) < 5:
+        raise ValueError("Not enough valid tickers or price data.")
+    job_prices = job_panel.to_frame()
+
+    mu = historical_returns(job_prices)
+    if job.forecast_source == "capm":
+        from src.core.expected_return import CapmCalculator
+        capm_prices = window.select(list(job_prices.columns) + [CapmCalculator.MARKET_TICKER, CapmCalculator.RISK_FREE_TICKER])
+        views = capm_views(capm_prices.to_frame(), list(job_prices.columns), job.start_date, job.end_date)
+        if views.empty:
+            views = mu.copy()
+    elif job.forecast_source == "gpt":
+        gpt_views = gpt_views or {}
+        views = pd.Series({t: gpt_views.get(t, mu[t]) for t in job_prices.columns})
+    else:
+        views = mu.copy()
+
+    large = job_prices.shape[1] > LARGE_UNIVERSE
+    if job.objective == "min_cvar":
+        expected = views if large else black_litterman(estimate(job_prices)[1], views)[0]
+        weights, performance = optimize_cvar(
+            job_prices, expected, job.cvar_alpha, job.max_drawdown, job.risk_free_rate,
+            max_weight=job.max_weight, max_assets=job.max_assets
+        )
+    elif job.resamples:
+        weights, performance = optimize_resampled(
+            job_prices, job.objective, job.risk_free_rate, job.max_weight, job.resamples, job.block_size,
+            n_workers=n_workers
+        )
+    elif large:
+        weights, performance = optimize_factor(
+            job_prices, views, job.objective, job.risk_free_rate, max_weight=job.max_weight, max_assets=job.max_assets
+        )
+    else:
+        _, S = estimate(job_prices)
+        bl_returns, bl_cov = black_litterman(S, views)
+        weights, performance = optimize(
+            bl_returns, bl_cov, job.objective, job.risk_free_rate, max_weight=job.max_weight, max_assets=job.max_assets
+        )
+    extras = {}
+    if job.current_shares:
+        plan = rebalance(job_prices, weights, job.investment, job.current_shares, job.turnover_penalty, job.max_weight)
+        extras["rebalance"] = {
+            "shares": {t: int(n) for t, n in plan.shares.items() if n},
+            "trades": [{"ticker": t, **{k: float(v) for k, v in row.items()}} for t, row in plan.trades.iterrows()],
+            "cash": plan.cash,
+            "turnover": plan.turnover,
+            "cost": plan.cost
+        }
+    weights = weights[weights > 0]
+    extras.update({k: float(performance[k]) for k in ("cvar", "max_drawdown") if k in performance})
+    if "weight_std" in performance:
+        extras["weight_std"] = {t: float(performance["weight_std"][t]) for t in weights.index}
+    return {
+        "job_id": job.job_id,
+        "status": "ok",
+        "tickers": list(job_prices.columns),
+        "dropped": sorted(set(job.tickers) - set(job_prices.columns)),
+        "weights": {t: float(w) for t, w in weights.items()},
+        "allocation": {t: round(float(w) * job.investment, 2) for t, w in weights.items()},
+        "expected_annual_return": float(performance["expected_annual_return"]),
+        "annual_volatility": float(performance["annual_volatility"]),
+        "sharpe_ratio": float(performance["sharpe_ratio"]),
+        **extras
+    }
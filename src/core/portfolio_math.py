@@ -0,0 +1,69 @@
+from typing import Tuple, Union
+
+import numpy as np
+from scipy.linalg import cho_factor, cho_solve
+
+from src.core.factor_model import FactorModel
+
+
+def evaluate_portfolios(
+        weights: np.ndarray,
+        expected_returns: np.ndarray,
+        cov_matrix: np.ndarray,
+        risk_free_rate: float = 0.02
+        ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Expected return, volatility and Sharpe ratio for many portfolios at once.
+
+    :param weights: Weight matrix of shape (K, N), or a single weight vector (N,)
+    :param expected_returns: Expected annual returns, shape (N,)
+    :param cov_matrix: Annual covariance matrix, shape (N, N)
+    :param risk_free_rate: Risk-free rate used for the Sharpe ratio
+    :return: Arrays of returns, volatilities and Sharpe ratios, each shape (K,)
+    """
+    weights = np.atleast_2d(np.asarray(weights, dtype=float))
+    returns = weights @ expected_returns
+    # One matrix product for every w'Σw: row-wise dot of (WΣ) with W
+    variances = np.einsum("ij,ij->i", weights @ cov_matrix, weights)
+    volatilities = np.sqrt(variances.clip(min=0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sharpe = (returns - risk_free_rate) / volatilities
+    return returns, volatilities, sharpe
+
+
+def min_variance_weights(cov_matrix: Union[np.ndarray, FactorModel]) -> np.ndarray:
+    """
+    Closed-form global minimum-variance weights (fully invested, shorting allowed).
+
+    w = Σ⁻¹1 / 1'Σ⁻¹1
+
+    A FactorModel is solved in factor form, without forming Σ.
+    """
+    x = _cov_solve(cov_matrix, np.ones(_n_assets(cov_matrix)))
+    return x / x.sum()
+
+
+def tangency_weights(
+        expected_returns: np.ndarray,
+        cov_matrix: Union[np.ndarray, FactorModel],
+        risk_free_rate: float = 0.02
+        ) -> np.ndarray:
+    """
+    Closed-form maximum-Sharpe (tangency) weights (fully invested, shorting allowed).
+
+    w = Σ⁻¹(μ - rf) / 1'Σ⁻¹(μ - rf)
+    """
+    x = _cov_solve(cov_matrix, np.asarray(expected_returns, dtype=float) - risk_free_rate)
+    if x.sum() <= 0:
+        raise ValueError("No tangency portfolio: every asset's excess return is too low for a long-biased solution")
+    return x / x.sum()
+
+
+def _n_assets(cov_matrix: Union[np.ndarray, FactorModel]) -> int:
+    return len(cov_matrix.tickers) if isinstance(cov_matrix, FactorModel) else len(cov_matrix)
+
+
+def _cov_solve(cov_matrix: Union[np.ndarray, FactorModel], b: np.ndarray) -> np.ndarray:
+    if isinstance(cov_matrix, FactorModel):
+        return cov_matrix.solve(b)
+    return cho_solve(cho_factor(cov_matrix), b)
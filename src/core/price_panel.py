@@ -0,0 +1,178 @@
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class PricePanel:
+    """
+    One price field for many assets, held in a single contiguous array.
+
+    ``values`` has shape (n_assets, n_dates): one row per ticker, so each
+    ticker's history is contiguous. Date windows and runs of neighbouring
+    tickers are NumPy views, returns are computed in one preallocated array,
+    and ``to_frame`` wraps the same memory as a wide DataFrame for code that
+    needs pandas. Compared with a MultiIndex frame of every OHLCV field, a
+    float64 panel of one field is about 6x smaller (12x as float32).
+    """
+
+    def __init__(self, values: np.ndarray, tickers: Iterable[str], dates: Iterable):
+        """
+        :param values: Prices, shape (n_assets, n_dates)
+        :param tickers: Asset names, one per row
+        :param dates: Sorted dates, one per column
+        """
+        self.values = np.asarray(values)
+        self.tickers = pd.Index(tickers, name="Ticker")
+        self.dates = pd.DatetimeIndex(dates, name="Date")
+        if self.values.shape != (len(self.tickers), len(self.dates)):
+            raise ValueError(f"Values of shape {self.values.shape} do not match "
+                             f"{len(self.tickers)} tickers x {len(self.dates)} dates.")
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, dtype=np.float64) -> "PricePanel":
+        """
+        Panel from a wide, date-indexed DataFrame (one copy, transposed into ticker-major order).
+        """
+        values = np.ascontiguousarray(frame.to_numpy(dtype=dtype).T)
+        return cls(values, frame.columns, frame.index)
+
+    @classmethod
+    def empty(cls, dtype=np.float64) -> "PricePanel":
+        return cls(np.empty((0, 0), dtype=dtype), [], [])
+
+    # === Shape ===
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return self.values.shape
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self.tickers
+
+    def __repr__(self) -> str:
+        span = f"{self.dates[0].date()}..{self.dates[-1].date()}" if len(self.dates) else "no dates"
+        return f"PricePanel({len(self.tickers)} tickers x {len(self.dates)} dates, {span}, {self.values.dtype})"
+
+    # === Views ===
+
+    def row(self, ticker: str) -> np.ndarray:
+        """
+        One ticker's prices (a view).
+        """
+        return self.values[self.tickers.get_loc(ticker)]
+
+    def select(self, tickers: Iterable[str]) -> "PricePanel":
+        """
+        Sub-universe in the given order; tickers not in the panel are left out.
+
+        A run of neighbouring rows is a view; any other selection copies only the selected rows.
+        """
+        positions = self.tickers.get_indexer(list(tickers))
+        positions = positions[positions >= 0]
+        if len(positions) == 0:
+            return PricePanel(self.values[:0], [], self.dates)
+        first = positions[0]
+        if np.array_equal(positions, np.arange(first, first + len(positions))):
+            values = self.values[first:first + len(positions)]
+        else:
+            values = self.values[positions]
+        return PricePanel(values, self.tickers[positions], self.dates)
+
+    def between(self, start=None, end=None) -> "PricePanel":
+        """
+        Dates in ``[start, end)`` (a view).
+        """
+        i = 0 if start is None else self.dates.searchsorted(pd.Timestamp(start))
+        j = len(self.dates) if end is None else self.dates.searchsorted(pd.Timestamp(end))
+        return PricePanel(self.values[:, i:j], self.tickers, self.dates[i:j])
+
+    def dropna(self) -> "PricePanel":
+        """
+        Leaves out tickers without a single price (the panel itself when there are none).
+        """
+        keep = ~np.isnan(self.values).all(axis=1) if self.values.size else np.ones(len(self.tickers), dtype=bool)
+        return self if keep.all() else self.select(self.tickers[keep])
+
+    def align(self, other: "PricePanel") -> Tuple["PricePanel", "PricePanel"]:
+        """
+        Both panels restricted to their common dates; no copy when the dates already match.
+        """
+        if self.dates.equals(other.dates):
+            return self, other
+        common, mine, theirs = np.intersect1d(self.dates.values, other.dates.values, return_indices=True)
+        return (PricePanel(self.values[:, mine], self.tickers, common),
+                PricePanel(other.values[:, theirs], other.tickers, common))
+
+    # === Computations ===
+
+    def returns(self, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Simple returns, shape (n_assets, n_dates - 1), written into one array (``out`` if given).
+        """
+        if out is None:
+            out = np.empty((len(self.tickers), max(len(self.dates) - 1, 0)), dtype=self.values.dtype)
+        np.divide(self.values[:, 1:], self.values[:, :-1], out=out)
+        out -= 1
+        return out
+
+    def log_returns(self) -> np.ndarray:
+        """
+        Log returns, shape (n_assets, n_dates - 1).
+        """
+        out = np.empty((len(self.tickers), max(len(self.dates) - 1, 0)), dtype=self.values.dtype)
+        np.divide(self.values[:, 1:], self.values[:, :-1], out=out)
+        return np.log(out, out=out)
+
+    def growth(self, weights) -> np.ndarray:
+        """
+        Value of a buy-and-hold portfolio worth the sum of ``weights`` on the first date.
+
+        One matrix-vector product, ``(w / p0) @ prices``, over the price array.
+        Gaps are carried forward from the last price; assets without a first
+        price are held as cash.
+
+        :param weights: Weight per ticker, in row order
+        :return: Portfolio value per date, shape (n_dates,)
+        """
+        weights = np.asarray(weights, dtype=float)
+        values = self.values
+        first = values[:, 0] if values.shape[1] else np.full(len(values), np.nan)
+        held = (weights != 0) & ~np.isnan(first)
+        values = values[held]
+        if np.isnan(values).any():
+            values = forward_fill(values)
+        return (weights[held] / first[held]) @ values + weights[~held].sum()
+
+    def returns_frame(self) -> pd.DataFrame:
+        """
+        Simple returns as a date-indexed DataFrame sharing the returns array.
+        """
+        return pd.DataFrame(self.returns().T, index=self.dates[1:], columns=self.tickers, copy=False)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Wide, date-indexed DataFrame over the same memory; writes to it show in the panel.
+        """
+        return pd.DataFrame(self.values.T, index=self.dates, columns=self.tickers, copy=False)
+
+    def astype(self, dtype) -> "PricePanel":
+        if self.values.dtype == dtype:
+            return self
+        return PricePanel(self.values.astype(dtype), self.tickers, self.dates)
+
+
+def forward_fill(values: np.ndarray) -> np.ndarray:
+    """
+    Carries each row's last price forward over gaps (leading gaps stay NaN).
+    """
+    valid = ~np.isnan(values)
+    last = np.maximum.accumulate(np.where(valid, np.arange(values.shape[1]), 0), axis=1)
+    return np.take_along_axis(values, last, axis=1)
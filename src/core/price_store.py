@@ -0,0 +1,383 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.core.price_panel import PricePanel
+from src.utils import profiling
+
+PRICE_FIELDS = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+
+
+class PriceFetcher:
+    """
+    Interface for remote price sources that fill a PriceStore.
+
+    Implementations return one OHLCV DataFrame per ticker (date-indexed, one
+    column per field). Tickers without data are simply left out of the result.
+    """
+
+    def fetch(self, tickers: List[str], start: str, end: str) -> Dict[str, pd.DataFrame]:
+        raise NotImplementedError
+
+
+class FetchError(Exception):
+    """
+    Raised by a fetcher when some tickers could not be fetched, even after retries.
+
+    :param failed: Tickers that failed
+    :param partial: Frames fetched for the other tickers
+    """
+
+    def __init__(self, failed: List[str], partial: Dict[str, pd.DataFrame]):
+        super().__init__(f"Could not fetch {', '.join(failed)}")
+        self.failed = failed
+        self.partial = partial
+
+
+class YFinanceFetcher(PriceFetcher):
+    """
+    Fetches daily OHLCV history from Yahoo Finance through the shared MarketDataClient.
+    """
+
+    def fetch(self, tickers: List[str], start: str, end: str) -> Dict[str, pd.DataFrame]:
+        from src.core.market_data_client import MarketDataClient
+        return MarketDataClient.default().fetch(tickers, start, end)
+
+
+class CSVFetcher(PriceFetcher):
+    """
+    Serves prices from ``<directory>/<ticker>.csv`` files, e.g. offline fixtures.
+
+    Each file needs a ``Date`` column followed by any of the OHLCV fields.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def fetch(self, tickers: List[str], start: str, end: str) -> Dict[str, pd.DataFrame]:
+        result = {}
+        for ticker in tickers:
+            path = self.directory / f"{ticker}.csv"
+            if not path.exists():
+                continue
+            frame = pd.read_csv(path, index_col="Date", parse_dates=True).sort_index()
+            frame = frame.loc[(frame.index >= pd.Timestamp(start)) & (frame.index < pd.Timestamp(end))]
+            if not frame.empty:
+                result[ticker] = frame
+        return result
+
+
+class PriceStore:
+    """
+    Persistent local price store with incremental refresh.
+
+    Every ticker gets its own directory holding one memory-mapped NumPy file per
+    field plus the shared date axis, and a small ``meta.json`` recording the date
+    ranges already fetched. Reads slice the memory maps directly; only date ranges
+    outside the recorded coverage are requested from the fetcher.
+    """
+
+    def __init__(self, root: str, fetcher: Optional[PriceFetcher] = None):
+        """
+        :param root: Directory holding the store
+        :param fetcher: Remote source used to fill gaps (defaults to Yahoo Finance)
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.fetcher = fetcher if fetcher is not None else YFinanceFetcher()
+        self.validity = TickerValidityIndex(self.root / "invalid_tickers.json")
+
+    @classmethod
+    def default(cls) -> "PriceStore":
+        """
+        Returns the process-wide store under ``$PORTFOLIO_PRICE_STORE`` or ``~/.cache``.
+        """
+        global _default_store
+        if _default_store is None:
+            root = os.environ.get("PORTFOLIO_PRICE_STORE") or Path.home() / ".cache" / "portfolio-optimizer" / "prices"
+            _default_store = cls(root)
+        return _default_store
+
+    # === Public API ===
+
+    def get(self, tickers: List[str], start: str, end: str, field: str = "Adj Close") -> pd.DataFrame:
+        """
+        Returns a wide DataFrame of ``field`` for ``tickers`` over ``[start, end)``.
+
+        Missing date ranges are fetched and persisted first. Tickers that have no
+        data at all are left out of the result.
+        """
+        self.refresh(tickers, start, end)
+        return self.read(tickers, start, end, field)
+
+    def refresh(self, tickers: List[str], start: str, end: str) -> List[str]:
+        """
+        Fetches and stores every date range in ``[start, end)`` not yet covered.
+
+        :return: Tickers the fetcher failed on; their gaps stay uncovered and are retried next time
+        """
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        groups: Dict[Tuple[pd.Timestamp, pd.Timestamp], List[str]] = {}
+        stale = set()
+        for ticker in tickers:
+            for gap in self.missing_ranges(ticker, start, end):
+                groups.setdefault(gap, []).append(ticker)
+                stale.add(ticker)
+        profiling.count("price_store.hits", len(set(tickers)) - len(stale))
+        profiling.count("price_store.misses", len(stale))
+
+        # One bulk request per distinct gap; usually every ticker shares the same one
+        failed = []
+        for (gap_start, gap_end), group in groups.items():
+            with profiling.span("price_store.fetch", tickers=len(group)):
+                try:
+                    fetched = self.fetcher.fetch(group, _fmt(gap_start), _fmt(gap_end))
+                except FetchError as e:
+                    fetched = e.partial
+                    failed += e.failed
+            for ticker in group:
+                if ticker not in failed:
+                    self.write(ticker, fetched.get(ticker), gap_start, gap_end)
+        return list(dict.fromkeys(failed))
+
+    def get_panel(self, tickers: List[str], start: str, end: str, field: str = "Adj Close", dtype=np.float64) -> PricePanel:
+        """
+        Like ``get``, but returns a PricePanel holding only ``field``.
+        """
+        self.refresh(tickers, start, end)
+        return self.read_panel(tickers, start, end, field, dtype)
+
+    def read(self, tickers: List[str], start: str, end: str, field: str = "Adj Close") -> pd.DataFrame:
+        """
+        Reads ``field`` for ``tickers`` over ``[start, end)`` from disk only.
+        """
+        return self.read_panel(tickers, start, end, field).to_frame()
+
+    def read_panel(self, tickers: List[str], start: str, end: str, field: str = "Adj Close", dtype=np.float64) -> PricePanel:
+        """
+        Reads ``field`` for ``tickers`` over ``[start, end)`` from disk into one (tickers x dates) array.
+
+        Only that field's memory maps are touched, and each ticker fills one contiguous row.
+        """
+        with profiling.span("price_store.read", tickers=len(tickers)):
+            lo, hi = np.datetime64(pd.Timestamp(start), "ns"), np.datetime64(pd.Timestamp(end), "ns")
+            columns, date_slices, value_slices = [], [], []
+            for ticker in tickers:
+                dates, values = self._load(ticker, field)
+                if dates is None:
+                    continue
+                i, j = np.searchsorted(dates, lo), np.searchsorted(dates, hi)
+                if j > i:
+                    columns.append(ticker)
+                    date_slices.append(dates[i:j])
+                    value_slices.append(values[i:j])
+
+            if not columns:
+                return PricePanel.empty(dtype)
+
+            # Outer-join on dates, like a bulk yfinance download
+            index = np.unique(np.concatenate(date_slices))
+            out = np.full((len(columns), len(index)), np.nan, dtype=dtype)
+            for row, (dates, values) in enumerate(zip(date_slices, value_slices)):
+                out[row, np.searchsorted(index, dates)] = values
+            return PricePanel(out, columns, index)
+
+    def write(self, ticker: str, frame: Optional[pd.DataFrame], start: pd.Timestamp, end: pd.Timestamp) -> None:
+        """
+        Merges freshly fetched rows into the store and extends the coverage.
+
+        :param frame: OHLCV rows for ``[start, end)``, or None if the source had none
+        """
+        meta = self._read_meta(ticker)
+        if frame is None or frame.empty:
+            if meta is None:
+                # Never seen any data for this ticker: do not record coverage
+                return
+        else:
+            frame = frame.copy()
+            frame.index = _naive_index(frame.index)
+            existing = self._load_frame(ticker)
+            if existing is not None:
+                frame = pd.concat([existing, frame])
+                frame = frame[~frame.index.duplicated(keep="last")]
+            self._save_frame(ticker, frame.sort_index())
+
+        # Coverage never extends past today so the current session is re-fetched later
+        end = min(pd.Timestamp(end), pd.Timestamp.today().normalize())
+        ranges = _coverage(meta) if meta is not None else []
+        if start < end:
+            ranges = _merge_ranges(ranges + [(pd.Timestamp(start), end)])
+        self._write_meta(ticker, {"ranges": [[_fmt(s), _fmt(e)] for s, e in ranges]})
+
+    def missing_ranges(self, ticker: str, start: pd.Timestamp, end: pd.Timestamp) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        Returns the sub-ranges of ``[start, end)`` outside the stored coverage.
+        """
+        meta = self._read_meta(ticker)
+        if meta is None:
+            return [(start, end)]
+        gaps = []
+        for covered_start, covered_end in _coverage(meta):
+            if covered_start >= end:
+                break
+            if start < covered_start:
+                gaps.append((start, covered_start))
+            start = max(start, covered_end)
+        if start < end:
+            gaps.append((start, end))
+        return gaps
+
+    def contains(self, ticker: str) -> bool:
+        """
+        Whether any data has been stored for ``ticker``.
+        """
+        return self._read_meta(ticker) is not None
+
+    # === Storage layout ===
+
+    def _dir(self, ticker: str) -> Path:
+        return self.root / ticker.replace("/", "_")
+
+    def _read_meta(self, ticker: str) -> Optional[dict]:
+        path = self._dir(ticker) / "meta.json"
+        if not path.exists():
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_meta(self, ticker: str, meta: dict) -> None:
+        path = self._dir(ticker) / "meta.json"
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, path)
+
+    def _load(self, ticker: str, field: str) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        directory = self._dir(ticker)
+        dates_path, values_path = directory / "dates.npy", directory / f"{_field_file(field)}.npy"
+        if not dates_path.exists() or not values_path.exists():
+            return None, None
+        return np.load(dates_path, mmap_mode="r"), np.load(values_path, mmap_mode="r")
+
+    def _load_frame(self, ticker: str) -> Optional[pd.DataFrame]:
+        directory = self._dir(ticker)
+        if not (directory / "dates.npy").exists():
+            return None
+        dates = np.load(directory / "dates.npy")
+        columns = {}
+        for field in PRICE_FIELDS:
+            path = directory / f"{_field_file(field)}.npy"
+            if path.exists():
+                columns[field] = np.load(path)
+        return pd.DataFrame(columns, index=pd.DatetimeIndex(dates))
+
+    def _save_frame(self, ticker: str, frame: pd.DataFrame) -> None:
+        directory = self._dir(ticker)
+        directory.mkdir(parents=True, exist_ok=True)
+        _save_array(directory / "dates.npy", frame.index.values.astype("datetime64[ns]"))
+        for field in PRICE_FIELDS:
+            if field in frame.columns:
+                _save_array(directory / f"{_field_file(field)}.npy", frame[field].to_numpy(dtype=np.float64))
+
+
+class TickerValidityIndex:
+    """
+    Remembers tickers that returned no data so they are not re-requested on every run.
+
+    Entries expire after ``ttl`` seconds, after which the ticker is tried again
+    as part of the next bulk download.
+    """
+
+    def __init__(self, path: Path, ttl: float = 24 * 3600):
+        """
+        :param path: JSON file mapping ticker -> unix time it was found invalid
+        :param ttl: Seconds an invalid verdict stays valid
+        """
+        self.path = Path(path)
+        self.ttl = ttl
+        self._entries: Optional[Dict[str, float]] = None
+
+    def is_invalid(self, ticker: str) -> bool:
+        checked = self._load().get(ticker)
+        return checked is not None and time.time() - checked < self.ttl
+
+    def mark_invalid(self, tickers: List[str]) -> None:
+        if not tickers:
+            return
+        entries = self._load()
+        now = time.time()
+        entries.update({ticker: now for ticker in tickers})
+        self._save()
+
+    def clear(self, tickers: List[str]) -> None:
+        """
+        Forgets any invalid verdict for ``tickers``, e.g. once they have returned data.
+        """
+        entries = self._load()
+        removed = [ticker for ticker in tickers if entries.pop(ticker, None) is not None]
+        if removed:
+            self._save()
+
+    def _load(self) -> Dict[str, float]:
+        if self._entries is None:
+            self._entries = {}
+            if self.path.exists():
+                with open(self.path) as f:
+                    self._entries = json.load(f)
+        return self._entries
+
+    def _save(self) -> None:
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp, self.path)
+
+
+_default_store: Optional[PriceStore] = None
+
+
+def _save_array(path: Path, values: np.ndarray) -> None:
+    # Write-then-rename so readers holding a memory map never see a partial file
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        np.save(f, values)
+    os.replace(tmp, path)
+
+
+def _field_file(field: str) -> str:
+    return field.lower().replace(" ", "_")
+
+
+def _naive_index(index: pd.Index) -> pd.DatetimeIndex:
+    index = pd.DatetimeIndex(index)
+    return index.tz_localize(None) if index.tz is not None else index
+
+
+def _coverage(meta: dict) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+    """
+    Sorted, disjoint ``[start, end)`` ranges recorded in ``meta`` (older stores hold a single start/end).
+    """
+    ranges = meta["ranges"] if "ranges" in meta else [[meta["start"], meta["end"]]]
+    return [(pd.Timestamp(s), pd.Timestamp(e)) for s, e in ranges]
+
+
+def _merge_ranges(ranges: List[Tuple[pd.Timestamp, pd.Timestamp]]) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+    """
+    Joins ranges that overlap or touch; ranges with a gap between them stay separate.
+    """
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _fmt(ts: pd.Timestamp) -> str:
+    return pd.Timestamp(ts).strftime("%Y-%m-%d")
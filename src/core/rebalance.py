@@ -0,0 +1,182 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.core.factor_model import FactorModel
+from src.utils import profiling
+
+
+@dataclass
+class RebalancePlan:
+    """
+    Trades that move existing holdings towards a target allocation.
+
+    :param weights: Continuous weights chosen by the turnover-penalized optimization
+    :param shares: Integer share count to hold per ticker after trading
+    :param trades: One row per traded ticker: current and target shares, shares to buy (+) or sell (-),
+        price and trade value, largest trades first
+    :param cash: Cash left after trading (before costs)
+    :param turnover: Traded value as a fraction of the portfolio value
+    :param cost: Estimated transaction costs, in currency
+    """
+    weights: pd.Series
+    shares: pd.Series
+    trades: pd.DataFrame
+    cash: float
+    turnover: float
+    cost: float
+
+
+class Rebalancer:
+    """
+    Turnover-aware rebalancing towards a target portfolio.
+
+    Solves min (w - w*)ᵀΣ(w - w*) + κ‖w - w₀‖₁ over long-only, fully invested w:
+    the tracking error to the target w* against the turnover from the current
+    weights w₀. The L1 term leaves an asset untouched until moving it gains more
+    tracking error than it costs, so small daily changes in the target trade
+    little or nothing.
+
+    The problem is compiled once with w* and w₀ as Parameters and solved with
+    OSQP, which keeps its factorization across re-solves and warm-starts from the
+    previous solution (the holdings after the last rebalance). With a FactorModel
+    the tracking error is built from the factor form, so no N x N matrix is formed.
+    """
+
+    def __init__(
+        self,
+        cov_matrix: Optional[pd.DataFrame] = None,
+        turnover_penalty: float = 0.001,
+        max_weight: Optional[float] = None,
+        transaction_cost: float = 0.001,
+        factor_model: Optional[FactorModel] = None
+    ):
+        """
+        :param cov_matrix: Annual covariance matrix; its index fixes the universe
+        :param turnover_penalty: Penalty per unit of turnover, in annual tracking-variance units
+        :param max_weight: Upper bound on each weight
+        :param transaction_cost: Cost per unit of traded value, used for the cost estimate
+        :param factor_model: Low-rank plus diagonal covariance, used instead of ``cov_matrix``;
+            its tickers fix the universe
+        """
+        import cvxpy as cp
+        from src.core.frontier import _risk_term
+
+        if cov_matrix is None and factor_model is None:
+            raise ValueError("Either a covariance matrix or a factor model is required.")
+        self.tickers = list(cov_matrix.index) if factor_model is None else list(factor_model.tickers)
+        n = len(self.tickers)
+        if max_weight is not None and max_weight * n < 1 - 1e-9:
+            raise ValueError(f"A max weight of {max_weight} cannot be fully invested across {n} assets.")
+        self.transaction_cost = transaction_cost
+
+        cov = None if factor_model is not None else cov_matrix.loc[self.tickers, self.tickers].to_numpy(dtype=float)
+        self._target = cp.Parameter(n)
+        self._current = cp.Parameter(n)
+        self._w = cp.Variable(n, nonneg=True)
+        tracking = _risk_term(self._w - self._target, cov, factor_model)
+        constraints = [cp.sum(self._w) == 1]
+        if max_weight is not None:
+            constraints.append(self._w <= max_weight)
+        self._problem = cp.Problem(cp.Minimize(tracking + turnover_penalty * cp.norm1(self._w - self._current)), constraints)
+
+    @profiling.timed("rebalance.solve")
+    def solve(self, target: pd.Series, current: pd.Series) -> pd.Series:
+        """
+        Weights to hold: the target, except where trading towards it costs more than it gains.
+
+        :param target: Target weights (e.g. from PortfolioOptimizer); missing tickers count as 0
+        :param current: Current weights; missing tickers count as 0, and any shortfall from 1 is cash
+        """
+        w0 = current.reindex(self.tickers, fill_value=0).to_numpy(dtype=float)
+        self._target.value = target.reindex(self.tickers, fill_value=0).to_numpy(dtype=float)
+        self._current.value = w0
+        self._problem.solve(solver="OSQP", warm_start=True, polishing=True, eps_abs=1e-8, eps_rel=1e-8)
+        profiling.record_solve(self._problem)
+        if self._w.value is None or self._problem.status not in ("optimal", "optimal_inaccurate"):
+            raise ValueError(f"Rebalance optimization failed ({self._problem.status}).")
+        weights = np.clip(self._w.value, 0, None)
+        # Snap solver noise back onto the current holdings, so untraded assets stay exactly as they are
+        weights = np.where(np.abs(weights - w0) < 1e-6, w0, weights)
+        return pd.Series(weights, index=self.tickers)
+
+    def plan(
+        self,
+        target: pd.Series,
+        prices: pd.Series,
+        investment: float,
+        current_shares: Optional[pd.Series] = None,
+        current_weights: Optional[pd.Series] = None
+    ) -> RebalancePlan:
+        """
+        Optimizes from the current holdings and rounds the result to an integer-share trade list.
+
+        Pass either the current share counts or the current weights (converted to
+        the nearest whole shares at ``prices``).
+
+        :param target: Target weights
+        :param prices: Latest price per ticker
+        :param investment: Portfolio value after rebalancing (holdings plus cash, including any deposit)
+        :param current_shares: Shares held per ticker
+        :param current_weights: Weights held per ticker, as fractions of ``investment``
+        """
+        p = prices.reindex(self.tickers).to_numpy(dtype=float)
+        if np.isnan(p).any() or (p <= 0).any():
+            raise ValueError("A positive price is needed for every ticker.")
+        if current_shares is None:
+            current_weights = pd.Series(dtype=float) if current_weights is None else current_weights
+            w = current_weights.reindex(self.tickers, fill_value=0).to_numpy(dtype=float)
+            current_shares = pd.Series(np.round(w * investment / p), index=self.tickers)
+        held = current_shares.reindex(self.tickers, fill_value=0).to_numpy(dtype=float)
+
+        weights = self.solve(target, pd.Series(held * p / investment, index=self.tickers))
+        with profiling.span("rebalance.round", assets=len(self.tickers)):
+            shares = round_shares(weights.to_numpy(), p, investment, held)
+        delta = shares - held
+        traded = delta != 0
+        trades = pd.DataFrame({
+            "current_shares": held[traded].astype(int),
+            "target_shares": shares[traded].astype(int),
+            "trade_shares": delta[traded].astype(int),
+            "price": p[traded],
+            "trade_value": delta[traded] * p[traded]
+        }, index=pd.Index(self.tickers, name="Ticker")[traded])
+        trades = trades.iloc[np.argsort(-np.abs(trades["trade_value"].to_numpy()), kind="stable")]
+        traded_value = float(np.abs(trades["trade_value"]).sum())
+        return RebalancePlan(
+            weights=weights,
+            shares=pd.Series(shares.astype(int), index=self.tickers),
+            trades=trades,
+            cash=float(investment - shares @ p),
+            turnover=traded_value / investment,
+            cost=traded_value * self.transaction_cost
+        )
+
+
+def round_shares(weights: np.ndarray, prices: np.ndarray, investment: float, held: np.ndarray) -> np.ndarray:
+    """
+    Whole shares closest to ``weights`` without exceeding ``investment``, trading as few names as possible.
+
+    Assets whose weight equals their current weight keep their share count. The
+    rest are floored to whole shares, then the leftover cash buys one more share
+    of each, largest shortfall first, while it lasts.
+    """
+    current = held * prices / investment
+    keep = np.isclose(weights, current, rtol=0, atol=1e-9)
+    shares = np.where(keep, held, np.floor(weights * investment / prices + 1e-9))
+    cash = investment - shares @ prices
+    if cash < 0:
+        # Kept holdings no longer fit a smaller portfolio; round every asset afresh
+        keep[:] = False
+        shares = np.floor(weights * investment / prices + 1e-9)
+        cash = investment - shares @ prices
+    shortfall = np.where(keep, 0.0, weights * investment - shares * prices)
+    for i in np.argsort(-shortfall):
+        if shortfall[i] <= 0:
+            break
+        if prices[i] <= cash:
+            shares[i] += 1
+            cash -= prices[i]
+    return shares
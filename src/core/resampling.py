@@ -0,0 +1,216 @@
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.utils import profiling
+
+# State of each worker process, set once by _init_worker (never used in the calling process)
+_worker: Optional["_SampleSolver"] = None
+
+
+@dataclass
+class ResampledResult:
+    """
+    Weights averaged over bootstrap resamples, with their spread.
+
+    :param weights: Average weight per asset (cleaned, sums to 1)
+    :param dispersion: Per asset: mean, std, 5th/95th percentile of the sampled weights and
+        the share of resamples holding it
+    :param samples: Weights of every successful resample, shape (n_samples, N)
+    :param n_failed: Resamples whose optimization failed (left out of the average)
+    """
+    weights: pd.Series
+    dispersion: pd.DataFrame
+    samples: np.ndarray
+    n_failed: int
+
+
+class ResampledOptimizer:
+    """
+    Resampled efficient portfolios (Michaud): bootstrap the return history,
+    re-estimate and re-optimize every sample, and average the weights.
+
+    Each sample redraws the history, i.i.d. or in blocks to keep autocorrelation
+    and volatility clustering, and re-estimates the mean historical return and
+    sample covariance as ``pipeline.estimate`` does. The optimization itself is
+    a single cvxpy problem per process, compiled once with the expected returns
+    and the covariance factor as Parameters; each sample only assigns new
+    values and re-solves. Sample ``i`` always draws from the same child seed,
+    so results do not depend on the number of workers.
+    """
+
+    def __init__(
+        self,
+        returns: pd.DataFrame,
+        objective: str = "max_sharpe",
+        risk_free_rate: float = 0.02,
+        max_weight: Optional[float] = None,
+        block_size: Optional[int] = None,
+        frequency: int = 252
+    ):
+        """
+        :param returns: Daily returns, one column per asset, without gaps
+        :param objective: "max_sharpe" or "min_volatility"
+        :param risk_free_rate: Risk-free rate used for the Sharpe ratio
+        :param max_weight: Upper bound on each weight
+        :param block_size: Days per bootstrap block (None or 1 = i.i.d. days)
+        :param frequency: Return periods per year
+        """
+        if objective not in ("max_sharpe", "min_volatility"):
+            raise ValueError(f"Resampling supports 'max_sharpe' and 'min_volatility', not '{objective}'.")
+        if max_weight is not None and max_weight * returns.shape[1] < 1 - 1e-9:
+            raise ValueError(f"A max weight of {max_weight} cannot be fully invested across {returns.shape[1]} assets.")
+        self.tickers = list(returns.columns)
+        self.returns = np.ascontiguousarray(returns.to_numpy(dtype=float))
+        if np.isnan(self.returns).any():
+            raise ValueError("Returns must not contain gaps; fill or drop them first.")
+        self.settings = (objective, risk_free_rate, max_weight, block_size or 1, frequency)
+
+    @profiling.timed("resampling.run")
+    def run(self, n_resamples: int = 1000, seed: int = 0, n_workers: int = 1) -> ResampledResult:
+        """
+        Optimizes ``n_resamples`` bootstrap samples and averages their weights.
+
+        :param n_resamples: Number of bootstrap samples
+        :param seed: Root seed; the same seed gives the same result for any ``n_workers``
+        :param n_workers: Processes used for the samples (1 = in-process)
+        """
+        seeds = np.random.SeedSequence(seed).spawn(n_resamples)
+        tasks = [(self.settings, chunk) for chunk in np.array_split(np.array(seeds, dtype=object), max(1, 4 * n_workers))]
+        tasks = [task for task in tasks if len(task[1])]
+        if n_workers > 1:
+            # The return history is shipped to each worker once, not with every chunk
+            with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(self.returns,)) as pool:
+                chunks = list(pool.map(_solve_chunk, tasks))
+        else:
+            # Local state, so concurrent runs in one process (e.g. app sessions) stay independent
+            solver = _SampleSolver(self.returns)
+            chunks = [solver.solve(task) for task in tasks]
+
+        samples = np.vstack(chunks)
+        solved = ~np.isnan(samples).any(axis=1)
+        n_failed = int((~solved).sum())
+        if n_failed:
+            logging.warning(f"{n_failed} of {n_resamples} resampled optimizations failed")
+        samples = samples[solved]
+        if not len(samples):
+            raise ValueError("Every resampled optimization failed.")
+        return self._result(samples, n_failed)
+
+    def _result(self, samples: np.ndarray, n_failed: int) -> ResampledResult:
+        from src.core.optimizer import PortfolioOptimizer
+        cutoff = PortfolioOptimizer.WEIGHT_CUTOFF
+        weights = samples.mean(axis=0)
+        weights[weights < cutoff] = 0
+        weights = pd.Series((weights / weights.sum()).round(5), index=self.tickers)
+        dispersion = pd.DataFrame({
+            "mean": samples.mean(axis=0),
+            "std": samples.std(axis=0),
+            "p5": np.percentile(samples, 5, axis=0),
+            "p95": np.percentile(samples, 95, axis=0),
+            "held": (samples > cutoff).mean(axis=0)
+        }, index=pd.Index(self.tickers, name="Ticker"))
+        return ResampledResult(weights, dispersion, samples, n_failed)
+
+
+def bootstrap_indices(n_obs: int, rng: np.random.Generator, block_size: int = 1) -> np.ndarray:
+    """
+    Row indices of one bootstrap sample of length ``n_obs``: i.i.d. rows, or circular blocks of ``block_size``.
+    """
+    if block_size <= 1:
+        return rng.integers(0, n_obs, n_obs)
+    n_blocks = -(-n_obs // block_size)
+    starts = rng.integers(0, n_obs, n_blocks)
+    return ((starts[:, None] + np.arange(block_size)) % n_obs).ravel()[:n_obs]
+
+
+class _CompiledProblem:
+    """
+    Long-only max-Sharpe or min-volatility problem with μ and the covariance factor as Parameters.
+
+    Same formulation as PortfolioOptimizer's structured solve; DPP lets cvxpy
+    reuse the compiled problem for every new set of parameter values.
+    """
+
+    def __init__(self, n: int, objective: str, risk_free_rate: float, max_weight: Optional[float]):
+        import cvxpy as cp
+
+        self.key = (n, objective, risk_free_rate, max_weight)
+        self.objective = objective
+        self.risk_free_rate = risk_free_rate
+        self.mu = cp.Parameter(n)
+        self.factor = cp.Parameter((n, n))
+        self.w = cp.Variable(n, nonneg=True)
+        risk = cp.sum_squares(self.factor.T @ self.w)
+        if objective == "max_sharpe":
+            # Homogenized form: minimize risk of z with (μ - rf)ᵀz = 1; weights are z / sum(z)
+            kappa = cp.Variable(nonneg=True)
+            constraints = [(self.mu - risk_free_rate) @ self.w == 1, cp.sum(self.w) == kappa]
+            if max_weight is not None:
+                constraints.append(self.w <= max_weight * kappa)
+        else:
+            constraints = [cp.sum(self.w) == 1]
+            if max_weight is not None:
+                constraints.append(self.w <= max_weight)
+        self.problem = cp.Problem(cp.Minimize(risk), constraints)
+
+    def solve(self, mu: np.ndarray, cov: np.ndarray) -> Optional[np.ndarray]:
+        from src.core.frontier import _cov_factor
+
+        if self.objective == "max_sharpe" and (mu <= self.risk_free_rate).all():
+            return None
+        self.mu.value = mu
+        self.factor.value = _cov_factor(cov)
+        try:
+            self.problem.solve(solver="CLARABEL")
+        except Exception as e:
+            logging.debug(f"Resampled optimization failed: {e}")
+            return None
+        profiling.record_solve(self.problem)
+        if self.w.value is None or self.problem.status not in ("optimal", "optimal_inaccurate"):
+            return None
+        weights = np.maximum(self.w.value, 0)
+        return weights / weights.sum()
+
+
+class _SampleSolver:
+    """
+    The return history and the compiled problem it is re-solved with, for one process or run.
+    """
+
+    def __init__(self, returns: np.ndarray):
+        self.returns = returns
+        self.problem: Optional[_CompiledProblem] = None
+
+    def solve(self, task) -> np.ndarray:
+        """
+        Weights for one chunk of seeds, shape (len(seeds), N); failed samples are NaN rows.
+        """
+        (objective, risk_free_rate, max_weight, block_size, frequency), seeds = task
+        n_obs, n = self.returns.shape
+        if self.problem is None or self.problem.key != (n, objective, risk_free_rate, max_weight):
+            self.problem = _CompiledProblem(n, objective, risk_free_rate, max_weight)
+
+        out = np.full((len(seeds), n), np.nan)
+        for k, seed in enumerate(seeds):
+            sample = self.returns[bootstrap_indices(n_obs, np.random.default_rng(seed), block_size)]
+            # Same estimates as mean_historical_return (compounded) and sample_cov
+            mu = np.expm1(np.log1p(sample).mean(axis=0) * frequency)
+            cov = np.cov(sample, rowvar=False) * frequency
+            weights = self.problem.solve(mu, cov)
+            if weights is not None:
+                out[k] = weights
+        return out
+
+
+def _init_worker(returns: np.ndarray) -> None:
+    global _worker
+    _worker = _SampleSolver(returns)
+
+
+def _solve_chunk(task) -> np.ndarray:
+    return _worker.solve(task)
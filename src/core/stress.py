@@ -0,0 +1,271 @@
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.core.price_panel import PricePanel, forward_fill
+from src.utils import profiling
+
+MARKET_TICKER = "^GSPC"
+
+# Peak-to-trough windows of the S&P 500, end dates exclusive
+HISTORICAL_SCENARIOS: Dict[str, Tuple[str, str]] = {
+    "2008 Financial Crisis": ("2008-09-02", "2009-03-10"),
+    "COVID Crash (Mar 2020)": ("2020-02-19", "2020-03-24"),
+    "2022 Rate Shock": ("2022-01-03", "2022-10-13"),
+}
+
+# Fewer daily returns than this and an asset's betas are not trusted
+MIN_OBSERVATIONS = 20
+
+
+@dataclass
+class StressResult:
+    """
+    Outcome of every portfolio under every scenario.
+
+    :param pnl: Return over the scenario, portfolios x scenarios
+    :param max_drawdown: Largest peak-to-trough loss along the scenario path, as a positive fraction
+    :param coverage: Share of each portfolio's weight priced from its own history (the rest is proxied)
+    """
+    pnl: pd.DataFrame
+    max_drawdown: pd.DataFrame
+    coverage: pd.DataFrame
+
+    def summary(self, portfolio=None) -> pd.DataFrame:
+        """
+        One row per scenario for a single portfolio (the first by default).
+        """
+        portfolio = self.pnl.index[0] if portfolio is None else portfolio
+        return pd.DataFrame({
+            "pnl": self.pnl.loc[portfolio],
+            "max_drawdown": self.max_drawdown.loc[portfolio],
+            "coverage": self.coverage.loc[portfolio]
+        })
+
+    def to_dict(self) -> Dict[str, Dict[str, dict]]:
+        """
+        ``{portfolio: {scenario: {"pnl", "max_drawdown", "coverage"}}}`` with plain floats.
+        """
+        return {
+            str(p): {
+                str(s): {
+                    "pnl": float(self.pnl.at[p, s]),
+                    "max_drawdown": float(self.max_drawdown.at[p, s]),
+                    "coverage": float(self.coverage.at[p, s])
+                }
+                for s in self.pnl.columns
+            }
+            for p in self.pnl.index
+        }
+
+
+class StressTester:
+    """
+    Replays historical shock windows and hypothetical factor shocks on many portfolios at once.
+
+    Every scenario is turned, once, into a path of asset growth multiples
+    (1 at the start of the scenario). The paths of all scenarios are laid end to
+    end in one (assets x steps) matrix, so any number of buy-and-hold portfolios
+    is valued along every scenario with a single matrix product; P&L is the last
+    step of each segment and drawdowns come from one running maximum over the
+    whole matrix.
+
+    Assets without a price at the start of a window (not yet listed) follow the
+    market proxy scaled by their beta. Factor shocks move each asset by its
+    regression exposures to the shocked factor series.
+    """
+
+    def __init__(
+        self,
+        panel: PricePanel,
+        tickers: Optional[Sequence[str]] = None,
+        windows: Optional[Dict[str, Tuple[str, str]]] = None,
+        factor_shocks: Optional[Dict[str, Dict[str, float]]] = None,
+        proxy: Optional[str] = MARKET_TICKER
+    ):
+        """
+        :param panel: Price history covering the windows, the assets, the proxy and any shocked factors
+        :param tickers: Assets portfolios may hold (defaults to every ticker in the panel)
+        :param windows: Named ``(start, end)`` date windows (defaults to HISTORICAL_SCENARIOS)
+        :param factor_shocks: Named hypothetical shocks, each a return per factor ticker, e.g. ``{"^GSPC": -0.2}``
+        :param proxy: Ticker standing in for assets without history in a window (None = treat them as cash)
+        """
+        windows = HISTORICAL_SCENARIOS if windows is None else windows
+        factor_shocks = factor_shocks or {}
+        self.tickers = pd.Index(panel.tickers if tickers is None else list(tickers), name="Ticker")
+        proxy = proxy if proxy is not None and proxy in panel else None
+
+        with profiling.span("stress.build", assets=len(self.tickers), scenarios=len(windows) + len(factor_shocks)):
+            assets = _rows(panel, self.tickers)
+            names, segments, covered = [], [], []
+            if windows:
+                betas = _betas(assets, panel.row(proxy)) if proxy is not None else None
+                for name, (start, end) in windows.items():
+                    window = panel.between(start, end)
+                    if len(window.dates) < 2:
+                        continue
+                    growth, has_data = _window_growth(_rows(window, self.tickers))
+                    if betas is not None:
+                        market, _ = _window_growth(window.row(proxy)[None, :])
+                        proxied = 1 + betas[:, None] * (market - 1)
+                        growth = np.where(has_data[:, None], growth, proxied)
+                    names.append(name)
+                    segments.append(growth)
+                    covered.append(has_data)
+
+            for name, shocks in factor_shocks.items():
+                missing = [f for f in shocks if f not in panel]
+                if missing:
+                    raise ValueError(f"Factor shock '{name}' needs price history for {missing}.")
+                factors = np.vstack([panel.row(f) for f in shocks])
+                exposures, has_data = _exposures(assets, factors)
+                moves = exposures @ np.fromiter(shocks.values(), dtype=float)
+                names.append(name)
+                segments.append(np.column_stack([np.ones(len(moves)), 1 + moves]))
+                covered.append(has_data)
+
+        if not names:
+            raise ValueError("No scenario overlaps the price history.")
+        self.scenarios = pd.Index(names, name="Scenario")
+        self.growth = np.hstack(segments)
+        lengths = np.array([s.shape[1] for s in segments])
+        self.starts = np.r_[0, np.cumsum(lengths)[:-1]]
+        self.ends = self.starts + lengths
+        self.covered = np.vstack(covered)
+
+    @classmethod
+    def from_store(
+        cls,
+        tickers: Sequence[str],
+        windows: Optional[Dict[str, Tuple[str, str]]] = None,
+        factor_shocks: Optional[Dict[str, Dict[str, float]]] = None,
+        proxy: Optional[str] = MARKET_TICKER,
+        history_start: Optional[str] = None,
+        history_end: Optional[str] = None,
+        store=None
+    ) -> "StressTester":
+        """
+        Builds the scenarios from one read of the local price store (gaps are fetched first).
+
+        :param history_start: Start of the history used for betas (defaults to the first window)
+        :param history_end: End of that history (defaults to the last window)
+        """
+        from src.core.price_store import PriceStore
+        store = store if store is not None else PriceStore.default()
+        windows = HISTORICAL_SCENARIOS if windows is None else windows
+        bounds = [pd.Timestamp(d) for window in windows.values() for d in window]
+        bounds += [pd.Timestamp(d) for d in (history_start, history_end) if d is not None]
+        if not bounds:
+            raise ValueError("A history range is needed when there are no windows.")
+        extra = [proxy] if proxy is not None else []
+        extra += [f for shocks in (factor_shocks or {}).values() for f in shocks]
+        wanted = list(dict.fromkeys(list(tickers) + extra))
+        panel = store.get_panel(wanted, str(min(bounds).date()), str(max(bounds).date()))
+        return cls(panel, tickers, windows, factor_shocks, proxy)
+
+    @property
+    def shocks(self) -> pd.DataFrame:
+        """
+        Scenario return of every asset, scenarios x assets.
+        """
+        return pd.DataFrame(self.growth[:, self.ends - 1].T - 1, index=self.scenarios, columns=self.tickers)
+
+    @profiling.timed("stress.run")
+    def run(self, weights: Union[pd.Series, pd.DataFrame, Dict[str, pd.Series]]) -> StressResult:
+        """
+        Stress-tests buy-and-hold portfolios.
+
+        :param weights: One portfolio (Series), or many (DataFrame with one row each, or a dict of Series);
+            assets outside the tester's universe must have zero weight
+        :return: P&L, drawdown and coverage per portfolio and scenario
+        """
+        if isinstance(weights, pd.Series):
+            weights = weights.to_frame().T
+        elif isinstance(weights, dict):
+            weights = pd.DataFrame(weights).T
+        unknown = weights.columns.difference(self.tickers)
+        if len(unknown) and (weights[unknown].fillna(0) != 0).any().any():
+            raise ValueError(f"No scenario data for {list(unknown)}.")
+        W = weights.reindex(columns=self.tickers).fillna(0).to_numpy(dtype=float)
+
+        values = W @ self.growth
+        pnl = values[:, self.ends - 1] - values[:, self.starts]
+
+        # Lift each segment above everything before it, so one running maximum restarts at every scenario
+        offsets = np.repeat(np.arange(len(self.starts)), self.ends - self.starts) * (np.abs(values).max() + 1)
+        peaks = np.maximum.accumulate(values + offsets, axis=1) - offsets
+        with np.errstate(divide="ignore", invalid="ignore"):
+            drawdowns = np.where(peaks > 0, 1 - values / peaks, 0.0)
+        max_drawdown = np.maximum.reduceat(drawdowns, self.starts, axis=1)
+
+        gross = W.sum(axis=1, keepdims=True)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            coverage = np.where(gross > 0, (W @ self.covered.T) / gross, 1.0)
+
+        frame = lambda data: pd.DataFrame(data, index=weights.index, columns=self.scenarios)
+        return StressResult(frame(pnl), frame(max_drawdown), frame(coverage))
+
+
+def _rows(panel: PricePanel, tickers: pd.Index) -> np.ndarray:
+    """
+    Rows of ``panel`` for ``tickers`` in that order, NaN for tickers it lacks.
+    """
+    positions = panel.tickers.get_indexer(tickers)
+    rows = panel.values[np.maximum(positions, 0)].astype(float)
+    rows[positions < 0] = np.nan
+    return rows
+
+
+def _window_growth(prices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Growth multiples relative to the first date, forward-filling gaps, and whether that first price exists.
+    """
+    filled = forward_fill(prices)
+    has_data = ~np.isnan(prices[:, 0])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        growth = filled / filled[:, :1]
+    growth[~has_data] = 1.0
+    return growth, has_data
+
+
+def _betas(prices: np.ndarray, market: np.ndarray) -> np.ndarray:
+    """
+    Beta of every asset to the market over their overlapping daily returns (1 when too short).
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = prices[:, 1:] / prices[:, :-1] - 1
+        market_returns = market[1:] / market[:-1] - 1
+    mask = ~np.isnan(returns) & ~np.isnan(market_returns)[None, :]
+    n = mask.sum(axis=1)
+    r = np.where(mask, returns, 0.0)
+    m = np.where(mask, market_returns[None, :], 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = (r * m).sum(axis=1) / n - r.sum(axis=1) * m.sum(axis=1) / n ** 2
+        var = (m * m).sum(axis=1) / n - (m.sum(axis=1) / n) ** 2
+        betas = cov / var
+    return np.where((n >= MIN_OBSERVATIONS) & np.isfinite(betas), betas, 1.0)
+
+
+def _exposures(prices: np.ndarray, factors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Least-squares exposures of every asset to the factors, fitted on days all factors trade.
+
+    Missing asset returns on those days count as flat; assets with too few returns get no exposure.
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = (prices[:, 1:] / prices[:, :-1] - 1).T
+        factor_returns = (factors[:, 1:] / factors[:, :-1] - 1).T
+    days = ~np.isnan(factor_returns).any(axis=1)
+    returns, factor_returns = returns[days], factor_returns[days]
+    n = (~np.isnan(returns)).sum(axis=0)
+    returns = np.nan_to_num(returns)
+    X = np.column_stack([np.ones(len(factor_returns)), factor_returns])
+    if len(X) <= X.shape[1]:
+        return np.zeros((prices.shape[0], factors.shape[0])), np.zeros(prices.shape[0], dtype=bool)
+    coefficients = np.linalg.lstsq(X, returns, rcond=None)[0][1:].T
+    has_data = n >= MIN_OBSERVATIONS
+    coefficients[~has_data] = 0.0
+    return coefficients, has_data
+
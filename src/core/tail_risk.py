@@ -0,0 +1,262 @@
+from typing import List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.optimize import linprog
+
+from src.utils import profiling
+
+
+class CVaROptimizer:
+    """
+    Minimum-CVaR portfolios over a fixed set of return scenarios, optionally
+    with a target return and a maximum-drawdown constraint.
+
+    CVaR at level α is the average loss over the worst 1 - α of scenarios, the
+    Rockafellar-Uryasev LP: minimize VaR + Σ u_s / ((1 - α)S) with
+    u_s ≥ loss_s(w) - VaR, u_s ≥ 0. Only tail scenarios (loss above VaR) bind,
+    so the LP is solved by row generation: it starts from the tail of the
+    previous solution and adds scenarios whose loss exceeds the current VaR
+    until none do, which gives the exact optimum over all scenarios while each
+    solve sees a few hundred rows rather than ~10k.
+
+    The drawdown constraint is handled the same way: every window of the
+    (uncompounded) cumulative return path must lose less than the limit, and
+    only the windows that bind are ever added.
+
+    Active scenarios and windows do not depend on α, the target return or the
+    drawdown limit, so they are kept across solves: sweeping any of these
+    re-solves from the rows found so far and typically needs one or two more LPs.
+    """
+
+    def __init__(
+        self,
+        scenarios: pd.DataFrame,
+        expected_returns: Optional[pd.Series] = None,
+        max_weight: Optional[float] = None,
+        n_scenarios: Optional[int] = None,
+        seed: Optional[int] = None,
+        frequency: int = 252,
+        tolerance: float = 1e-9,
+        max_iterations: int = 100
+    ):
+        """
+        :param scenarios: Per-period simple returns, one row per scenario and one column per asset.
+                          Historical rows in time order also define the drawdown path.
+        :param expected_returns: Expected annual returns for target-return constraints
+                                 (default: scenario mean × ``frequency``)
+        :param max_weight: Upper bound on each weight (long-only, fully invested)
+        :param n_scenarios: Optimize CVaR over a random subsample of this many scenarios
+        :param seed: Seed for the subsample
+        :param frequency: Scenarios per year, used to annualize the scenario mean
+        :param tolerance: Loss by which a scenario left out of the LP may exceed VaR (or the
+                          drawdown its limit) at the solution
+        :param max_iterations: Maximum number of LP solves per optimization; ``min_cvar`` raises if
+                               rows are still missing after this many
+        """
+        self.tickers = list(scenarios.columns)
+        if max_weight is not None and max_weight * len(self.tickers) < 1 - 1e-9:
+            raise ValueError(f"A max weight of {max_weight} cannot be fully invested across {len(self.tickers)} assets.")
+        self.max_weight = max_weight
+        self.n_scenarios = n_scenarios
+        self.seed = seed
+        self.frequency = frequency
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.set_scenarios(scenarios, expected_returns)
+
+    def set_scenarios(self, scenarios: pd.DataFrame, expected_returns: Optional[pd.Series] = None) -> None:
+        """
+        Replaces the scenario set (same assets), dropping the rows that belonged to the old one.
+        """
+        returns = np.ascontiguousarray(scenarios[self.tickers].to_numpy(dtype=float))
+        if not np.isfinite(returns).all():
+            raise ValueError("Scenarios must not contain missing values.")
+        self.paths = returns
+        if self.n_scenarios is not None and self.n_scenarios < len(returns):
+            rows = np.random.default_rng(self.seed).choice(len(returns), self.n_scenarios, replace=False)
+            returns = np.ascontiguousarray(returns[np.sort(rows)])
+        self.returns = returns
+        if expected_returns is None:
+            self.mu = self.paths.mean(axis=0) * self.frequency
+        else:
+            self.mu = expected_returns[self.tickers].to_numpy(dtype=float)
+
+        self._active = np.zeros(len(returns), dtype=bool)
+        self._windows: List[np.ndarray] = []
+
+    @profiling.timed("tail_risk.min_cvar")
+    def min_cvar(
+        self,
+        alpha: float = 0.95,
+        target_return: Optional[float] = None,
+        max_drawdown: Optional[float] = None
+    ) -> pd.Series:
+        """
+        Solves the minimum-CVaR portfolio.
+
+        :param alpha: Confidence level; CVaR averages the worst 1 - α of scenarios
+        :param target_return: Minimum expected annual return
+        :param max_drawdown: Largest allowed drawdown of the scenario path, as a fraction (e.g. 0.2)
+        :return: Weights as a pandas Series
+        :raises ValueError: If the row generation has not converged after ``max_iterations`` LPs
+            (the rows found so far are kept, so calling again continues from them)
+        """
+        if not 0 < alpha < 1:
+            raise ValueError("alpha must be between 0 and 1.")
+        n, n_scenarios = len(self.tickers), len(self.returns)
+        scale = 1 / ((1 - alpha) * n_scenarios)
+        tail_size = max(1, int(np.ceil((1 - alpha) * n_scenarios)))
+        if not self._active.any():
+            # Start from twice the tail of the equal-weight portfolio
+            losses = -self.returns.mean(axis=1)
+            self._active[np.argsort(losses)[-2 * tail_size:]] = True
+
+        for iteration in range(1, self.max_iterations + 1):
+            active = np.flatnonzero(self._active)
+            weights, var = self._solve_lp(active, scale, target_return, max_drawdown)
+
+            losses = -(self.returns @ weights)
+            violated = np.flatnonzero(~self._active & (losses > var + self.tolerance))
+            if len(violated):
+                # Add the worst offenders, at most one tail's worth per LP
+                self._active[violated[np.argsort(losses[violated])[-tail_size:]]] = True
+            feasible = True
+            if max_drawdown is not None:
+                window, drawdown = self._worst_window(weights)
+                if drawdown > max_drawdown + self.tolerance:
+                    self._windows.append(window)
+                    feasible = False
+            converged = feasible and not len(violated)
+            if converged:
+                break
+        profiling.count("tail_risk.lp_solves", iteration)
+        profiling.count("tail_risk.active_scenarios", int(self._active.sum()))
+        if not converged:
+            # The last LP saw too few rows: its CVaR is understated and the drawdown limit may be broken
+            unresolved = "the drawdown limit is still violated" if not feasible else \
+                f"{len(violated)} scenarios still exceed VaR"
+            raise ValueError(f"CVaR optimization did not converge in {self.max_iterations} LP solves "
+                             f"({unresolved}); increase max_iterations.")
+
+        weights = np.clip(weights, 0, None)
+        return pd.Series(weights / weights.sum(), index=self.tickers)
+
+    def _solve_lp(self, active: np.ndarray, scale: float, target_return, max_drawdown):
+        """
+        The Rockafellar-Uryasev LP restricted to the active scenarios; returns (weights, VaR).
+        """
+        n, m = len(self.tickers), len(active)
+        # Variables: w (n), VaR, one tail excess u_s per active scenario
+        cost = np.r_[np.zeros(n), 1.0, np.full(m, scale)]
+        rows = [sparse.hstack([
+            sparse.csr_matrix(-self.returns[active]), sparse.csr_matrix(-np.ones((m, 1))), -sparse.identity(m)
+        ])]
+        rhs = [np.zeros(m)]
+        if target_return is not None:
+            rows.append(sparse.csr_matrix(np.r_[-self.mu, np.zeros(m + 1)][None]))
+            rhs.append([-target_return])
+        if max_drawdown is not None and self._windows:
+            rows.append(sparse.hstack([sparse.csr_matrix(np.array(self._windows)), sparse.csr_matrix((len(self._windows), m + 1))]))
+            rhs.append(np.full(len(self._windows), max_drawdown))
+
+        result = linprog(
+            cost, A_ub=sparse.vstack(rows, format="csr"), b_ub=np.hstack(rhs),
+            A_eq=np.r_[np.ones(n), np.zeros(m + 1)][None], b_eq=[1.0],
+            bounds=[(0, self.max_weight)] * n + [(None, None)] + [(0, None)] * m, method="highs"
+        )
+        profiling.count("solver.solves")
+        profiling.count("solver.iterations", result.nit)
+        if result.status == 2:
+            raise ValueError("No long-only portfolio meets the target return and drawdown limit.")
+        if result.status != 0:
+            raise ValueError(f"CVaR LP failed ({result.message})")
+        return result.x[:n], result.x[n]
+
+    def frontier(
+        self,
+        target_returns: Sequence[float],
+        alpha: float = 0.95,
+        max_drawdown: Optional[float] = None
+    ) -> pd.DataFrame:
+        """
+        Minimum-CVaR portfolios for a sweep of target returns, reusing the active scenarios between points.
+
+        :return: One row per feasible target with its expected return, CVaR and weights
+        """
+        points = []
+        for target in target_returns:
+            try:
+                weights = self.min_cvar(alpha, target_return=target, max_drawdown=max_drawdown)
+            except ValueError:
+                continue
+            points.append({
+                "target_return": target,
+                "expected_annual_return": float(self.mu @ weights.to_numpy()),
+                "cvar": self.cvar(weights, alpha),
+                **weights.to_dict()
+            })
+        return pd.DataFrame(points)
+
+    def cvar(self, weights: pd.Series, alpha: float = 0.95) -> float:
+        """
+        Exact CVaR of a portfolio's per-period loss over all scenarios.
+        """
+        w = pd.Series(weights, dtype=float).reindex(self.tickers, fill_value=0).to_numpy()
+        return _cvar(-(self.paths @ w), alpha)
+
+    def max_drawdown(self, weights: pd.Series) -> float:
+        """
+        Largest fall of the portfolio's cumulative (uncompounded) return path from its running peak.
+        """
+        w = pd.Series(weights, dtype=float).reindex(self.tickers, fill_value=0).to_numpy()
+        return self._worst_window(w)[1]
+
+    def _worst_window(self, weights: np.ndarray):
+        """
+        The drawdown window (peak to trough) of the path and its loss, as a constraint row.
+        """
+        path = np.r_[0.0, np.cumsum(self.paths @ weights)]
+        drawdowns = np.maximum.accumulate(path) - path
+        trough = int(np.argmax(drawdowns))
+        peak = int(np.argmax(path[:trough + 1]))
+        return -self.paths[peak:trough].sum(axis=0), float(drawdowns[trough])
+
+
+def simulated_scenarios(
+        expected_returns: pd.Series,
+        cov_matrix: pd.DataFrame,
+        n_scenarios: int = 10000,
+        horizon: int = 1,
+        frequency: int = 252,
+        seed: Optional[int] = None
+        ) -> pd.DataFrame:
+    """
+    Asset simple returns over ``horizon`` periods under the multivariate GBM used by MonteCarloSimulator.
+
+    :param expected_returns: Expected annual returns
+    :param cov_matrix: Annual covariance matrix
+    :param n_scenarios: Number of scenarios
+    :param horizon: Periods per scenario
+    :param frequency: Periods per year
+    :param seed: Seed for reproducible scenarios
+    :return: DataFrame with one row per scenario and one column per asset
+    """
+    tickers = list(expected_returns.index)
+    mu = expected_returns.to_numpy(dtype=float)
+    cov = cov_matrix.loc[tickers, tickers].to_numpy(dtype=float)
+    dt = horizon / frequency
+    factor = np.linalg.cholesky(cov * dt + 1e-14 * np.eye(len(tickers)))
+    rng = np.random.default_rng(seed)
+    log_returns = rng.standard_normal((n_scenarios, len(tickers))) @ factor.T + (mu - np.diag(cov) / 2) * dt
+    return pd.DataFrame(np.expm1(log_returns), columns=tickers)
+
+
+def _cvar(losses: np.ndarray, alpha: float) -> float:
+    """
+    Rockafellar-Uryasev CVaR of equally likely losses: VaR + E[(loss - VaR)+] / (1 - α).
+    """
+    k = min(int(np.ceil(alpha * len(losses) - 1e-9)), len(losses)) - 1
+    var = np.partition(losses, k)[k]
+    return float(var + np.maximum(losses - var, 0).sum() / ((1 - alpha) * len(losses)))
@@ -1,7 +1,209 @@
-# Entry point for the portfolio optimizer
+# Entry point for the portfolio optimizer: headless batch runs over many portfolio jobs
+#
+#   python -m src.main jobs.jsonl --output results.jsonl --workers 8 [--stress]
+#
+# Each line of the jobs file is a JSON object such as
+#   {"job_id": "client-42", "tickers": ["AAPL", "MSFT", "GOOGL"], "start_date": "2022-01-01",
+#    "end_date": "2024-01-01", "forecast_source": "capm", "objective": "max_sharpe", "investment": 25000}
+
+import argparse
+import json
+import logging
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+
+import pandas as pd
+
+from src.core.expected_return import CapmCalculator
+from src.core.market_data import DataLoader
+from src.core.pipeline import PortfolioJob, run_job
+from src.core.price_panel import PricePanel
+from src.core.price_store import CSVFetcher, PriceStore
+from src.utils import profiling
+
+# Shared state of each worker process, set once by _init_worker
+_prices: Optional[PricePanel] = None
+_gpt_views: Dict[str, float] = {}
+_resample_workers: int = 1
+
+
+def read_jobs(path: str) -> List[Union[PortfolioJob, dict]]:
+    """
+    Reads jobs from a JSON Lines file, or a JSON file holding a list of jobs.
+
+    Every job is parsed and validated on its own: one that is malformed or
+    invalid is replaced by its error record, so it cannot stop the batch.
+    """
+    text = Path(path).read_text()
+    if text.lstrip().startswith("["):
+        records = list(enumerate(json.loads(text), 1))
+    else:
+        records = [(number, line) for number, line in enumerate(text.splitlines(), 1) if line.strip()]
+    return [_parse_job(record, number) for number, record in records]
+
+
+def load_prices(jobs: List[PortfolioJob], store: Optional[PriceStore] = None) -> PricePanel:
+    """
+    Loads prices once for the union of all jobs' tickers and date ranges, as one panel.
+    """
+    tickers = list(dict.fromkeys(t for job in jobs for t in job.tickers))
+    if any(job.forecast_source == "capm" for job in jobs):
+        tickers += [CapmCalculator.MARKET_TICKER, CapmCalculator.RISK_FREE_TICKER]
+    start = min(pd.Timestamp(job.start_date) for job in jobs)
+    end = max(pd.Timestamp(job.end_date) for job in jobs)
+    result = DataLoader.load(tickers, str(start.date()), str(end.date()), store=store)
+    if result.dropped:
+        logging.warning(f"Dropped tickers: {result.dropped}")
+    return result.panel
+
+
+def load_gpt_views(jobs: List[PortfolioJob]) -> Dict[str, float]:
+    """
+    Forecasts every ticker used by a GPT job in one cached, concurrent batch.
+    """
+    tickers = list(dict.fromkeys(t for job in jobs if job.forecast_source == "gpt" for t in job.tickers))
+    if not tickers:
+        return {}
+    from src.ai.forecast_cache import ForecastCache
+    from src.ai.gpt_forecaster import GPTForecaster
+    forecasts = GPTForecaster(cache=ForecastCache.default(), tickers_per_request=20).batch_forecast(tickers)
+    return {t: f["expected_return"] for t, f in forecasts.items()}
+
+
+def run_jobs(
+        jobs: List[PortfolioJob],
+        prices: PricePanel,
+        gpt_views: Dict[str, float],
+        workers: int = 1,
+        resample_workers: int = 1
+        ) -> Iterator[dict]:
+    """
+    Runs jobs and yields results in job order as they complete; error records from ``read_jobs`` pass through.
+
+    :param workers: Processes running jobs side by side
+    :param resample_workers: Processes each resampled job spreads its bootstrap samples over
+    """
+    if workers <= 1:
+        _init_worker(prices, gpt_views, resample_workers)
+        yield from map(_run_one, jobs)
+        return
+    # Prices are shipped to each worker once, not with every job
+    initargs = (prices, gpt_views, resample_workers)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+        yield from pool.map(_run_one, jobs, chunksize=max(1, len(jobs) // (8 * workers)))
+
+
+def stress_results(results: Iterator[dict], store: Optional[PriceStore] = None) -> List[dict]:
+    """
+    Adds a "stress" entry to every successful result; all portfolios are stress-tested in one batch.
+    """
+    from src.core.stress import StressTester
+    results = list(results)
+    ok = [r for r in results if r["status"] == "ok"]
+    if not ok:
+        return results
+    weights = pd.DataFrame([r["weights"] for r in ok]).fillna(0)
+    try:
+        stress = StressTester.from_store(list(weights.columns), store=store).run(weights).to_dict()
+    except ValueError as e:
+        logging.warning(f"Stress test skipped: {e}")
+        return results
+    for i, result in enumerate(ok):
+        result["stress"] = stress[str(i)]
+    return results
+
+
+def write_results(results: Iterator[dict], output: str) -> int:
+    """
+    Streams results to a JSON Lines file (or stdout for "-"); ".parquet" outputs are written at the end.
+    """
+    count = 0
+    if output.endswith(".parquet"):
+        rows = []
+        for result in results:
+            rows.append({k: json.dumps(v) if isinstance(v, (dict, list)) else v for k, v in result.items()})
+            count += 1
+        pd.DataFrame(rows).to_parquet(output, index=False)
+        return count
+
+    handle = sys.stdout if output == "-" else open(output, "w")
+    try:
+        for result in results:
+            handle.write(json.dumps(result) + "\n")
+            handle.flush()
+            count += 1
+    finally:
+        if handle is not sys.stdout:
+            handle.close()
+    return count
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run many portfolio optimizations without the Streamlit app.")
+    parser.add_argument("jobs", help="JSON Lines (or JSON list) file of portfolio jobs")
+    parser.add_argument("--output", "-o", default="-", help="Results file (.jsonl or .parquet); '-' for stdout")
+    parser.add_argument("--workers", "-w", type=int, default=1, help="Worker processes for the optimizations")
+    parser.add_argument("--resample-workers", type=int, default=1,
+                        help="Processes per resampled job (multiplies with --workers)")
+    parser.add_argument("--price-dir", help="Serve prices from <dir>/<ticker>.csv instead of Yahoo Finance")
+    parser.add_argument("--store", help="Price store directory (defaults to the shared local store)")
+    parser.add_argument("--stress", action="store_true",
+                        help="Replay historical shock windows on every portfolio (results are written at the end)")
+    parser.add_argument("--profile", help="Write a Chrome trace of the run (job stages only with --workers 1)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+    profiler = profiling.enable() if args.profile else None
+    jobs = read_jobs(args.jobs)
+    valid = [job for job in jobs if isinstance(job, PortfolioJob)]
+    if len(valid) < len(jobs):
+        logging.warning(f"{len(jobs) - len(valid)} of {len(jobs)} jobs are invalid and will be reported as errors")
+    store = None
+    if args.price_dir or args.store:
+        store_root = args.store or Path(args.price_dir) / ".store"
+        store = PriceStore(store_root, fetcher=CSVFetcher(args.price_dir) if args.price_dir else None)
+
+    prices = load_prices(valid, store) if valid else PricePanel.empty()
+    gpt_views = load_gpt_views(valid)
+    results = run_jobs(jobs, prices, gpt_views, args.workers, args.resample_workers)
+    if args.stress:
+        results = stress_results(results, store)
+    count = write_results(results, args.output)
+    logging.info(f"Wrote {count} results")
+    if profiler is not None:
+        profiling.disable()
+        profiler.to_chrome_trace(args.profile)
+    return 0
+
+
+def _init_worker(prices: PricePanel, gpt_views: Dict[str, float], resample_workers: int = 1) -> None:
+    global _prices, _gpt_views, _resample_workers
+    _prices, _gpt_views, _resample_workers = prices, gpt_views, resample_workers
+
+
+def _parse_job(record: Union[str, dict], number: int) -> Union[PortfolioJob, dict]:
+    data = None
+    try:
+        data = json.loads(record) if isinstance(record, str) else record
+        return PortfolioJob.from_dict(data)
+    except KeyError as e:
+        error = f"Missing field {e}"
+    except (ValueError, TypeError, AttributeError) as e:
+        error = str(e)
+    job_id = data.get("job_id") if isinstance(data, dict) else None
+    return {"job_id": str(job_id) if job_id is not None else f"job-{number}", "status": "error", "error": error}
+
+
+def _run_one(job: Union[PortfolioJob, dict]) -> dict:
+    if isinstance(job, dict):
+        return job
+    try:
+        return run_job(job, _prices, _gpt_views, n_workers=_resample_workers)
+    except Exception as e:
+        return {"job_id": job.job_id, "status": "error", "error": str(e)}
 
-def main():
-    print("Welcome to Portfolio Optimization AI")
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+from src.utils import profiling
+
+
+def lttb(y: np.ndarray, n_out: int, x: np.ndarray = None) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: picks ``n_out`` points that keep the visual shape of a line.
+
+    The first and last points are always kept. Every bucket in between keeps the
+    point spanning the largest triangle with the point kept in the previous
+    bucket and the mean of the next bucket.
+
+    :param y: Values, shape (n,)
+    :param n_out: Number of points to keep (at least 3)
+    :param x: Positions of the values (defaults to 0..n-1)
+    :return: Sorted indices of the kept points
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=float) if x is None else np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+
+    # Bucket edges over the interior points; bucket means are computed for all buckets at once
+    edges = (1 + np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(int)
+    edges[-1] = n - 1
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[:-1], edges[:-1]) / counts
+    mean_y = np.add.reduceat(y[:-1], edges[:-1]) / counts
+    mean_x, mean_y = np.r_[mean_x[1:], x[-1]], np.r_[mean_y[1:], y[-1]]
+
+    kept = np.empty(n_out, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - mean_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (mean_y[i] - y[a]))
+        a = lo + int(area.argmax())
+        kept[i + 1] = a
+    return kept
+
+
+def min_max(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Min/max bucketing: keeps the lowest and highest point of each of ``n_out // 2`` buckets.
+
+    Fully vectorized and preserves every peak and trough, so drawdowns stay exact on the chart.
+
+    :param y: Values, shape (n,)
+    :param n_out: Approximate number of points to keep
+    :return: Sorted, unique indices of the kept points (first and last always included)
+    """
+    n = len(y)
+    n_buckets = n_out // 2
+    if n_out >= n or n_buckets < 1:
+        return np.arange(n)
+    y = np.asarray(y, dtype=float)
+    size = -(-n // n_buckets)
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    buckets = padded.reshape(n_buckets, size)
+    valid = ~np.isnan(buckets).all(axis=1)
+    offsets = np.arange(n_buckets)[valid] * size
+    lows = offsets + np.nanargmin(buckets[valid], axis=1)
+    highs = offsets + np.nanargmax(buckets[valid], axis=1)
+    return np.unique(np.concatenate([[0, n - 1], lows, highs]))
+
+
+def downsample(series: pd.Series, n_out: int = 1000, method: str = "lttb") -> pd.Series:
+    """
+    Reduces a series to about ``n_out`` points for plotting ("lttb" or "minmax").
+    """
+    values = series.to_numpy(dtype=float)
+    with profiling.span("downsample", points=len(values), target=n_out):
+        if method == "lttb":
+            index = lttb(values, n_out)
+        elif method == "minmax":
+            index = min_max(values, n_out)
+        else:
+            raise ValueError(f"Unknown downsampling method '{method}' (expected 'lttb' or 'minmax')")
+    return series.iloc[index]
@@ -0,0 +1,237 @@
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Per thread / asyncio task, so concurrent sessions (e.g. Streamlit users) never share a profiler
+_active: ContextVar[Optional["Profiler"]] = ContextVar("profiler", default=None)
+
+
+class _NullSpan:
+    """Shared no-op span handed out while profiling is disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, profiler: "Profiler", name: str, attrs: dict):
+        self.profiler = profiler
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.profiler._record(self.name, self.start, end, self.attrs)
+        return False
+
+    def set(self, **attrs) -> None:
+        """
+        Attaches attributes (sizes, counts, ...) to the span while it runs.
+        """
+        self.attrs.update(attrs)
+
+
+class Profiler:
+    """
+    Collects timed spans and counters for one profiling session.
+
+    Spans record wall time per stage; counters accumulate quantities such as
+    bytes fetched, cache hits or solver iterations. Thread-safe, so work done
+    on thread pools (e.g. GPT requests) is recorded too when submitted through
+    ``bind``.
+    """
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans: List[dict] = []
+        self.counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **attrs) -> _Span:
+        return _Span(self, name, attrs)
+
+    def count(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def report(self) -> dict:
+        """
+        Per-stage totals (calls, total/mean/max seconds), counters and the raw spans.
+        """
+        stages = {}
+        with self._lock:
+            spans = list(self.spans)
+            counters = dict(self.counters)
+        for span in spans:
+            stage = stages.setdefault(span["name"], {"calls": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+            stage["calls"] += 1
+            stage["total_seconds"] += span["duration"]
+            stage["max_seconds"] = max(stage["max_seconds"], span["duration"])
+        for stage in stages.values():
+            stage["mean_seconds"] = stage["total_seconds"] / stage["calls"]
+        return {"stages": stages, "counters": counters, "spans": spans}
+
+    def to_json(self, path: Optional[str] = None) -> str:
+        text = json.dumps(self.report(), indent=2, default=str)
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
+
+    def to_chrome_trace(self, path: Optional[str] = None) -> str:
+        """
+        Spans and final counter values in Chrome trace format (chrome://tracing, Perfetto).
+        """
+        pid = os.getpid()
+        events = [{
+            "name": span["name"],
+            "ph": "X",
+            "ts": span["start"] * 1e6,
+            "dur": span["duration"] * 1e6,
+            "pid": pid,
+            "tid": span["thread"],
+            "args": span["attrs"]
+        } for span in self.report()["spans"]]
+        end = max((e["ts"] + e["dur"] for e in events), default=0)
+        events += [{"name": name, "ph": "C", "ts": end, "pid": pid, "args": {"value": value}}
+                   for name, value in self.counters.items()]
+        text = json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}, default=str)
+        if path is not None:
+            with open(path, "w") as f:
+                f.write(text)
+        return text
+
+    def _record(self, name: str, start: float, end: float, attrs: dict) -> None:
+        span = {
+            "name": name,
+            "start": start - self.origin,
+            "duration": end - start,
+            "thread": threading.get_ident(),
+            "attrs": attrs
+        }
+        with self._lock:
+            self.spans.append(span)
+
+
+# === Module-level API (no-ops unless a profiler is enabled) ===
+
+def enable() -> Profiler:
+    """
+    Starts a new profiling session for the current thread (context) and returns its profiler.
+    """
+    profiler = Profiler()
+    _active.set(profiler)
+    return profiler
+
+
+def disable() -> Optional[Profiler]:
+    """
+    Stops profiling in the current context and returns the finished profiler, if any.
+    """
+    profiler = _active.get()
+    _active.set(None)
+    return profiler
+
+
+def get_profiler() -> Optional[Profiler]:
+    return _active.get()
+
+
+@contextmanager
+def profiling() -> Iterator[Profiler]:
+    """
+    Profiles the enclosed block, restoring the previous session afterwards.
+    """
+    token = _active.set(Profiler())
+    try:
+        yield _active.get()
+    finally:
+        _active.reset(token)
+
+
+def bind(func: Callable) -> Callable:
+    """
+    Wraps ``func`` to record into the caller's profiler from whichever thread runs it.
+
+    New threads start without a profiler; submit work to thread pools through this.
+    """
+    profiler = _active.get()
+    if profiler is None:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _active.set(profiler)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _active.reset(token)
+    return wrapper
+
+
+def span(name: str, **attrs):
+    """
+    Context manager timing one stage; a shared no-op while profiling is disabled.
+    """
+    profiler = _active.get()
+    if profiler is None:
+        return _NULL_SPAN
+    return profiler.span(name, **attrs)
+
+
+def count(name: str, value: float = 1) -> None:
+    """
+    Adds ``value`` to a counter (bytes, cache hits, solver iterations, ...).
+    """
+    profiler = _active.get()
+    if profiler is not None:
+        profiler.count(name, value)
+
+
+def record_solve(problem) -> None:
+    """
+    Counts one solve of a cvxpy problem and the iterations its solver reported.
+    """
+    profiler = _active.get()
+    if profiler is None:
+        return
+    profiler.count("solver.solves")
+    iterations = getattr(getattr(problem, "solver_stats", None), "num_iters", None)
+    if iterations:
+        profiler.count("solver.iterations", iterations)
+
+
+def timed(name: str):
+    """
+    Decorator recording every call of the function as a span.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            profiler = _active.get()
+            if profiler is None:
+                return func(*args, **kwargs)
+            with profiler.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,61 @@
+import threading
+import time
+from typing import Optional
+
+
+class RateLimiter:
+    """
+    Thread-safe token-bucket limiter for request and token budgets per minute.
+
+    ``acquire`` blocks until the caller may proceed. A budget of None means
+    that dimension is unlimited.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        """
+        :param requests_per_minute: Maximum requests started per minute
+        :param tokens_per_minute: Maximum (estimated) tokens consumed per minute
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute or 0)
+        self._tokens = float(tokens_per_minute or 0)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 0) -> None:
+        """
+        Waits until one request costing ``tokens`` fits in both budgets, then spends it.
+        """
+        if self.requests_per_minute is None and self.tokens_per_minute is None:
+            return
+        while True:
+            with self._lock:
+                self._refill()
+                wait = max(
+                    self._shortfall(self._requests, 1, self.requests_per_minute),
+                    self._shortfall(self._tokens, tokens, self.tokens_per_minute)
+                )
+                if wait <= 0:
+                    if self.requests_per_minute is not None:
+                        self._requests -= 1
+                    if self.tokens_per_minute is not None:
+                        self._tokens -= tokens
+                    return
+            time.sleep(wait)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed, self._updated = now - self._updated, now
+        if self.requests_per_minute is not None:
+            self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute is not None:
+            self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    @staticmethod
+    def _shortfall(available: float, needed: float, per_minute: Optional[float]) -> float:
+        if per_minute is None:
+            return 0.0
+        # A single request larger than the whole budget waits for a full bucket
+        needed = min(needed, per_minute)
+        return max(0.0, (needed - available) * 60 / per_minute)
@@ -0,0 +1,39 @@
+import logging
+import random
+import time
+from typing import Callable, Tuple, Type, TypeVar
+
+from src.utils import profiling
+
+T = TypeVar("T")
+
+
+def retry_with_backoff(
+        func: Callable[[], T],
+        retries: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 8.0,
+        retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+        description: str = "call"
+        ) -> T:
+    """
+    Calls ``func`` and retries it with jittered exponential backoff.
+
+    :param func: Zero-argument callable to run
+    :param retries: Extra attempts after the first failure
+    :param base_delay: Delay before the first retry, in seconds
+    :param max_delay: Upper bound on any single delay
+    :param retry_on: Exception types that trigger a retry; others propagate at once
+    :param description: Label used in log messages
+    :return: Whatever ``func`` returns
+    """
+    for attempt in range(retries + 1):
+        try:
+            return func()
+        except retry_on as e:
+            if attempt == retries:
+                raise
+            profiling.count("retry.retries")
+            delay = min(max_delay, base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+            logging.warning(f"{description} failed ({e}), retrying in {delay:.2f}s")
+            time.sleep(delay)
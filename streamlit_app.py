@@ -2,11 +2,9 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from datetime import date
-from src.core.optimizer import PortfolioOptimizer
-from src.core.black_litterman import BlackLittermanModelWrapper
-from src.core.market_data import DataLoader
-from pypfopt import expected_returns, risk_models
-import plotly.express as px
+from src.core import pipeline
+from src.core.market_data import DataLoader, LoadResult
+from src.utils import profiling
 import base64
 
 # === CONFIG ===
@@ -17,12 +15,153 @@ st.set_page_config(
 )
 
 
-# === LOAD + ENCODE LOGO ===
+# Points on the growth chart; longer histories are downsampled, so every date range renders alike
+GROWTH_CHART_POINTS = 1000
+
+
+# === CACHED STAGES ===
+# Each stage is keyed on its own inputs only, so changing the objective re-solves
+# without reloading prices, and changing the investment amount recomputes nothing.
+
+@st.cache_resource
 def load_logo_base64(path):
     with open(path, "rb") as f:
         data = f.read()
     return base64.b64encode(data).decode()
 
+
+@st.cache_data
+def load_ticker_table(path):
+    table = pd.read_csv(path)
+    return table[["Ticker", "Name"]].dropna().drop_duplicates(subset="Ticker")
+
+
+@st.cache_data(ttl=3600, show_spinner="Loading prices...")
+def load_prices(tickers, start, end) -> LoadResult:
+    return DataLoader.load(list(tickers), start_date=start, end_date=end, frequency="Adj Close")
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def estimate(tickers, start, end):
+    return pipeline.estimate(load_prices(tickers, start, end).prices)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def historical_returns(tickers, start, end):
+    return pipeline.historical_returns(load_prices(tickers, start, end).prices)
+
+
+@st.cache_data(ttl=3600, show_spinner="Forecasting returns...")
+def forecast_views(tickers, start, end, source):
+    """
+    Views for the selected forecast source; the flag is True when CAPM fell back to the historical mean.
+    """
+    valid = load_prices(tickers, start, end).valid_tickers
+    mu = historical_returns(tickers, start, end)
+    if source == "GPT":
+        from src.ai.gpt_forecaster import GPTForecaster
+        from src.ai.forecast_cache import ForecastCache
+        gpt = GPTForecaster(cache=ForecastCache.default(), tickers_per_request=20)
+        forecasts = gpt.batch_forecast(valid)
+        return pd.Series({t: forecasts.get(t, {}).get("expected_return", mu[t]) for t in valid}), False
+    if source == "Capital Asset Pricing Model (CAPM)":
+        from src.core.expected_return import CapmCalculator
+        views = CapmCalculator(start, end).calculate_expected_return(valid)
+        if views.empty:
+            return mu.copy(), True
+        return views, False
+    return mu.copy(), False
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def posterior(tickers, start, end, source):
+    _, S = estimate(tickers, start, end)
+    views, _ = forecast_views(tickers, start, end, source)
+    return pipeline.black_litterman(S, views)
+
+
+@st.cache_data(ttl=3600, show_spinner="Optimizing...")
+def optimize(tickers, start, end, source, objective, max_weight=None, max_assets=None):
+    bl_returns, bl_cov = posterior(tickers, start, end, source)
+    return pipeline.optimize(bl_returns, bl_cov, objective, max_weight=max_weight, max_assets=max_assets)
+
+
+@st.cache_data(ttl=3600, show_spinner="Optimizing with a factor model...")
+def optimize_factor(tickers, start, end, source, objective, max_weight=None, max_assets=None):
+    views, _ = forecast_views(tickers, start, end, source)
+    prices = load_prices(tickers, start, end).prices
+    return pipeline.optimize_factor(prices, views, objective, max_weight=max_weight, max_assets=max_assets)
+
+
+@st.cache_data(ttl=3600, show_spinner="Minimizing tail risk...")
+def optimize_cvar(tickers, start, end, source, alpha, max_drawdown=None, max_weight=None, max_assets=None,
+                  large_universe=False):
+    prices = load_prices(tickers, start, end).prices
+    expected = forecast_views(tickers, start, end, source)[0] if large_universe else posterior(tickers, start, end, source)[0]
+    return pipeline.optimize_cvar(prices, expected, alpha, max_drawdown, max_weight=max_weight, max_assets=max_assets)
+
+
+@st.cache_resource(ttl=3600, show_spinner="Building stress scenarios...")
+def stress_tester(tickers, market_shock_pct):
+    """
+    Scenario paths for the whole universe, so every objective and weighting reuses them.
+    """
+    from src.core.stress import MARKET_TICKER, StressTester
+    shocks = {f"S&P 500 {market_shock_pct:+d}%": {MARKET_TICKER: market_shock_pct / 100}} if market_shock_pct else None
+    return StressTester.from_store(list(tickers), factor_shocks=shocks)
+
+
+def rebalancer(tickers, start, end, turnover_penalty, max_weight=None):
+    """
+    This session's Rebalancer for the current inputs.
+
+    Kept across reruns, so re-planning after a small change reuses the compiled
+    problem and warm start. Solving mutates it, so it lives in the session state
+    rather than a cache shared by every session.
+    """
+    from src.core.rebalance import Rebalancer
+    key = (tuple(tickers), start, end, turnover_penalty, max_weight)
+    cached = st.session_state.get("rebalancer")
+    if cached is None or cached[0] != key:
+        cached = (key, Rebalancer(estimate(tickers, start, end)[1], turnover_penalty, max_weight))
+        st.session_state["rebalancer"] = cached
+    return cached[1]
+
+
+def parse_holdings(text):
+    """
+    Current shares from lines such as "AAPL 10" or "MSFT, 5"; malformed lines are skipped.
+    """
+    holdings = {}
+    for line in text.splitlines():
+        parts = line.replace(",", " ").split()
+        if len(parts) == 2:
+            try:
+                holdings[parts[0].upper()] = float(parts[1])
+            except ValueError:
+                continue
+    return holdings
+
+
+@st.cache_data(ttl=3600, show_spinner="Simulating future paths...")
+def simulate_outlook(expected, cov, weights, n_paths, years):
+    from src.core.monte_carlo import MonteCarloSimulator
+    simulator = MonteCarloSimulator(expected, cov, weights[weights > 0])
+    # Per-asset simulation is exact but scales with the number of holdings; project large portfolios
+    method = "projected" if len(simulator.tickers) > 50 else "assets"
+    return simulator.simulate(n_paths=n_paths, horizon=252 * years, seed=0, method=method)
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def normalized_growth(tickers, start, end, weights):
+    # Growth of $1, reduced to chart resolution; the investment amount only rescales it
+    from src.utils.downsample import downsample
+    held = weights[weights > 0]
+    panel = load_prices(tickers, start, end).panel.select(held.index)
+    growth = pd.Series(panel.growth(held[panel.tickers].to_numpy()), index=panel.dates)
+    return downsample(growth, GROWTH_CHART_POINTS)
+
+
 logo_b64 = load_logo_base64("logo.png")
 
 # === HEADER UI ===
@@ -35,8 +174,7 @@ st.markdown(f"""
 """, unsafe_allow_html=True)
 
 # === LOAD DATA ===
-sp500_df = pd.read_csv("data/sp500_tickers.csv")
-sp500_df = sp500_df[["Ticker", "Name"]].dropna().drop_duplicates(subset="Ticker")
+sp500_df = load_ticker_table("data/sp500_tickers.csv")
 ticker_dict = sp500_df.set_index("Ticker")["Name"].to_dict()
 
 # === SIDEBAR ===
@@ -57,85 +195,133 @@ if start_date >= end_date:
     st.stop()
 
 with st.sidebar.expander("Forecast & Optimization Settings"):
-    opt_method = st.radio("Optimization Method", ["Maximize Sharpe", "Minimize Volatility"])
+    opt_method = st.radio(
+        "Optimization Method",
+        ["Maximize Sharpe", "Minimize Volatility", "Minimize CVaR", "Hierarchical Risk Parity"],
+        help="Hierarchical Risk Parity clusters correlated assets and splits risk between clusters; "
+             "it ignores the return forecast and needs no solver."
+    )
+    cvar_level, max_drawdown_pct = 95, 0
+    if opt_method == "Minimize CVaR":
+        cvar_level = st.slider("CVaR Confidence (%)", min_value=90, max_value=99, value=95,
+                               help="Minimizes the average daily loss over the worst (100 - confidence)% of days.")
+        max_drawdown_pct = st.number_input("Max Historical Drawdown (%) (0 = no limit)", min_value=0, max_value=100,
+                                           value=0, step=1)
     forecast_source = st.radio("Forecast Source", ["Mean Historical Return", "GPT", "Capital Asset Pricing Model (CAPM)"])
     investment = st.number_input("Investment Amount ($)", min_value=1000, value=10000, step=500)
 
+with st.sidebar.expander("Large Universe & Constraints"):
+    large_universe = st.checkbox(
+        "Optimize the whole S&P 500",
+        help="Uses a factor-model covariance and skips Black-Litterman, so every listed ticker can be optimized at once."
+    )
+    max_weight_pct = st.number_input("Max Weight per Asset (%)", min_value=1, max_value=100, value=100, step=1)
+    max_assets = st.number_input("Max Number of Assets (0 = no limit)", min_value=0, value=0, step=1)
+
+with st.sidebar.expander("Monte Carlo Outlook"):
+    n_paths = st.select_slider("Simulated Paths", options=[1000, 10000, 100000], value=10000)
+    horizon_years = st.slider("Horizon (Years)", min_value=1, max_value=10, value=1)
+
+with st.sidebar.expander("Rebalance Existing Holdings"):
+    holdings_text = st.text_area("Current Shares", placeholder="AAPL 10\nMSFT 5",
+                                 help="One ticker and share count per line. Trades are planned towards the "
+                                      "optimized portfolio for the investment amount.")
+    turnover_penalty = st.number_input("Turnover Penalty", min_value=0.0, max_value=0.1, value=0.001, step=0.0005,
+                                       format="%.4f", help="Higher values trade less; 0 trades straight to the target.")
+
+with st.sidebar.expander("Stress Test"):
+    run_stress = st.checkbox("Replay historical crises", help="2008, March 2020 and the 2022 rate shock, "
+                                                             "plus a hypothetical market move.")
+    market_shock_pct = st.number_input("Hypothetical S&P 500 Move (%) (0 = none)", min_value=-90, max_value=90,
+                                       value=-20, step=5)
+
+max_weight = None if max_weight_pct >= 100 else max_weight_pct / 100
+max_assets = int(max_assets) or None
+if large_universe:
+    tickers = list(sp500_df["Ticker"])
+
+show_diagnostics = st.sidebar.checkbox("Show diagnostics", help="Time each stage of the run; cached stages are skipped.")
 run = st.sidebar.button("Run Optimization")
 
+# Results always reflect the settings of the last Run: editing a widget reruns the script, but only a Run
+# applies the new settings, so nothing is recomputed (and no GPT call is made) until the button is pressed
+settings = (
+    tuple(tickers), start_date, end_date, opt_method, cvar_level, max_drawdown_pct, forecast_source, investment,
+    large_universe, max_weight, max_assets, n_paths, horizon_years, holdings_text, turnover_penalty, run_stress,
+    market_shock_pct, show_diagnostics
+)
+if run:
+    st.session_state["run_settings"] = settings
+
 # === MAIN TITLE ===
 st.title("S&P500 Optimizer")
 
-if run:
+if "run_settings" in st.session_state:
+    if st.session_state["run_settings"] != settings:
+        st.info("Settings changed. Press Run Optimization to apply them; the results below are from the last run.")
+    (tickers, start_date, end_date, opt_method, cvar_level, max_drawdown_pct, forecast_source, investment,
+     large_universe, max_weight, max_assets, n_paths, horizon_years, holdings_text, turnover_penalty, run_stress,
+     market_shock_pct, show_diagnostics) = st.session_state["run_settings"]
+    tickers = list(tickers)
+
+    # The profiler is per script thread, so sessions never record into each other's reports
+    profiling.disable()
+    profiler = profiling.enable() if show_diagnostics else None
+
     if len(tickers) < 2:
         st.warning("Please select at least two tickers.")
         st.stop()
 
-    loader = DataLoader()
-    prices, valid = loader.get_data(
-        tickers,
-        start_date=str(start_date),
-        end_date=str(end_date),
-        frequency="Adj Close",
-        return_updated_tickers=True
-    )
+    key = (tuple(tickers), str(start_date), str(end_date))
+    objective = {
+        "Maximize Sharpe": "max_sharpe",
+        "Minimize Volatility": "min_volatility",
+        "Minimize CVaR": "min_cvar",
+        "Hierarchical Risk Parity": "hrp"
+    }[opt_method]
+    load_result = load_prices(*key)
+    prices, valid = load_result.prices, load_result.valid_tickers
+    if load_result.dropped:
+        st.warning("Dropped tickers: " + ", ".join(f"{t} ({reason})" for t, reason in load_result.dropped.items()))
 
     if len(valid) < 2 or prices.empty or prices.shape[0] < 5:
         st.error("Not enough valid tickers or price data. Try a different range or assets.")
         st.stop()
 
-    mu = expected_returns.mean_historical_return(prices)
-    S = risk_models.sample_cov(prices)
+    _, fell_back = forecast_views(*key, forecast_source)
+    if fell_back:
+        st.warning("⚠️ CAPM returned no values. Falling back to historical mean.")
 
-    if forecast_source == "Mean Historical Return":
-        views = mu.copy()
-    elif forecast_source == "GPT":
-        from src.ai.gpt_forecaster import GPTForecaster
-        gpt = GPTForecaster()
-        views_dict = {}
-        for t in valid:
-            try:
-                forecast = gpt.generate_forecast(t)
-                views_dict[t] = forecast.get("expected_return", mu[t])
-            except:
-                views_dict[t] = mu[t]
-        views = pd.Series(views_dict)
-    elif forecast_source == "Capital Asset Pricing Model (CAPM)":
-        from src.core.expected_return import CapmCalculator
-        capm = CapmCalculator(str(start_date), str(end_date))
-        views = capm.calculate_expected_return(valid)
-
-        if views.empty:
-            st.warning("⚠️ CAPM returned no values. Falling back to historical mean.")
-            views = mu.copy()
-
-    views = views[~views.index.duplicated(keep="last")].dropna()
-    market_weights = pd.Series([1 / len(views)] * len(views), index=views.index)
-
-    common_assets = views.index.intersection(S.columns).intersection(S.index)
-    views = views.loc[common_assets]
-    S = S.loc[common_assets, common_assets]
-    market_weights = market_weights.loc[common_assets]
-
-    if len(common_assets) < 2:
-        st.error("Not enough overlapping assets after alignment. Try adjusting tickers or date range.")
-        st.stop()
+    if not large_universe:
+        try:
+            bl_returns, bl_cov = posterior(*key, forecast_source)
+        except ValueError:
+            st.error("Not enough overlapping assets after alignment. Try adjusting tickers or date range.")
+            st.stop()
 
-    bl_model = BlackLittermanModelWrapper(S, market_weights, views)
-    bl_returns = bl_model.get_bl_returns()
-    bl_cov = bl_model.get_bl_cov()
+        if bl_returns.empty or bl_cov.empty:
+            st.error("Black-Litterman output invalid. Try another forecast method.")
+            st.stop()
 
-    if bl_returns.empty or bl_cov.empty:
-        st.error("Black-Litterman output invalid. Try another forecast method.")
+    try:
+        if objective == "min_cvar":
+            weights, performance = optimize_cvar(
+                *key, forecast_source, cvar_level / 100, max_drawdown_pct / 100 or None, max_weight, max_assets,
+                large_universe
+            )
+        else:
+            solve = optimize_factor if large_universe else optimize
+            weights, performance = solve(*key, forecast_source, objective, max_weight, max_assets)
+    except ValueError as e:
+        st.error(f"Optimization failed: {e}")
         st.stop()
 
-    optimizer = PortfolioOptimizer(expected_returns=bl_returns, cov_matrix=bl_cov)
-    weights = optimizer.maximize_sharpe() if opt_method == "Maximize Sharpe" else optimizer.minimize_volatility()
-    performance = optimizer.portfolio_performance(weights)
+    # Plotly is only needed once there is something to chart
+    import plotly.express as px
 
     st.markdown("## Portfolio Allocation")
     col1, col2 = st.columns(2)
-    alloc_df = weights.rename("Allocation").reset_index().rename(columns={"index": "Ticker"})
+    alloc_df = weights[weights > 0].rename("Allocation").reset_index().rename(columns={"index": "Ticker"})
     alloc_df["Allocation %"] = (alloc_df["Allocation"] * 100).round(2)
 
     with col1:
@@ -149,11 +335,35 @@ if run:
     perf_col1.metric("Expected Annual Return", f"{performance['expected_annual_return']:.2%}")
     perf_col2.metric("Annual Volatility", f"{performance['annual_volatility']:.2%}")
     perf_col3.metric("Sharpe Ratio", f"{performance['sharpe_ratio']:.2f}")
+    if "cvar" in performance:
+        tail_col1, tail_col2 = st.columns(2)
+        tail_col1.metric(f"Daily {cvar_level}% CVaR", f"{performance['cvar']:.2%}")
+        tail_col2.metric("Historical Max Drawdown", f"{performance['max_drawdown']:.2%}")
+
+    holdings = parse_holdings(holdings_text)
+    if holdings:
+        st.markdown("## Rebalancing Trades")
+        unknown = sorted(set(holdings) - set(valid))
+        if unknown:
+            st.warning("Holdings outside the selected tickers are ignored: " + ", ".join(unknown))
+        current = pd.Series({t: n for t, n in holdings.items() if t in valid}, dtype=float)
+        latest = prices[valid].ffill().iloc[-1]
+        try:
+            plan = rebalancer(*key, float(turnover_penalty), max_weight).plan(weights, latest, investment, current_shares=current)
+        except ValueError as e:
+            st.error(f"Rebalancing failed: {e}")
+        else:
+            reb_col1, reb_col2, reb_col3 = st.columns(3)
+            reb_col1.metric("Trades", len(plan.trades))
+            reb_col2.metric("Turnover", f"{plan.turnover:.2%}")
+            reb_col3.metric("Cash Left", f"${plan.cash:,.2f}")
+            if plan.trades.empty:
+                st.info("Current holdings are already close enough to the target; no trades needed.")
+            else:
+                st.dataframe(plan.trades.round(2))
 
     st.markdown("## Portfolio Growth")
-    normalized = prices[common_assets].div(prices[common_assets].iloc[0])
-    weighted = normalized.mul(weights[common_assets], axis=1)
-    growth = weighted.sum(axis=1) * investment
+    growth = normalized_growth(*key, weights) * investment
 
     fig = px.area(
         growth,
@@ -163,3 +373,56 @@ if run:
     fig.update_traces(line_color="red", fillcolor="rgba(255,0,0,0.2)")
     fig.update_layout(showlegend=False)
     st.plotly_chart(fig)
+
+    st.markdown("## Monte Carlo Outlook")
+    if large_universe:
+        sim_returns, sim_cov = forecast_views(*key, forecast_source)[0], estimate(*key)[1]
+    else:
+        sim_returns, sim_cov = bl_returns, bl_cov
+    outlook = simulate_outlook(sim_returns, sim_cov, weights, n_paths, horizon_years)
+    bands = outlook.bands * investment
+    bands.index = pd.bdate_range(prices.index[-1], periods=len(bands))
+
+    mc_col1, mc_col2, mc_col3, mc_col4 = st.columns(4)
+    mc_col1.metric("Median Outcome", f"${np.median(outlook.terminal_values) * investment:,.0f}")
+    mc_col2.metric("95% VaR", f"${outlook.var(0.95) * investment:,.0f}")
+    mc_col3.metric("95% CVaR", f"${outlook.cvar(0.95) * investment:,.0f}")
+    mc_col4.metric("Median Max Drawdown", f"{np.median(outlook.max_drawdowns):.1%}")
+
+    fig = px.line(
+        bands,
+        labels={"index": "Date", "value": "Portfolio Balance ($)", "variable": "Percentile"},
+        title=f"{outlook.n_paths:,} Simulated Paths: Percentile Bands"
+    )
+    st.plotly_chart(fig)
+
+    if run_stress:
+        st.markdown("## Stress Test")
+        try:
+            stress = stress_tester(tuple(valid), int(market_shock_pct)).run(weights[weights > 0]).summary()
+        except ValueError as e:
+            st.warning(f"Stress test unavailable: {e}")
+        else:
+            stress_df = pd.DataFrame({
+                "Return %": (stress["pnl"] * 100).round(2),
+                "Max Drawdown %": (stress["max_drawdown"] * 100).round(2),
+                "P&L ($)": (stress["pnl"] * investment).round(0),
+                "Own History %": (stress["coverage"] * 100).round(0)
+            })
+            st.dataframe(stress_df)
+            if (stress["coverage"] < 1).any():
+                st.caption("Holdings without history in a window follow the S&P 500 scaled by their beta.")
+
+    if profiler is not None:
+        profiling.disable()
+        report = profiler.report()
+        with st.expander("Diagnostics", expanded=True):
+            if not report["stages"] and not report["counters"]:
+                st.info("Every stage was served from the session cache.")
+            else:
+                stages = pd.DataFrame(report["stages"]).T.sort_values("total_seconds", ascending=False)
+                st.dataframe(stages[["calls", "total_seconds", "mean_seconds", "max_seconds"]])
+                st.dataframe(pd.Series(report["counters"], name="value", dtype=float))
+            col1, col2 = st.columns(2)
+            col1.download_button("Download report (JSON)", profiler.to_json(), "diagnostics.json", "application/json")
+            col2.download_button("Download Chrome trace", profiler.to_chrome_trace(), "trace.json", "application/json")
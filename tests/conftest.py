@@ -0,0 +1,65 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def synthetic_returns(
+    n_assets: int = 8,
+    n_days: int = 750,
+    n_factors: int = 1,
+    seed: int = 0,
+    drift: float = 4e-4,
+    factor_vol: float = 0.01,
+    noise_vol: float = 0.01,
+    tail_df: Optional[float] = None,
+    loadings: Optional[np.ndarray] = None,
+    factor_drift: float = 0.0,
+    market: Optional[str] = None,
+    prefix: str = "A",
+    start: str = "2020-01-01"
+) -> pd.DataFrame:
+    """
+    Daily returns from a factor model: drift + factors @ loadings.T + idiosyncratic noise.
+
+    :param n_factors: Common factors; loadings are drawn from [0.5, 1.5]
+    :param tail_df: Draw the factors from a Student t with this many degrees of freedom (None = normal)
+    :param loadings: Fixed loadings, shape (n_assets,) or (n_assets, n_factors), instead of random ones
+    :param factor_drift: Mean of the factor returns
+    :param market: Also return the first factor (plus drift) as a column with this name, e.g. "^GSPC"
+    :param prefix: Asset names are ``<prefix><i>``
+    """
+    rng = np.random.default_rng(seed)
+    if loadings is None:
+        loadings = rng.uniform(0.5, 1.5, (n_assets, n_factors))
+    else:
+        loadings = np.asarray(loadings, dtype=float).reshape(n_assets, -1)
+        n_factors = loadings.shape[1]
+    if tail_df is None:
+        factors = rng.normal(factor_drift, factor_vol, (n_days, n_factors))
+    else:
+        factors = factor_drift + rng.standard_t(tail_df, (n_days, n_factors)) * factor_vol * np.sqrt((tail_df - 2) / tail_df)
+    returns = drift + factors @ loadings.T + rng.normal(0, noise_vol, (n_days, n_assets))
+    frame = pd.DataFrame(returns, index=pd.bdate_range(start, periods=n_days),
+                         columns=[f"{prefix}{i}" for i in range(n_assets)])
+    if market is not None:
+        frame[market] = drift + factors[:, 0]
+    return frame
+
+
+def synthetic_prices(*args, **kwargs) -> pd.DataFrame:
+    """
+    Prices starting near 100 that compound ``synthetic_returns(*args, **kwargs)``.
+    """
+    return 100 * (1 + synthetic_returns(*args, **kwargs)).cumprod()
+
+
+@pytest.fixture
+def make_returns():
+    return synthetic_returns
+
+
+@pytest.fixture
+def make_prices():
+    return synthetic_prices
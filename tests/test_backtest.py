@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pypfopt import expected_returns, risk_models
+from src.core.backtest import WalkForwardBacktest
+
+
+def test_incremental_estimates_match_full_recompute(make_prices):
+    prices = make_prices(n_assets=6, n_days=600, n_factors=2)
+    backtest = WalkForwardBacktest(prices, lookback=120, rebalance_every=40)
+    estimates = backtest.window_estimates()
+    assert len(estimates) > 5
+
+    for date, mu, cov in estimates[-2:]:
+        end = prices.index.get_loc(date)
+        window = prices.iloc[end - 120:end + 1]
+        pd.testing.assert_series_equal(mu, expected_returns.mean_historical_return(window), check_names=False)
+        pd.testing.assert_frame_equal(cov, risk_models.sample_cov(window), check_names=False)
+
+
+def test_walk_forward_run(make_prices):
+    prices = make_prices(n_assets=6, n_days=600, n_factors=2)
+    result = WalkForwardBacktest(prices, lookback=120, rebalance_every=40, objective="min_volatility").run()
+
+    assert np.isclose(result.equity.iloc[0], 1.0)
+    assert np.allclose(result.weights.sum(axis=1), 1, atol=1e-3)
+    assert (result.costs > 0).all() and result.turnover.iloc[0] > 0.99
+    assert result.returns.index[0] > result.equity.index[0]
+
+    # Costs drag on the equity curve; parallel windows give the same answer
+    free = WalkForwardBacktest(prices, lookback=120, rebalance_every=40, objective="min_volatility",
+                               transaction_cost=0).run()
+    assert free.equity.iloc[-1] > result.equity.iloc[-1]
+    parallel = WalkForwardBacktest(prices, lookback=120, rebalance_every=40, objective="min_volatility",
+                                   n_workers=2).run()
+    pd.testing.assert_series_equal(parallel.equity, result.equity)
+
+
+def test_walk_forward_with_black_litterman(make_prices):
+    prices = make_prices(n_assets=6, n_days=600, n_factors=2, seed=3)
+    result = WalkForwardBacktest(prices, lookback=120, rebalance_every=60, use_black_litterman=True,
+                                 objective="min_volatility").run()
+    assert len(result.weights) > 3
+    assert np.isfinite(result.equity).all()
+
+
+def test_walk_forward_objectives(make_prices):
+    prices = make_prices(n_assets=6, n_days=400, n_factors=2, seed=1)
+    result = WalkForwardBacktest(prices, lookback=120, rebalance_every=90, objective="hrp").run()
+    assert np.allclose(result.weights.sum(axis=1), 1, atol=1e-4) and (result.weights > 0).all().all()
+
+    with pytest.raises(ValueError, match="Unknown objective"):
+        WalkForwardBacktest(prices, objective="max_sortino")
+    with pytest.raises(ValueError, match="does not support"):
+        WalkForwardBacktest(prices, objective="min_cvar")
+
+
+if __name__ == "__main__":
+    from tests.conftest import synthetic_prices
+    test_walk_forward_run(synthetic_prices)
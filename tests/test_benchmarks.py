@@ -0,0 +1,31 @@
+import json
+
+import numpy as np
+
+from benchmarks.run import compare, run
+from benchmarks.synthetic import MARKET_TICKER, correlated_gbm
+
+
+def test_correlated_gbm():
+    prices = correlated_gbm(20, 500, seed=3)
+    assert prices.shape == (500, 21) and MARKET_TICKER in prices.columns
+    returns = np.log(prices).diff().dropna()
+    corr = returns.corr().to_numpy()
+    assert corr[np.triu_indices(21, 1)].mean() > 0.2
+    assert correlated_gbm(20, 500, seed=3).equals(prices)
+
+
+def test_benchmark_suite_runs_offline():
+    report = run([5], n_days=120, repeat=1, log=lambda line: None)
+    stages = {r["stage"]: r for r in report["results"]}
+    assert {"data_loader_cold", "capm_betas", "black_litterman", "max_sharpe", "growth"} <= set(stages)
+    assert all("median" in r for r in stages.values()), [r for r in stages.values() if "error" in r]
+    assert report["meta"]["n_days"] == 120
+
+    table = compare(report, json.loads(json.dumps(report)))
+    assert np.allclose(table["ratio"], 1)
+
+
+if __name__ == "__main__":
+    test_correlated_gbm()
+    test_benchmark_suite_runs_offline()
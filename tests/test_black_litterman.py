@@ -41,5 +41,65 @@ def test_black_litterman_model():
     print(bl_cov)
 
 
+def test_black_litterman_engine_matches_pypfopt():
+    from pypfopt.black_litterman import BlackLittermanModel
+    from src.core.black_litterman import BlackLittermanEngine
+
+    rng = np.random.default_rng(0)
+    tickers = [f"A{i}" for i in range(6)]
+    loadings = rng.normal(0, 0.1, (6, 2))
+    cov_matrix = pd.DataFrame(loadings @ loadings.T + np.diag(rng.uniform(0.01, 0.04, 6)), index=tickers, columns=tickers)
+    market_weights = pd.Series(1 / 6, index=tickers)
+    views = pd.Series([0.08, 0.12, 0.05], index=["A4", "A0", "A2"])
+
+    # The wrapper keeps PyPortfolioOpt's zero-prior absolute-view semantics
+    wrapper = BlackLittermanModelWrapper(cov_matrix, market_weights, views)
+    reference = BlackLittermanModel(cov_matrix, pi=None, absolute_views=views, market_caps=market_weights)
+    pd.testing.assert_series_equal(wrapper.get_bl_returns(), reference.bl_returns(), check_names=False)
+    pd.testing.assert_frame_equal(wrapper.get_bl_cov(), reference.bl_cov())
+
+    # Relative views with a market-implied prior
+    P = pd.DataFrame([[1, -1, 0, 0, 0, 0], [0, 0, 0.5, 0.5, -1, 0]], columns=tickers, dtype=float)
+    Q = np.array([0.02, 0.01])
+    engine = BlackLittermanEngine.market_implied(cov_matrix, market_weights, risk_aversion=2.5)
+    returns, cov = engine.posterior(Q, P=P)
+    reference = BlackLittermanModel(cov_matrix, pi=engine.pi, P=P.to_numpy(), Q=Q)
+    np.testing.assert_allclose(returns.to_numpy(), reference.bl_returns().to_numpy())
+    np.testing.assert_allclose(cov.to_numpy(), reference.bl_cov().to_numpy())
+
+    # Many scenarios for the same views reuse one factorization and agree with single solves
+    scenarios = pd.DataFrame(rng.normal(0.08, 0.03, (50, 3)), columns=views.index)
+    batch = engine.posterior_returns_batch(scenarios)
+    single, _ = engine.posterior(scenarios.iloc[17])
+    np.testing.assert_allclose(batch.iloc[17].to_numpy(), single.to_numpy())
+    assert len(engine._structures) == 2
+
+
+def test_black_litterman_engine_shared_across_threads():
+    from concurrent.futures import ThreadPoolExecutor
+    from src.core.black_litterman import BlackLittermanEngine, get_engine
+
+    rng = np.random.default_rng(1)
+    tickers = [f"A{i}" for i in range(5)]
+    loadings = rng.normal(0, 0.1, (5, 2))
+    cov_matrix = pd.DataFrame(loadings @ loadings.T + np.diag(rng.uniform(0.01, 0.04, 5)), index=tickers, columns=tickers)
+    view_sets = [pd.Series(rng.normal(0.08, 0.03, 2), index=rng.choice(tickers, 2, replace=False)) for _ in range(40)]
+    expected = [BlackLittermanEngine(cov_matrix).posterior(views) for views in view_sets]
+
+    # A small cache keeps both LRUs evicting while eight threads hit the same engine
+    engine = BlackLittermanEngine(cov_matrix, cache_size=4)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda i: engine.posterior(view_sets[i % 40]), range(400)))
+        engines = list(pool.map(lambda _: get_engine(cov_matrix, tau=0.07), range(50)))
+
+    for i, (returns, cov) in enumerate(results):
+        np.testing.assert_allclose(returns.to_numpy(), expected[i % 40][0].to_numpy())
+        np.testing.assert_allclose(cov.to_numpy(), expected[i % 40][1].to_numpy())
+    assert len(engine._posteriors) <= 4 and len(engine._structures) <= 4
+    assert all(e is engines[0] for e in engines)
+
+
 if __name__ == "__main__":
     test_black_litterman_model()
+    test_black_litterman_engine_matches_pypfopt()
+    test_black_litterman_engine_shared_across_threads()
@@ -1,16 +1,64 @@
+import numpy as np
+import pandas as pd
+
 from src.core.expected_return import CapmCalculator
+from src.core.price_store import CSVFetcher, PriceStore
+
+
+def test_capm_single_batched_fetch(tmp_path):
+    dates = pd.bdate_range("2020-01-01", periods=750)
+    rng = np.random.default_rng(1)
+    market = rng.normal(0.0004, 0.01, len(dates))
+    true_betas = {"AAA": 0.8, "BBB": 1.3, "CCC": 1.0}
+    series = {"^GSPC": market, "^IRX": np.zeros(len(dates))}
+    for ticker, beta in true_betas.items():
+        series[ticker] = beta * market + rng.normal(0, 0.005, len(dates))
+
+    for ticker, returns in series.items():
+        close = 100 * np.cumprod(1 + returns) if ticker != "^IRX" else np.full(len(dates), 4.5)
+        frame = pd.DataFrame({"Close": close, "Adj Close": close}, index=pd.Index(dates, name="Date"))
+        frame.to_csv(tmp_path / f"{ticker}.csv")
+
+    class CountingFetcher(CSVFetcher):
+        calls = 0
+
+        def fetch(self, tickers, start, end):
+            CountingFetcher.calls += 1
+            return super().fetch(tickers, start, end)
+
+    store = PriceStore(tmp_path / "store", fetcher=CountingFetcher(tmp_path))
+    capm = CapmCalculator("2020-01-01", "2023-01-01", store=store)
+    result = capm.calculate_expected_return(list(true_betas))
+
+    assert CountingFetcher.calls == 1, "Tickers, benchmark and risk-free rate should share one fetch"
+    assert set(result.index) == set(true_betas)
+    assert np.isclose(capm.calculate_risk_free_rate(), 0.045)
+
+    # Vectorized betas match a per-ticker regression on the same monthly returns
+    monthly = capm.load_prices([]).resample("ME").last().pct_change().dropna()
+    betas = capm.calculate_betas(list(true_betas))
+    for ticker in true_betas:
+        slope = np.polyfit(monthly["^GSPC"], monthly[ticker], 1)[0]
+        assert np.isclose(betas[ticker], slope)
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    with tempfile.TemporaryDirectory() as tmp:
+        test_capm_single_batched_fetch(Path(tmp))
 
-tickers = ["AAPL", "MSFT", "GOOGL"]
-start_date = "2022-01-01"
-end_date = "2024-01-01"
+    tickers = ["AAPL", "MSFT", "GOOGL"]
+    start_date = "2022-01-01"
+    end_date = "2024-01-01"
 
-capm = CapmCalculator(start_date, end_date)
+    capm = CapmCalculator(start_date, end_date)
 
-print("Calculating CAPM expected returns...\n")
+    print("Calculating CAPM expected returns...\n")
 
-try:
-    result = capm.calculate_expected_return(tickers)
-    print("\nFinal CAPM expected returns:")
-    print(result)
-except Exception as e:
-    print(f"\nError occurred: {e}")
+    try:
+        result = capm.calculate_expected_return(tickers)
+        print("\nFinal CAPM expected returns:")
+        print(result)
+    except Exception as e:
+        print(f"\nError occurred: {e}")
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+from src.utils.downsample import downsample, lttb, min_max
+
+
+def test_lttb_keeps_shape_and_endpoints():
+    y = np.cumsum(np.random.default_rng(0).normal(size=5000))
+    kept = lttb(y, 500)
+    assert len(kept) == 500 and kept[0] == 0 and kept[-1] == len(y) - 1
+    assert (np.diff(kept) > 0).all()
+    # A spike survives even though most points are dropped
+    y[2500] += 100
+    assert 2500 in lttb(y, 200)
+    assert np.array_equal(lttb(y[:50], 100), np.arange(50))
+
+
+def test_min_max_keeps_every_extreme():
+    y = np.sin(np.linspace(0, 40, 10001)) + np.linspace(0, 1, 10001)
+    kept = min_max(y, 400)
+    assert len(kept) <= 402 and kept[0] == 0 and kept[-1] == 10000
+    assert y.argmin() in kept and y.argmax() in kept
+
+
+def test_downsample_series():
+    series = pd.Series(np.arange(3000.0), index=pd.bdate_range("2010-01-01", periods=3000))
+    reduced = downsample(series, 1000)
+    assert len(reduced) == 1000 and reduced.index[-1] == series.index[-1]
+    assert len(downsample(series, 1000, method="minmax")) <= 1002
+
+
+if __name__ == "__main__":
+    test_lttb_keeps_shape_and_endpoints()
+    test_min_max_keeps_every_extreme()
+    test_downsample_series()
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pypfopt import expected_returns, risk_models
+from src.core.estimators import RollingEstimator
+
+
+def test_windowed_estimator_matches_full_recompute(make_prices):
+    prices = make_prices(n_assets=5, n_days=400)
+    returns = prices.pct_change().dropna()
+    estimator = RollingEstimator(list(prices.columns), window=100)
+    for row in returns.to_numpy():
+        estimator.append(row)
+
+    window = prices.iloc[-101:]
+    pd.testing.assert_series_equal(estimator.mean_historical_return(), expected_returns.mean_historical_return(window),
+                                   check_names=False)
+    pd.testing.assert_frame_equal(estimator.sample_cov(), risk_models.sample_cov(window), check_names=False)
+
+
+def test_evict_restores_previous_state(make_prices):
+    prices = make_prices(n_assets=5, n_days=400)
+    returns = prices.pct_change().dropna().to_numpy()
+    estimator = RollingEstimator(list(prices.columns))
+    estimator.append(returns[:200])
+    before = estimator.sample_cov()
+    estimator.append(returns[200:250])
+    estimator.evict(returns[200:250])
+    pd.testing.assert_frame_equal(estimator.sample_cov(), before)
+
+
+def test_shrinkage_matches_scikit_learn(make_prices):
+    pytest.importorskip("sklearn")
+    prices = make_prices(n_assets=8, n_days=120, seed=2)
+    estimator = RollingEstimator.from_prices(prices)
+    shrinkage = risk_models.CovarianceShrinkage(prices)
+
+    assert 0 < estimator.shrinkage_intensity() < 1
+    np.testing.assert_allclose(estimator.ledoit_wolf().to_numpy(), shrinkage.ledoit_wolf().to_numpy(), rtol=1e-8)
+    np.testing.assert_allclose(estimator.oracle_approximating().to_numpy(),
+                               shrinkage.oracle_approximating().to_numpy(), rtol=1e-8)
+
+
+def test_exponentially_weighted_matches_pandas(make_prices):
+    prices = make_prices(n_assets=5, n_days=400)
+    returns = prices.pct_change().dropna()
+    estimator = RollingEstimator(list(prices.columns), halflife=30)
+    estimator.append(returns.to_numpy()[:150])
+    for row in returns.to_numpy()[150:]:
+        estimator.append(row)
+
+    expected = returns.ewm(halflife=30).cov().iloc[-len(prices.columns):] * 252
+    np.testing.assert_allclose(estimator.sample_cov().to_numpy(), expected.to_numpy(), rtol=1e-8)
+    with pytest.raises(ValueError):
+        estimator.evict(returns.to_numpy()[0])
+
+
+def test_gaps_are_rejected_and_large_means_keep_precision(make_prices):
+    prices = make_prices(n_assets=5, n_days=400)
+    gappy = prices.copy()
+    gappy.iloc[100, 2] = np.nan
+    with pytest.raises(ValueError):
+        RollingEstimator.from_prices(gappy)
+    # Leading rows without any price are simply skipped
+    leading = pd.concat([pd.DataFrame(np.nan, index=pd.bdate_range("2019-12-01", periods=5), columns=prices.columns), prices])
+    pd.testing.assert_frame_equal(RollingEstimator.from_prices(leading).sample_cov(), RollingEstimator.from_prices(prices).sample_cov())
+
+    # Tiny spread around a large mean, over many window shifts: raw-moment sums would lose every digit
+    rng = np.random.default_rng(4)
+    returns = 0.5 + rng.normal(0, 1e-5, (3000, 4))
+    estimator = RollingEstimator([f"A{i}" for i in range(4)], window=60)
+    for block in np.array_split(returns, 300):
+        estimator.append(block)
+    expected = np.cov(returns[-60:], rowvar=False) * 252
+    np.testing.assert_allclose(estimator.sample_cov().to_numpy(), expected, rtol=1e-8, atol=1e-14)
+    assert 0 <= estimator.shrinkage_intensity() <= 1
+
+
+if __name__ == "__main__":
+    from tests.conftest import synthetic_prices
+    test_windowed_estimator_matches_full_recompute(synthetic_prices)
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+from src.core.factor_model import FactorModel
+from src.core.optimizer import PortfolioOptimizer
+
+
+def test_factor_model_covariance(make_prices):
+    prices = make_prices(n_assets=40, n_days=600, n_factors=3)
+    model = FactorModel.from_prices(prices, n_factors=5)
+    sample = prices.pct_change().dropna().cov().to_numpy() * 252
+    assert model.loadings.shape == (40, 5)
+
+    # Total variances are reproduced exactly; covariances are close with enough factors
+    assert np.allclose(np.diag(model.cov().to_numpy()), np.diag(sample))
+    assert np.abs(model.cov().to_numpy() - sample).max() < 0.1 * np.abs(sample).max()
+
+    # Portfolio variances from the factor form match the dense matrix
+    weights = np.random.default_rng(1).dirichlet(np.ones(40), size=10)
+    dense = np.einsum("ij,jk,ik->i", weights, model.cov().to_numpy(), weights)
+    assert np.allclose(model.variances(weights), dense)
+
+
+def test_factor_optimizer_matches_dense(make_prices):
+    prices = make_prices(n_assets=40, n_days=600, n_factors=3)
+    model = FactorModel.from_prices(prices, n_factors=5)
+    mu = pd.Series(np.linspace(0.04, 0.2, 40), index=prices.columns)
+
+    structured = PortfolioOptimizer(mu, factor_model=model)
+    dense = PortfolioOptimizer(mu, model.cov())
+    for objective in ("maximize_sharpe", "minimize_volatility"):
+        w_factor = getattr(structured, objective)()
+        w_dense = getattr(dense, objective)()
+        assert np.allclose(w_factor, w_dense.reindex(w_factor.index), atol=1e-3)
+        assert np.isclose(
+            structured.portfolio_performance(w_factor)["annual_volatility"],
+            dense.portfolio_performance(w_factor)["annual_volatility"]
+        )
+
+
+def test_weight_and_cardinality_constraints(make_prices):
+    prices = make_prices(n_assets=150, n_days=600, n_factors=3)
+    mu = pd.Series(np.random.default_rng(2).normal(0.1, 0.05, 150), index=prices.columns)
+    optimizer = PortfolioOptimizer(mu, factor_model=FactorModel.from_prices(prices))
+
+    for solve in (optimizer.maximize_sharpe, optimizer.minimize_volatility):
+        weights = solve(max_weight=0.05, max_assets=25)
+        assert np.isclose(weights.sum(), 1, atol=1e-4)
+        assert weights.max() <= 0.05 + 1e-4
+        assert 0 < (weights > 0).sum() <= 25
+
+    # The cardinality cap costs some Sharpe ratio but not most of it
+    free = optimizer.portfolio_performance(optimizer.maximize_sharpe())["sharpe_ratio"]
+    capped = optimizer.portfolio_performance(optimizer.maximize_sharpe(max_assets=25))["sharpe_ratio"]
+    assert 0.5 * free < capped <= free + 1e-6
+
+
+class _NoDenseModel(FactorModel):
+    def cov(self):
+        raise AssertionError("dense covariance formed")
+
+
+def test_factor_paths_never_form_dense_covariance(make_prices):
+    prices = make_prices(n_assets=40, n_days=600, n_factors=3)
+    model = FactorModel.from_prices(prices, n_factors=5)
+    mu = pd.Series(np.random.default_rng(1).normal(0.1, 0.05, 40), index=prices.columns)
+    dense = PortfolioOptimizer(mu, model.cov())
+    structured = PortfolioOptimizer(mu, factor_model=_NoDenseModel(**vars(model)))
+
+    for method in ("min_variance_analytic", "tangency_analytic"):
+        assert np.allclose(getattr(structured, method)(), getattr(dense, method)(), atol=1e-8)
+    frontier, dense_frontier = structured.efficient_frontier(n_points=8), dense.efficient_frontier(n_points=8)
+    assert np.allclose(frontier.volatilities, dense_frontier.volatilities, atol=1e-4)
+
+    last = prices.iloc[-1]
+    held = (250 / last).round()
+    plan = structured.rebalance(last, 10_000, current_shares=held)
+    dense_plan = dense.rebalance(last, 10_000, current_shares=held)
+    assert np.allclose(plan.weights, dense_plan.weights, atol=1e-4)
+
+    # HRP needs every pairwise correlation: it expands the model, up to a size limit
+    structured.MAX_DENSE_ASSETS = 39
+    try:
+        structured.hierarchical_risk_parity()
+    except ValueError as error:
+        assert "dense covariance" in str(error)
+    else:
+        raise AssertionError("expected ValueError")
+
+
+if __name__ == "__main__":
+    from tests.conftest import synthetic_prices
+    test_factor_model_covariance(synthetic_prices)
+    test_factor_optimizer_matches_dense(synthetic_prices)
+    test_weight_and_cardinality_constraints(synthetic_prices)
+    test_factor_paths_never_form_dense_covariance(synthetic_prices)
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+from src.core.optimizer import PortfolioOptimizer
+
+
+def make_inputs(make_returns, n_assets=8, seed=0):
+    cov = make_returns(n_assets, n_factors=3, seed=seed).cov() * 252
+    mu = pd.Series(np.random.default_rng(seed).uniform(0.04, 0.15, n_assets), index=cov.index)
+    return mu, cov
+
+
+def test_frontier_sweep(make_returns):
+    mu, cov = make_inputs(make_returns)
+    optimizer = PortfolioOptimizer(expected_returns=mu, cov_matrix=cov)
+    frontier = optimizer.efficient_frontier(n_points=50)
+
+    assert len(frontier) == 50
+    assert frontier.weights.shape == (50, len(mu))
+    assert np.allclose(frontier.weights.sum(axis=1), 1, atol=1e-4)
+    assert np.all(np.diff(frontier.returns) > -1e-6), "Target returns should increase along the sweep"
+    assert np.all(np.diff(frontier.volatilities) > -1e-5), "Volatility should rise with target return"
+
+    # End points and the best Sharpe point agree with the single-shot optimizers
+    min_vol = optimizer.portfolio_performance(optimizer.minimize_volatility())
+    max_sharpe = optimizer.portfolio_performance(optimizer.maximize_sharpe())
+    assert np.isclose(frontier.volatilities[0], min_vol["annual_volatility"], atol=1e-3)
+    best = (max_sharpe["expected_annual_return"] - 0.02) / max_sharpe["annual_volatility"]
+    assert np.isclose(frontier.sharpe_ratios.max(), best, atol=1e-2)
+    assert np.isclose(frontier.returns[-1], mu.max(), atol=1e-4)
+
+
+def test_frontier_risk_aversion_sweep(make_returns):
+    mu, cov = make_inputs(make_returns, seed=1)
+    frontier = PortfolioOptimizer(expected_returns=mu, cov_matrix=cov).efficient_frontier(n_points=30, method="risk_aversion")
+
+    assert len(frontier) == 30
+    # Falling risk aversion moves along the frontier towards higher return
+    assert np.all(np.diff(frontier.returns) > -1e-5)
+    table = frontier.to_frame()
+    assert list(table.columns[:3]) == ["expected_annual_return", "annual_volatility", "sharpe_ratio"]
+
+
+def test_frontier_skips_points_the_solver_fails_on(make_returns):
+    import cvxpy as cp
+    from src.core.frontier import FrontierSweep
+
+    mu, cov = make_inputs(make_returns)
+    sweep = FrontierSweep(mu, cov)
+    targets = sweep.target_returns(10)
+    solve = sweep._return_problem.solve
+
+    def flaky_solve(*args, **kwargs):
+        if np.isclose(sweep._target.value, targets[4]):
+            raise cp.SolverError("solver failed")
+        return solve(*args, **kwargs)
+
+    sweep._return_problem.solve = flaky_solve
+    frontier = sweep.sweep(n_points=10)
+    assert len(frontier) == 9
+    assert not np.isclose(frontier.returns, targets[4], atol=1e-6).any()
+
+
+if __name__ == "__main__":
+    from tests.conftest import synthetic_returns
+    test_frontier_sweep(synthetic_returns)
+    test_frontier_skips_points_the_solver_fails_on(synthetic_returns)
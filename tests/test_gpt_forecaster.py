@@ -1,4 +1,11 @@
+import json
 import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openai
+from src.ai.forecast_cache import ForecastCache
 from src.ai.gpt_forecaster import GPTForecaster
 from dotenv import load_dotenv
 from pathlib import Path
@@ -29,5 +36,155 @@ def test_gpt_forecaster():
     print(batch)
 
 
+class FakeChatServer:
+    """Local stand-in for the chat completions endpoint, with optional latency and failures."""
+
+    def __init__(self, delay=0.0, failures=0, reply=None, status=500):
+        server = self
+        self.delay = delay
+        self.failures = failures
+        self.status = status
+        self.reply = reply or (lambda body: '{"expected_return": 0.08, "confidence": 70}')
+        self.requests = []
+        self.lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with server.lock:
+                    server.requests.append(body)
+                    fail = server.failures > 0
+                    server.failures -= fail
+                time.sleep(server.delay)
+                if fail:
+                    self.send_response(server.status)
+                    self.end_headers()
+                    return
+                payload = json.dumps({
+                    "id": "fake", "object": "chat.completion", "created": 0, "model": body["model"],
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": server.reply(body)}}]
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def client(self):
+        return openai.OpenAI(api_key="test", base_url=f"http://127.0.0.1:{self.httpd.server_port}/v1", max_retries=0)
+
+    def close(self):
+        self.httpd.shutdown()
+
+
+def test_batch_forecast_runs_concurrently():
+    server = FakeChatServer(delay=0.3)
+    try:
+        gpt = GPTForecaster(client=server.client(), max_concurrency=10)
+        tickers = [f"T{i}" for i in range(10)]
+        started = time.perf_counter()
+        batch = gpt.batch_forecast(tickers)
+        elapsed = time.perf_counter() - started
+    finally:
+        server.close()
+
+    assert list(batch) == tickers
+    assert all(result["expected_return"] == 0.08 for result in batch.values())
+    assert elapsed < 0.3 * 10 / 2, f"Batch took {elapsed:.2f}s, expected close to one request's latency"
+
+
+def test_batch_forecast_retries_and_falls_back():
+    server = FakeChatServer(failures=2)
+    try:
+        gpt = GPTForecaster(client=server.client(), max_concurrency=1, max_retries=2)
+        assert gpt.generate_forecast("AAPL")["expected_return"] == 0.08
+        assert len(server.requests) == 3
+
+        server.failures = 10
+        gpt = GPTForecaster(client=server.client(), max_retries=1)
+        assert gpt.generate_forecast("MSFT") == GPTForecaster.FALLBACK
+    finally:
+        server.close()
+
+
+def test_permanent_errors_are_not_retried():
+    for status in (400, 401, 403):
+        server = FakeChatServer(failures=10, status=status)
+        try:
+            gpt = GPTForecaster(client=server.client(), max_retries=3)
+            assert gpt.generate_forecast("AAPL") == GPTForecaster.FALLBACK
+            assert len(server.requests) == 1, f"HTTP {status} should not be retried"
+        finally:
+            server.close()
+
+
+def test_forecast_cache_ttl_and_lru(tmp_path):
+
+    cache = ForecastCache(tmp_path / "forecasts.sqlite", max_entries=2)
+    cache.put("m", "1", "AAA", "2024-01-01", {"expected_return": 0.1, "confidence": 60})
+    cache.put("m", "1", "BBB", "2024-01-01", {"expected_return": 0.2, "confidence": 60})
+    assert cache.get("m", "1", "AAA", "2024-01-01")["expected_return"] == 0.1
+    assert cache.get("m", "2", "AAA", "2024-01-01") is None, "Prompt version is part of the key"
+
+    # AAA was just read, so BBB is the least recently used and gets evicted
+    cache.put("m", "1", "CCC", "2024-01-01", {"expected_return": 0.3, "confidence": 60})
+    assert len(cache) == 2
+    assert cache.get("m", "1", "BBB", "2024-01-01") is None
+
+    # Survives reopening, and expires with the TTL
+    reopened = ForecastCache(tmp_path / "forecasts.sqlite", ttl=0)
+    assert len(reopened) == 2
+    assert reopened.get("m", "1", "AAA", "2024-01-01") is None
+
+
+def test_multi_ticker_batch_uses_cache_and_strict_json(tmp_path):
+
+    def reply(body):
+        prompt = body["messages"][1]["content"]
+        if ": " not in prompt:
+            return "not json"
+        tickers = prompt.split(": ")[1].rstrip(".").split(", ")
+        # BAD gets a malformed entry and must be retried on its own
+        data = {t: {"expected_return": 0.01 * i, "confidence": 60} for i, t in enumerate(tickers)}
+        if "BAD" in data:
+            data["BAD"] = "__import__('os')"
+        return json.dumps(data)
+
+    server = FakeChatServer(reply=reply)
+    try:
+        cache = ForecastCache(tmp_path / "forecasts.sqlite")
+        gpt = GPTForecaster(client=server.client(), cache=cache, tickers_per_request=20, max_retries=0)
+        tickers = [f"T{i}" for i in range(40)]
+        batch = gpt.batch_forecast(tickers)
+        assert len(server.requests) == 2, "40 tickers should take two multi-ticker completions"
+        assert batch["T1"] == {"expected_return": 0.01, "confidence": 60.0}
+
+        # A second run is served entirely from the cache
+        assert gpt.batch_forecast(tickers) == batch
+        assert len(server.requests) == 2
+
+        # A malformed entry is retried individually, and falls back when that fails too
+        result = gpt.batch_forecast(["X1", "BAD"])
+        assert len(server.requests) == 4
+        assert result["BAD"] == GPTForecaster.FALLBACK
+    finally:
+        server.close()
+
+
 if __name__ == "__main__":
+    import tempfile
+    test_batch_forecast_runs_concurrently()
+    test_batch_forecast_retries_and_falls_back()
+    test_permanent_errors_are_not_retried()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_forecast_cache_ttl_and_lru(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_multi_ticker_batch_uses_cache_and_strict_json(Path(tmp))
     test_gpt_forecaster()
@@ -0,0 +1,50 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.core.hrp import cap_weights, hrp_weights
+from src.core.optimizer import PortfolioOptimizer
+
+
+def make_cov(make_returns, n_assets):
+    return make_returns(n_assets, n_factors=4, prefix="T").cov() * 252
+
+
+def test_matches_pyportfolioopt(make_returns):
+    from pypfopt import HRPOpt
+    for n_assets in (2, 7, 40):
+        cov = make_cov(make_returns, n_assets)
+        expected = pd.Series(HRPOpt(cov_matrix=cov).optimize("single"))[cov.index]
+        np.testing.assert_allclose(hrp_weights(cov.to_numpy()), expected.to_numpy(), atol=1e-12)
+
+
+def test_optimizer_reports_like_other_objectives(make_returns):
+    cov = make_cov(make_returns, 30)
+    mu = pd.Series(0.08, index=cov.index)
+    optimizer = PortfolioOptimizer(mu, cov)
+    weights = optimizer.hierarchical_risk_parity()
+    assert np.isclose(weights.sum(), 1, atol=1e-4) and (weights > 0).all()
+    assert set(optimizer.portfolio_performance(weights)) >= {"expected_annual_return", "annual_volatility", "sharpe_ratio"}
+
+    capped = optimizer.hierarchical_risk_parity(linkage_method="average", max_weight=0.05, max_assets=25)
+    assert (capped > 0).sum() <= 25 and capped.max() <= 0.05 + 1e-5
+    assert np.isclose(capped.sum(), 1, atol=1e-4)
+
+    np.testing.assert_allclose(cap_weights(np.array([0.7, 0.2, 0.1]), 0.4), [0.4, 0.4, 0.2])
+
+
+def test_large_universe_takes_milliseconds(make_returns):
+    cov = make_cov(make_returns, 500).to_numpy()
+    hrp_weights(cov)
+    start = time.perf_counter()
+    weights = hrp_weights(cov)
+    assert time.perf_counter() - start < 0.5
+    assert np.isclose(weights.sum(), 1) and (weights > 0).all()
+
+
+if __name__ == "__main__":
+    from tests.conftest import synthetic_returns
+    test_matches_pyportfolioopt(synthetic_returns)
+    test_optimizer_reports_like_other_objectives(synthetic_returns)
+    test_large_universe_takes_milliseconds(synthetic_returns)
@@ -0,0 +1,51 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+HEAVY = ("cvxpy", "pypfopt", "openai", "yfinance", "plotly", "streamlit")
+
+# Generous wall-clock budget for importing the library (numpy/pandas/scipy dominate)
+IMPORT_BUDGET_SECONDS = 5.0
+
+IMPORT_SCRIPT = f"""
+import json, sys, time
+start = time.perf_counter()
+import src.main, src.core.pipeline, src.core.optimizer, src.core.black_litterman, src.core.backtest
+import src.core.expected_return, src.core.estimators, src.core.market_data_client, src.core.stress, src.core.resampling, src.core.rebalance
+import src.ai.gpt_forecaster
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {HEAVY!r} if m in sys.modules]}}))
+"""
+
+
+def run_isolated(script: str, env=None) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", script], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_library_import_is_light():
+    result = run_isolated(IMPORT_SCRIPT)
+    print(f"Library import took {result['seconds']:.3f}s")
+    assert result["loaded"] == [], f"Heavy dependencies imported eagerly: {result['loaded']}"
+    assert result["seconds"] < IMPORT_BUDGET_SECONDS
+
+
+def test_gpt_client_from_environment():
+    import os
+    script = """
+import json, sys
+from src.ai.gpt_forecaster import get_default_client
+client = get_default_client()
+print(json.dumps({"key": client.api_key, "streamlit": "streamlit" in sys.modules, "same": client is get_default_client()}))
+"""
+    result = run_isolated(script, env={**os.environ, "OPENAI_API_KEY": "sk-test"})
+    assert result == {"key": "sk-test", "streamlit": False, "same": True}
+
+
+if __name__ == "__main__":
+    test_library_import_is_light()
+    test_gpt_client_from_environment()
@@ -0,0 +1,151 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from src.main import main
+
+
+def write_fixtures(directory, tickers, periods=600):
+    dates = pd.bdate_range("2020-01-01", periods=periods)
+    rng = np.random.default_rng(3)
+    market = rng.normal(0.0004, 0.01, len(dates))
+    series = {"^GSPC": market}
+    for i, ticker in enumerate(tickers):
+        series[ticker] = (0.6 + 0.2 * i) * market + rng.normal(0.0002, 0.006, len(dates))
+    for ticker, returns in series.items():
+        close = 100 * np.cumprod(1 + returns)
+        frame = pd.DataFrame({"Close": close, "Adj Close": close}, index=pd.Index(dates, name="Date"))
+        frame.to_csv(directory / f"{ticker}.csv")
+    rf = pd.DataFrame({"Close": 4.0, "Adj Close": 4.0}, index=pd.Index(dates, name="Date"))
+    rf.to_csv(directory / "^IRX.csv")
+
+
+def test_batch_runner(tmp_path):
+    prices = tmp_path / "prices"
+    prices.mkdir()
+    write_fixtures(prices, ["AAA", "BBB", "CCC", "DDD"])
+
+    jobs = [
+        {"job_id": "hist", "tickers": ["AAA", "BBB", "CCC"], "start_date": "2020-01-01", "end_date": "2021-06-01"},
+        {"job_id": "capm", "tickers": ["BBB", "CCC", "DDD"], "start_date": "2020-06-01", "end_date": "2022-01-01",
+         "forecast_source": "capm", "objective": "min_volatility", "investment": 5000},
+        {"job_id": "missing", "tickers": ["AAA", "ZZZ"], "start_date": "2020-01-01", "end_date": "2021-01-01"},
+        {"job_id": "partial", "tickers": ["AAA", "CCC", "ZZZ"], "start_date": "2020-01-01", "end_date": "2021-01-01"},
+        {"job_id": "tail", "tickers": ["AAA", "BBB", "CCC", "DDD"], "start_date": "2020-01-01", "end_date": "2022-01-01",
+         "objective": "min_cvar", "cvar_alpha": 0.9, "max_drawdown": 0.5},
+        {"job_id": "hrp", "tickers": ["AAA", "BBB", "CCC", "DDD"], "start_date": "2020-01-01", "end_date": "2022-01-01",
+         "objective": "hrp", "max_weight": 0.4},
+        {"job_id": "resampled", "tickers": ["AAA", "BBB", "CCC", "DDD"], "start_date": "2020-01-01",
+         "end_date": "2022-01-01", "resamples": 40, "block_size": 5},
+        {"job_id": "rebalance", "tickers": ["AAA", "BBB", "CCC"], "start_date": "2020-01-01", "end_date": "2021-06-01",
+         "current_shares": {"AAA": 30, "BBB": 20}, "investment": 10000}
+    ]
+    jobs_file = tmp_path / "jobs.jsonl"
+    jobs_file.write_text("\n".join(json.dumps(job) for job in jobs))
+    output = tmp_path / "results.jsonl"
+
+    assert main([str(jobs_file), "--output", str(output), "--workers", "2", "--price-dir", str(prices)]) == 0
+    results = [json.loads(line) for line in output.read_text().splitlines()]
+
+    # Results come back in job order, and a failing job does not stop the batch
+    assert [r["job_id"] for r in results] == ["hist", "capm", "missing", "partial", "tail", "hrp", "resampled", "rebalance"]
+    assert results[2]["status"] == "error"
+    for result in results[:2] + results[3:]:
+        assert result["status"] == "ok"
+        assert np.isclose(sum(result["weights"].values()), 1, atol=1e-4)
+    assert np.isclose(sum(results[1]["allocation"].values()), 5000, atol=1)
+    assert results[3]["dropped"] == ["ZZZ"]
+    assert results[4]["cvar"] > 0 and results[4]["max_drawdown"] <= 0.5 + 1e-8
+    assert len(results[5]["weights"]) == 4 and max(results[5]["weights"].values()) <= 0.4 + 1e-5
+    assert set(results[6]["weight_std"]) == set(results[6]["weights"])
+    plan = results[7]["rebalance"]
+    assert plan["cash"] >= 0 and plan["trades"]
+    assert all(plan["shares"].get(t["ticker"], 0) == t["target_shares"] for t in plan["trades"])
+
+    # In-process run gives the same numbers
+    serial = tmp_path / "serial.jsonl"
+    main([str(jobs_file), "--output", str(serial), "--price-dir", str(prices)])
+    assert [json.loads(line) for line in serial.read_text().splitlines()] == results
+
+    # Stress-tested in one batch against the windows the fixture history covers
+    stressed = tmp_path / "stressed.jsonl"
+    main([str(jobs_file), "--output", str(stressed), "--price-dir", str(prices), "--stress"])
+    stressed = [json.loads(line) for line in stressed.read_text().splitlines()]
+    assert "stress" not in stressed[2]
+    assert set(stressed[0]["stress"]) == {"COVID Crash (Mar 2020)", "2022 Rate Shock"}
+    assert all(0 <= s["max_drawdown"] <= 1 for s in stressed[4]["stress"].values())
+
+
+def test_invalid_jobs_become_error_records(tmp_path):
+    prices = tmp_path / "prices"
+    prices.mkdir()
+    write_fixtures(prices, ["AAA", "BBB"])
+
+    lines = [
+        json.dumps({"job_id": "ok", "tickers": ["AAA", "BBB"], "start_date": "2020-01-01", "end_date": "2021-01-01"}),
+        json.dumps({"job_id": "objective", "tickers": ["AAA", "BBB"], "start_date": "2020-01-01",
+                    "end_date": "2021-01-01", "objective": "max_sortino"}),
+        json.dumps({"job_id": "resample", "tickers": ["AAA", "BBB"], "start_date": "2020-01-01",
+                    "end_date": "2021-01-01", "objective": "hrp", "resamples": 50}),
+        json.dumps({"job_id": "no-tickers", "start_date": "2020-01-01", "end_date": "2021-01-01"}),
+        "{not json"
+    ]
+    jobs_file = tmp_path / "jobs.jsonl"
+    jobs_file.write_text("\n".join(lines))
+    output = tmp_path / "results.jsonl"
+
+    # Each bad job becomes its own error record; the good one still runs
+    assert main([str(jobs_file), "--output", str(output), "--price-dir", str(prices)]) == 0
+    results = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [r["job_id"] for r in results] == ["ok", "objective", "resample", "no-tickers", "job-5"]
+    assert results[0]["status"] == "ok"
+    assert all(r["status"] == "error" for r in results[1:])
+    assert "max_sortino" in results[1]["error"] and "tickers" in results[3]["error"]
+
+    # A batch with no valid job still writes its error records
+    jobs_file.write_text("\n".join(lines[1:]))
+    assert main([str(jobs_file), "--output", str(output), "--price-dir", str(prices)]) == 0
+    assert len(output.read_text().splitlines()) == 4
+
+
+def test_resample_workers_keep_results(tmp_path):
+    prices = tmp_path / "prices"
+    prices.mkdir()
+    write_fixtures(prices, ["AAA", "BBB", "CCC", "DDD"])
+    jobs_file = tmp_path / "jobs.jsonl"
+    jobs_file.write_text(json.dumps({"job_id": "resampled", "tickers": ["AAA", "BBB", "CCC", "DDD"],
+                                     "start_date": "2020-01-01", "end_date": "2022-01-01", "resamples": 40}))
+
+    results = {}
+    for workers in ("1", "2"):
+        output = tmp_path / f"results-{workers}.jsonl"
+        assert main([str(jobs_file), "--output", str(output), "--resample-workers", workers, "--price-dir", str(prices)]) == 0
+        results[workers] = json.loads(output.read_text())
+
+    # Samples are seeded by index, so spreading them over processes only changes round-off
+    assert results["2"]["status"] == "ok" and results["2"]["weights"].keys() == results["1"]["weights"].keys()
+    for key in ("weights", "weight_std"):
+        assert np.allclose(list(results["2"][key].values()), list(results["1"][key].values()), atol=1e-8)
+
+
+def test_bad_dates_and_ticker_strings_become_error_records(tmp_path):
+    prices = tmp_path / "prices"
+    prices.mkdir()
+    write_fixtures(prices, ["AAA", "BBB"])
+    good = {"job_id": "good", "tickers": ["AAA", "BBB"], "start_date": "2020-01-01", "end_date": "2021-01-01"}
+    bad_jobs = {
+        "bad-date": {**good, "job_id": "bad-date", "start_date": "not-a-date"},
+        "reversed": {**good, "job_id": "reversed", "start_date": "2021-01-01", "end_date": "2020-01-01"},
+        "ticker-string": {**good, "job_id": "ticker-string", "tickers": "AAA"}
+    }
+    output = tmp_path / "results.jsonl"
+    for job_id, bad in bad_jobs.items():
+        jobs_file = tmp_path / "jobs.jsonl"
+        jobs_file.write_text("\n".join(json.dumps(job) for job in (good, bad)))
+
+        # The bad job becomes an error record instead of aborting the batch
+        assert main([str(jobs_file), "--output", str(output), "--price-dir", str(prices)]) == 0
+        results = [json.loads(line) for line in output.read_text().splitlines()]
+        assert [r["job_id"] for r in results] == ["good", job_id]
+        assert results[0]["status"] == "ok" and results[1]["status"] == "error"
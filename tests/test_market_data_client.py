@@ -0,0 +1,79 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.market_data import DataLoader
+from src.core.market_data_client import MarketDataClient, StubProvider
+from src.core.price_store import FetchError, PriceStore
+
+
+def make_provider(tickers, **kwargs):
+    dates = pd.bdate_range("2021-01-01", periods=250)
+    rng = np.random.default_rng(0)
+    prices = pd.DataFrame(100 * np.exp(np.cumsum(rng.normal(0, 0.01, (len(dates), len(tickers))), axis=0)),
+                          index=dates, columns=tickers)
+    return StubProvider.from_prices(prices, **kwargs)
+
+
+def test_retries_transient_failures():
+    provider = make_provider(["AAA", "BBB", "CCC"], failures=2)
+    client = MarketDataClient(provider, max_workers=1, base_delay=0.001)
+    fetched = client.fetch(["AAA", "BBB", "CCC", "ZZZ"], "2021-02-01", "2021-03-01")
+    assert sorted(fetched) == ["AAA", "BBB", "CCC"]
+    assert fetched["AAA"].index.min() >= pd.Timestamp("2021-02-01")
+    # Two throttled requests retried, plus one request per ticker
+    assert len(provider.calls) == 6
+
+
+def test_coalesces_concurrent_requests_and_bounds_concurrency():
+    provider = make_provider(["AAA", "BBB", "CCC", "DDD"], delay=0.1)
+    client = MarketDataClient(provider, max_workers=2)
+    results = []
+    start = time.perf_counter()
+    threads = [threading.Thread(target=lambda: results.append(client.fetch(["AAA", "BBB", "CCC", "DDD"], "2021-01-01", "2022-01-01")))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    assert len(results) == 5 and all(sorted(r) == ["AAA", "BBB", "CCC", "DDD"] for r in results)
+    assert len(provider.calls) == 4, "Callers asking for the same symbol and range should share one fetch"
+    assert elapsed >= 0.2, "Four requests on two workers take at least two rounds"
+
+    # Once finished, the same request is issued again
+    client.fetch(["AAA"], "2021-01-01", "2022-01-01")
+    assert len(provider.calls) == 5
+
+
+def test_exhausted_retries_do_not_poison_the_store(tmp_path):
+    provider = make_provider(["AAA", "BBB"], failures=100)
+    client = MarketDataClient(provider, retries=1, base_delay=0.001)
+    with pytest.raises(FetchError) as error:
+        client.fetch(["AAA"], "2021-01-01", "2022-01-01")
+    assert error.value.failed == ["AAA"]
+
+    store = PriceStore(tmp_path / "store", fetcher=client)
+    with pytest.raises(ValueError):
+        DataLoader.load(["AAA", "BBB"], "2021-01-01", "2022-01-01", store=store)
+    assert not store.validity.is_invalid("AAA") and not store.contains("AAA")
+
+    # Throttling over: the same store now fills normally, and a real miss is cached as invalid
+    provider.failures = 0
+    result = DataLoader.load(["AAA", "BBB", "ZZZ"], "2021-01-01", "2022-01-01", store=store)
+    assert result.valid_tickers == ["AAA", "BBB"]
+    assert result.dropped == {"ZZZ": "no data returned"}
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    test_retries_transient_failures()
+    test_coalesces_concurrent_requests_and_bounds_concurrency()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_exhausted_retries_do_not_poison_the_store(Path(tmp))
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.monte_carlo import MonteCarloSimulator
+
+
+def make_simulator(make_returns, **kwargs):
+    cov = make_returns(n_assets=3, n_days=750).cov() * 252
+    mu = pd.Series([0.06, 0.09, 0.12], index=cov.index)
+    weights = pd.Series([0.5, 0.3, 0.2], index=cov.index)
+    return MonteCarloSimulator(mu, cov, weights, **kwargs)
+
+
+def test_simulation_matches_theory(make_returns):
+    simulator = make_simulator(make_returns, initial_value=100)
+    result = simulator.simulate(n_paths=40000, horizon=252, seed=7, method="projected")
+    drift, vol = simulator.portfolio_moments()
+
+    log_terminal = np.log(result.terminal_values / 100)
+    assert np.isclose(log_terminal.mean(), 252 * drift, atol=4 * vol * np.sqrt(252 / 40000))
+    assert np.isclose(log_terminal.std(), vol * np.sqrt(252), rtol=0.02)
+
+    # Histogram bands agree with exact percentiles of the terminal values
+    exact = np.percentile(result.terminal_values, [5, 50, 95])
+    assert np.allclose(result.bands.iloc[-1][["p5", "p50", "p95"]], exact, rtol=1e-3)
+    assert (result.bands.iloc[0] == 100).all()
+    assert (result.bands["p5"] <= result.bands["p95"]).all()
+
+    assert result.cvar(0.95) >= result.var(0.95)
+    assert ((result.max_drawdowns >= 0) & (result.max_drawdowns < 1)).all()
+    summary = result.summary()
+    assert summary["n_paths"] == 40000 and 0 < summary["probability_of_loss"] < 1
+
+
+def test_asset_simulation_close_to_projection(make_returns):
+    simulator = make_simulator(make_returns)
+    assets = simulator.simulate(n_paths=20000, horizon=126, seed=1, method="assets")
+    projected = simulator.simulate(n_paths=20000, horizon=126, seed=1, method="projected")
+    assert np.allclose(assets.bands.iloc[-1], projected.bands.iloc[-1], rtol=0.02)
+    buy_and_hold = simulator.simulate(n_paths=20000, horizon=126, seed=1, rebalance=False)
+    assert np.isclose(np.median(buy_and_hold.terminal_values), np.median(assets.terminal_values), rtol=0.02)
+
+
+def test_reproducible_across_workers_and_bounded_chunks(make_returns):
+    simulator = make_simulator(make_returns)
+    serial = simulator.simulate(n_paths=9000, horizon=60, seed=3, chunk_size=2000)
+    parallel = simulator.simulate(n_paths=9000, horizon=60, seed=3, chunk_size=2000, n_workers=2)
+    assert np.array_equal(serial.terminal_values, parallel.terminal_values)
+    assert serial.bands.equals(parallel.bands)
+
+    # A tiny memory limit only changes chunking, never the number of paths
+    small = simulator.simulate(n_paths=5000, horizon=60, seed=3, memory_limit=60 * 8 * 3 * 500)
+    assert small.n_paths == 5000
+
+
+def test_rejects_shorts_and_leverage_and_keeps_cash(make_returns):
+    cov = make_returns(n_assets=3, n_days=750).cov() * 252
+    mu = pd.Series(0.1, index=cov.index)
+    for weights in ([1.2, -0.1, -0.1], [0.6, 0.6, 0.3]):
+        with pytest.raises(ValueError, match="long-only"):
+            MonteCarloSimulator(mu, cov, pd.Series(weights, index=cov.index))
+
+    # A partly invested portfolio holds the rest in cash: values stay positive even under extreme volatility
+    simulator = MonteCarloSimulator(mu, cov * 400, pd.Series([0.4, 0.3, 0.1], index=cov.index))
+    for rebalance in (True, False):
+        result = simulator.simulate(n_paths=2000, horizon=252, seed=0, method="assets", rebalance=rebalance)
+        assert np.isfinite(result.terminal_values).all() and (result.terminal_values > 0).all()
+        assert np.isfinite(result.bands.to_numpy()).all()
+
+    # Without risk or drift the cash keeps its value whether or not the portfolio is rebalanced
+    calm = MonteCarloSimulator(pd.Series(0.0, index=cov.index), cov * 1e-8, pd.Series([0.3, 0.2, 0.0], index=cov.index))
+    for rebalance in (True, False):
+        result = calm.simulate(n_paths=500, horizon=252, seed=0, method="assets", rebalance=rebalance)
+        assert np.allclose(result.terminal_values, 1, atol=1e-3)
+        assert result.var(0.95) < 1e-3 and result.max_drawdowns.max() < 1e-3
+
+if __name__ == "__main__":
+    from tests.conftest import synthetic_returns
+    test_simulation_matches_theory(synthetic_returns)
+    test_asset_simulation_close_to_projection(synthetic_returns)
+    test_reproducible_across_workers_and_bounded_chunks(synthetic_returns)
+    test_rejects_shorts_and_leverage_and_keeps_cash(synthetic_returns)
@@ -34,5 +34,32 @@ def test_maximize_sharpe():
     print(perf)
 
 
+def test_vectorized_evaluation_and_analytic_portfolios():
+    tickers = ["AAPL", "MSFT", "GOOGL"]
+    mu = pd.Series([0.12, 0.10, 0.11], index=tickers)
+    cov_matrix = pd.DataFrame([
+        [0.04, 0.006, 0.008],
+        [0.006, 0.03, 0.005],
+        [0.008, 0.005, 0.035]
+    ], index=tickers, columns=tickers)
+    optimizer = PortfolioOptimizer(expected_returns=mu, cov_matrix=cov_matrix)
+
+    # Many candidates scored at once match the single-portfolio evaluation
+    rng = np.random.default_rng(0)
+    candidates = rng.dirichlet(np.ones(3), size=1000)
+    scores = optimizer.evaluate(candidates)
+    assert scores.shape == (1000, 3)
+    single = optimizer.portfolio_performance(dict(zip(tickers, candidates[7])))
+    assert np.isclose(scores.loc[7, "annual_volatility"], single["annual_volatility"])
+    assert np.isclose(scores.loc[7, "sharpe_ratio"], single["sharpe_ratio"])
+
+    # Closed-form portfolios bound every candidate
+    min_var = optimizer.portfolio_performance(optimizer.min_variance_analytic())
+    tangency = optimizer.portfolio_performance(optimizer.tangency_analytic())
+    assert min_var["annual_volatility"] <= scores["annual_volatility"].min() + 1e-12
+    assert tangency["sharpe_ratio"] >= scores["sharpe_ratio"].max() - 1e-12
+    assert np.isclose(optimizer.tangency_analytic().sum(), 1)
+
+
 if __name__ == "__main__":
     test_maximize_sharpe()
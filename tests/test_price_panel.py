@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from src.core.price_panel import PricePanel
+from src.core.price_store import CSVFetcher, PriceStore
+from tests.test_price_store import write_fixtures
+
+
+def test_views_and_returns_match_pandas(make_prices):
+    frame = make_prices(n_assets=6, n_days=300, prefix="T")
+    frame.iloc[:20, 2] = np.nan
+    panel = PricePanel.from_frame(frame)
+    assert panel.shape == (6, 300) and panel.values.flags["C_CONTIGUOUS"]
+    pd.testing.assert_frame_equal(panel.to_frame(), frame, check_names=False)
+    assert np.shares_memory(panel.to_frame().to_numpy(), panel.values)
+
+    # Neighbouring tickers and date windows are views; other selections copy only their rows
+    assert np.shares_memory(panel.select(["T1", "T2", "T3"]).values, panel.values)
+    assert np.shares_memory(panel.between("2020-03-01", "2020-06-01").values, panel.values)
+    scattered = panel.select(["T4", "T0", "ZZZ"])
+    assert list(scattered.tickers) == ["T4", "T0"] and not np.shares_memory(scattered.values, panel.values)
+    window = panel.between("2020-03-01", "2020-06-01")
+    assert window.dates[0] >= pd.Timestamp("2020-03-01") and window.dates[-1] < pd.Timestamp("2020-06-01")
+
+    expected = frame.pct_change(fill_method=None).iloc[1:]
+    np.testing.assert_allclose(panel.returns().T, expected.to_numpy())
+    pd.testing.assert_frame_equal(panel.returns_frame(), expected, check_names=False, check_freq=False)
+    np.testing.assert_allclose(panel.log_returns(), np.log1p(panel.returns()))
+
+    left, right = panel.align(panel.between("2020-02-01").select(["T5"]))
+    assert left.dates.equals(right.dates) and len(left.dates) == len(panel.between("2020-02-01").dates)
+    assert panel.dropna() is panel
+
+    # Buy-and-hold growth as one product matches the pandas computation; a late listing is held as cash
+    weights = np.array([0.1, 0.2, 0.3, 0.15, 0.15, 0.1])
+    expected = frame.div(frame.iloc[0]).mul(weights, axis=1).sum(axis=1) + weights[2]
+    np.testing.assert_allclose(panel.growth(weights), expected.to_numpy())
+    assert len(PricePanel(np.full((1, 3), np.nan), ["X"], panel.dates[:3]).dropna()) == 0
+
+
+def test_store_reads_one_field_into_a_compact_panel(tmp_path):
+    fixtures = tmp_path / "fixtures"
+    fixtures.mkdir()
+    write_fixtures(fixtures, ["AAA", "BBB", "CCC"])
+    store = PriceStore(tmp_path / "store", fetcher=CSVFetcher(fixtures))
+
+    panel = store.get_panel(["CCC", "AAA", "ZZZ"], "2020-02-01", "2020-08-01", dtype=np.float32)
+    assert list(panel.tickers) == ["CCC", "AAA"] and panel.values.dtype == np.float32
+    frame = store.read(["CCC", "AAA"], "2020-02-01", "2020-08-01")
+    np.testing.assert_allclose(panel.values.T, frame.to_numpy(), rtol=1e-6)
+
+    # Against a MultiIndex frame of every OHLCV field, the single-field panel is several times smaller
+    fields = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+    wide = pd.concat({f: frame for f in fields}, axis=1).swaplevel(axis=1)
+    assert wide.memory_usage(index=False).sum() >= 6 * store.read_panel(["CCC", "AAA"], "2020-02-01", "2020-08-01").nbytes
+    assert wide.memory_usage(index=False).sum() >= 12 * panel.nbytes
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    from tests.conftest import synthetic_prices
+    test_views_and_returns_match_pandas(synthetic_prices)
+    with tempfile.TemporaryDirectory() as tmp:
+        test_store_reads_one_field_into_a_compact_panel(Path(tmp))
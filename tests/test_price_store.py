@@ -0,0 +1,162 @@
+import numpy as np
+import pandas as pd
+from src.core.market_data import DataLoader
+from src.core.price_store import CSVFetcher, PriceStore, TickerValidityIndex
+
+
+class CountingFetcher(CSVFetcher):
+    """CSV fixture fetcher that records every requested range."""
+
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.calls = []
+
+    def fetch(self, tickers, start, end):
+        self.calls.append((tuple(tickers), start, end))
+        return super().fetch(tickers, start, end)
+
+
+def write_fixtures(directory, tickers, start="2020-01-01", periods=500):
+    dates = pd.bdate_range(start, periods=periods)
+    rng = np.random.default_rng(0)
+    for ticker in tickers:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates))))
+        frame = pd.DataFrame({
+            "Open": close, "High": close, "Low": close, "Close": close,
+            "Adj Close": close * 0.99, "Volume": 1e6
+        }, index=pd.Index(dates, name="Date"))
+        frame.to_csv(directory / f"{ticker}.csv")
+    return dates
+
+
+def test_price_store_incremental_refresh(tmp_path):
+    fixtures = tmp_path / "fixtures"
+    fixtures.mkdir()
+    dates = write_fixtures(fixtures, ["AAA", "BBB"])
+    fetcher = CountingFetcher(fixtures)
+    store = PriceStore(tmp_path / "store", fetcher=fetcher)
+
+    first = store.get(["AAA", "BBB"], "2020-03-01", "2020-06-01")
+    assert list(first.columns) == ["AAA", "BBB"]
+    assert len(fetcher.calls) == 1, "Both tickers should share one bulk fetch"
+
+    # Same range again is served from disk
+    again = store.get(["AAA", "BBB"], "2020-03-01", "2020-06-01")
+    assert len(fetcher.calls) == 1
+    pd.testing.assert_frame_equal(first, again)
+
+    # Moving the end date only fetches the new tail
+    extended = store.get(["AAA", "BBB"], "2020-03-01", "2020-06-15")
+    assert fetcher.calls[-1][1:] == ("2020-06-01", "2020-06-15")
+    assert extended.index.max() < pd.Timestamp("2020-06-15")
+
+    expected = pd.read_csv(fixtures / "AAA.csv", index_col="Date", parse_dates=True)["Adj Close"]
+    expected = expected.loc["2020-03-01":"2020-06-14"]
+    np.testing.assert_allclose(extended["AAA"].to_numpy(), expected.to_numpy())
+    assert extended.index.min() == dates[dates >= "2020-03-01"][0]
+
+
+def test_price_store_keeps_disjoint_ranges_apart(tmp_path):
+    fixtures = tmp_path / "fixtures"
+    fixtures.mkdir()
+    write_fixtures(fixtures, ["AAA"], start="2010-01-01", periods=2700)
+    fetcher = CountingFetcher(fixtures)
+    store = PriceStore(tmp_path / "store", fetcher=fetcher)
+
+    store.get(["AAA"], "2015-01-01", "2020-01-01")
+    store.get(["AAA"], "2010-01-01", "2011-01-01")
+    assert store.missing_ranges("AAA", pd.Timestamp("2011-01-01"), pd.Timestamp("2015-01-01")) == \
+        [(pd.Timestamp("2011-01-01"), pd.Timestamp("2015-01-01"))]
+
+    # The gap in between was never fetched, so it is fetched now rather than read back empty
+    middle = store.get(["AAA"], "2011-01-01", "2015-01-01")
+    assert fetcher.calls[-1][1:] == ("2011-01-01", "2015-01-01")
+    assert len(middle) > 1000
+
+    # Filling the gap joins the ranges; anything inside is served from disk
+    calls = len(fetcher.calls)
+    store.get(["AAA"], "2010-06-01", "2019-06-01")
+    assert len(fetcher.calls) == calls
+    assert store.missing_ranges("AAA", pd.Timestamp("2009-01-01"), pd.Timestamp("2020-06-01")) == [
+        (pd.Timestamp("2009-01-01"), pd.Timestamp("2010-01-01")),
+        (pd.Timestamp("2020-01-01"), pd.Timestamp("2020-06-01"))
+    ]
+
+
+def test_price_store_unknown_ticker(tmp_path):
+    fixtures = tmp_path / "fixtures"
+    fixtures.mkdir()
+    write_fixtures(fixtures, ["AAA"])
+    store = PriceStore(tmp_path / "store", fetcher=CSVFetcher(fixtures))
+
+    prices = store.get(["AAA", "NOPE"], "2020-01-01", "2020-02-01")
+    assert list(prices.columns) == ["AAA"]
+    assert not store.contains("NOPE")
+
+
+def test_data_loader_reads_from_store(tmp_path):
+    fixtures = tmp_path / "fixtures"
+    fixtures.mkdir()
+    write_fixtures(fixtures, ["AAA", "BBB"])
+    store = PriceStore(tmp_path / "store", fetcher=CSVFetcher(fixtures))
+    store.refresh(["AAA", "BBB"], "2020-01-01", "2021-01-01")
+
+    prices, valid = DataLoader.get_data(
+        ["AAA", "BBB"],
+        start_date="2020-01-01",
+        end_date="2021-01-01",
+        return_updated_tickers=True,
+        store=store
+    )
+    assert valid == ["AAA", "BBB"]
+    assert prices.shape[1] == 2 and prices.notna().all().all()
+
+
+def test_data_loader_reports_dropped_tickers(tmp_path):
+    fixtures = tmp_path / "fixtures"
+    fixtures.mkdir()
+    write_fixtures(fixtures, ["AAA", "BBB"])
+    fetcher = CountingFetcher(fixtures)
+    store = PriceStore(tmp_path / "store", fetcher=fetcher)
+
+    result = DataLoader.load(["AAA", "BBB", "FAKE"], "2020-01-01", "2020-06-01", store=store)
+    assert result.valid_tickers == ["AAA", "BBB"]
+    assert result.dropped == {"FAKE": "no data returned"}
+    assert len(fetcher.calls) == 1, "Validation should come from the single bulk download"
+
+    # A later range only requests the new tail, and FAKE is not retried while cached
+    result = DataLoader.load(["AAA", "BBB", "FAKE"], "2020-01-01", "2020-07-01", store=store)
+    assert len(fetcher.calls) == 2
+    assert "FAKE" not in fetcher.calls[-1][0]
+    assert result.dropped == {"FAKE": "cached as invalid"}
+
+    # Once the TTL lapses the ticker is tried again
+    store.validity.ttl = 0
+    DataLoader.load(["AAA", "FAKE"], "2020-01-01", "2020-07-01", store=store)
+    assert fetcher.calls[-1][0] == ("FAKE",)
+
+    # When it starts returning data, its invalid entry is dropped
+    write_fixtures(fixtures, ["FAKE"])
+    result = DataLoader.load(["AAA", "FAKE"], "2020-01-01", "2020-07-01", store=store)
+    assert result.valid_tickers == ["AAA", "FAKE"]
+    assert "FAKE" not in PriceStore(tmp_path / "store", fetcher=fetcher).validity._load()
+
+
+def test_validity_index_clears_every_ticker(tmp_path):
+    index = TickerValidityIndex(tmp_path / "invalid.json")
+    index.mark_invalid(["A", "B", "C", "D"])
+    index.clear(["A", "B", "C", "Z"])
+
+    reloaded = TickerValidityIndex(tmp_path / "invalid.json")
+    assert [t for t in "ABCD" if reloaded.is_invalid(t)] == ["D"]
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    with tempfile.TemporaryDirectory() as tmp:
+        test_price_store_incremental_refresh(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_price_store_keeps_disjoint_ranges_apart(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_validity_index_clears_every_ticker(Path(tmp))
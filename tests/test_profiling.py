@@ -0,0 +1,101 @@
+import json
+import threading
+import time
+
+from src.utils import profiling
+
+
+def test_spans_and_counters():
+    with profiling.profiling() as profiler:
+        with profiling.span("outer", size=3) as span:
+            span.set(rows=10)
+            with profiling.span("inner"):
+                time.sleep(0.01)
+        threads = [threading.Thread(target=profiling.bind(profiling.count), args=("hits", 2)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert profiling.get_profiler() is None
+
+    report = profiler.report()
+    assert report["stages"]["outer"]["calls"] == 1
+    assert report["stages"]["inner"]["total_seconds"] >= 0.01
+    assert report["stages"]["outer"]["total_seconds"] >= report["stages"]["inner"]["total_seconds"]
+    assert report["counters"] == {"hits": 8}
+    assert [s for s in report["spans"] if s["name"] == "outer"][0]["attrs"] == {"size": 3, "rows": 10}
+
+    trace = json.loads(profiler.to_chrome_trace())
+    complete = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    assert {e["name"] for e in complete} == {"outer", "inner"}
+    assert all(e["dur"] >= 0 for e in complete)
+    assert json.loads(profiler.to_json())["counters"]["hits"] == 8
+
+
+def test_disabled_is_cheap():
+    @profiling.timed("noop")
+    def noop():
+        return 1
+
+    assert profiling.get_profiler() is None
+    start = time.perf_counter()
+    for _ in range(100000):
+        with profiling.span("stage"):
+            pass
+        profiling.count("calls")
+        noop()
+    # A few hundred nanoseconds per call; generous bound to stay stable on slow machines
+    assert time.perf_counter() - start < 1.0
+
+
+def test_sessions_in_other_threads_are_isolated():
+    reports = {}
+
+    def session(name):
+        with profiling.profiling() as profiler:
+            with profiling.span(name):
+                time.sleep(0.01)
+            # A thread without a bound profiler records nothing
+            stray = threading.Thread(target=profiling.count, args=("stray",))
+            stray.start()
+            stray.join()
+        reports[name] = profiler.report()
+
+    with profiling.profiling() as outer:
+        threads = [threading.Thread(target=session, args=(name,)) for name in ("a", "b")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert profiling.get_profiler() is outer
+
+    assert set(reports["a"]["stages"]) == {"a"} and set(reports["b"]["stages"]) == {"b"}
+    assert not reports["a"]["counters"] and not outer.report()["stages"]
+
+
+def test_pipeline_is_instrumented(make_prices):
+    from src.core import pipeline
+
+    prices = make_prices(n_assets=4, n_days=300)
+
+    with profiling.profiling() as profiler:
+        mu, S = pipeline.estimate(prices)
+        bl_returns, bl_cov = pipeline.black_litterman(S, mu)
+        pipeline.black_litterman(S, mu)
+        pipeline.optimize(bl_returns, bl_cov, "min_volatility")
+
+    report = profiler.report()
+    for stage in ("pipeline.estimate", "pipeline.black_litterman", "optimizer.min_volatility"):
+        assert stage in report["stages"]
+    assert report["stages"]["pipeline.black_litterman"]["calls"] == 2
+    assert report["counters"]["black_litterman.cache_hits"] >= 1
+    assert report["counters"]["solver.solves"] == 1
+    assert report["counters"]["solver.iterations"] > 0
+
+
+if __name__ == "__main__":
+    test_spans_and_counters()
+    test_disabled_is_cheap()
+    test_sessions_in_other_threads_are_isolated()
+    from tests.conftest import synthetic_prices
+    test_pipeline_is_instrumented(synthetic_prices)
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+from src.core.optimizer import PortfolioOptimizer
+from src.core.rebalance import Rebalancer, round_shares
+
+
+def make_universe(make_returns, n_assets=20, seed=0):
+    cov = make_returns(n_assets, seed=seed, prefix="T").cov() * 252
+    rng = np.random.default_rng(seed)
+    prices = pd.Series(rng.uniform(20, 400, n_assets), index=cov.index)
+    return cov, prices, rng
+
+
+def test_tiny_target_changes_trade_little(make_returns):
+    cov, prices, rng = make_universe(make_returns)
+    target = pd.Series(rng.dirichlet(np.ones(len(prices))), index=prices.index)
+    rebalancer = Rebalancer(cov)
+
+    # From cash, the plan buys every name and leaves less than one share of cash per name
+    initial = rebalancer.plan(target, prices, 1_000_000)
+    assert len(initial.trades) == len(prices) and (initial.trades["trade_shares"] > 0).all()
+    assert 0 <= initial.cash <= prices.max()
+    assert np.isclose(initial.weights.sum(), 1)
+
+    # A slightly different target trades at most a couple of names
+    nudged = target * np.exp(rng.normal(0, 0.005, len(target)))
+    update = rebalancer.plan(nudged / nudged.sum(), prices, 1_000_000, current_shares=initial.shares)
+    assert len(update.trades) <= 2 and update.turnover < 0.01
+    assert (update.shares[~update.shares.index.isin(update.trades.index)] ==
+            initial.shares[~update.shares.index.isin(update.trades.index)]).all()
+
+    # Without a turnover penalty the same update trades (almost) every name
+    free = Rebalancer(cov, turnover_penalty=0).plan(nudged / nudged.sum(), prices, 1_000_000, current_shares=initial.shares)
+    assert len(free.trades) > 2 * len(update.trades)
+
+
+def test_rebalance_from_weights_through_the_optimizer(make_returns):
+    cov, prices, _ = make_universe(make_returns, n_assets=8)
+    mu = pd.Series(np.linspace(0.05, 0.15, 8), index=cov.index)
+    optimizer = PortfolioOptimizer(mu, cov)
+    current = pd.Series(1 / 8, index=cov.index)
+    plan = optimizer.rebalance(prices, 50_000, current_weights=current, objective="min_volatility", max_weight=0.3)
+    assert plan.weights.max() <= 0.3 + 1e-6
+    assert plan.cash >= 0 and np.isclose(plan.cost, plan.turnover * 50_000 * 0.001)
+    np.testing.assert_allclose(plan.trades["trade_value"], plan.trades["trade_shares"] * plan.trades["price"])
+
+
+def test_round_shares_greedy_uses_leftover_cash():
+    prices = np.array([100.0, 30.0, 7.0])
+    shares = round_shares(np.array([0.5, 0.3, 0.2]), prices, 1000.0, np.zeros(3))
+    assert shares @ prices <= 1000 and 1000 - shares @ prices < prices.min()
+    assert list(shares) == [5, 10, 28]
+
+
+if __name__ == "__main__":
+    from tests.conftest import synthetic_returns
+    test_tiny_target_changes_trade_little(synthetic_returns)
+    test_rebalance_from_weights_through_the_optimizer(synthetic_returns)
+    test_round_shares_greedy_uses_leftover_cash()
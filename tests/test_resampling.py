@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.optimizer import PortfolioOptimizer
+from src.core.resampling import ResampledOptimizer, bootstrap_indices
+
+
+def test_block_bootstrap_indices():
+    rng = np.random.default_rng(0)
+    iid = bootstrap_indices(100, rng)
+    assert len(iid) == 100 and iid.min() >= 0 and iid.max() < 100
+    blocks = bootstrap_indices(100, rng, block_size=10)
+    assert len(blocks) == 100
+    # Inside a block the days are consecutive (wrapping around the end)
+    assert (np.diff(blocks.reshape(10, 10), axis=1) % 100 == 1).all()
+
+
+def test_resampled_weights_average_samples_reproducibly(make_returns):
+    returns = make_returns(n_assets=8, drift=3e-4, loadings=np.linspace(0.6, 1.4, 8), factor_drift=4e-4,
+                           factor_vol=0.01, noise_vol=0.008, prefix="T")
+    mu = pd.Series(0.1, index=returns.columns)
+    optimizer = PortfolioOptimizer(mu, returns.cov() * 252)
+    result = optimizer.resampled(returns, n_resamples=60, seed=7)
+
+    assert np.isclose(result.weights.sum(), 1, atol=1e-4) and (result.weights >= 0).all()
+    assert result.samples.shape == (60, 8) and result.n_failed == 0
+    assert list(result.dispersion.columns) == ["mean", "std", "p5", "p95", "held"]
+    assert (result.dispersion["p5"] <= result.dispersion["p95"]).all()
+    # Averaging spreads the allocation over more assets than a typical single sample holds
+    assert (result.weights > 0).sum() >= np.median((result.samples > 1e-4).sum(axis=1))
+
+    # Same seed, same answer, whatever the number of workers
+    again = optimizer.resampled(returns, n_resamples=60, seed=7, n_workers=2)
+    np.testing.assert_allclose(again.samples, result.samples, atol=1e-6)
+    blocked = optimizer.resampled(returns, objective="min_volatility", n_resamples=20, block_size=21, max_weight=0.3)
+    assert blocked.weights.max() <= 0.3 + 1e-4
+
+
+def test_concurrent_in_process_runs_are_independent(make_returns):
+    from concurrent.futures import ThreadPoolExecutor
+
+    histories = [make_returns(n_assets=n, drift=8e-4, factor_vol=0.006, noise_vol=0.008, seed=n) for n in (4, 6)]
+    resamplers = [ResampledOptimizer(returns) for returns in histories]
+    serial = [resampler.run(n_resamples=30, seed=1).samples for resampler in resamplers]
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        concurrent = list(pool.map(lambda resampler: resampler.run(n_resamples=30, seed=1).samples, resamplers))
+    for expected, got in zip(serial, concurrent):
+        np.testing.assert_allclose(got, expected, atol=1e-6)
+
+
+def test_rejects_unsupported_inputs(make_returns):
+    returns = make_returns(n_assets=3, prefix="T")
+    with pytest.raises(ValueError):
+        ResampledOptimizer(returns, objective="min_cvar")
+    with pytest.raises(ValueError):
+        ResampledOptimizer(returns, max_weight=0.2)
+    with pytest.raises(ValueError):
+        ResampledOptimizer(returns.where(returns > -0.02))
+
+
+if __name__ == "__main__":
+    from tests.conftest import synthetic_returns
+    test_block_bootstrap_indices()
+    test_resampled_weights_average_samples_reproducibly(synthetic_returns)
+    test_concurrent_in_process_runs_are_independent(synthetic_returns)
+    test_rejects_unsupported_inputs(synthetic_returns)
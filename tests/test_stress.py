@@ -0,0 +1,86 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.core.price_panel import PricePanel
+from src.core.stress import StressTester
+
+WINDOWS = {"crash": ("2020-02-19", "2020-03-24"), "rally": ("2020-04-01", "2020-08-01")}
+
+
+def stress_prices(make_prices, n_assets=8):
+    return make_prices(n_assets, n_days=524, drift=0.0, loadings=np.linspace(0.5, 1.5, n_assets), factor_drift=3e-4,
+                       factor_vol=0.012, noise_vol=0.005, market="^GSPC", prefix="T", start="2019-01-01")
+
+
+def reference(prices, weights, start, end):
+    # Buy and hold, one portfolio and one window at a time
+    window = prices.loc[start:pd.Timestamp(end) - pd.Timedelta(days=1), weights.index]
+    value = (window / window.iloc[0]) @ weights
+    return value.iloc[-1] - value.iloc[0], (1 - value / value.cummax()).max()
+
+
+def test_batched_pnl_and_drawdown_match_per_portfolio_replay(make_prices):
+    prices = stress_prices(make_prices)
+    tickers = [c for c in prices.columns if c != "^GSPC"]
+    tester = StressTester(PricePanel.from_frame(prices), tickers, windows=WINDOWS)
+    rng = np.random.default_rng(1)
+    portfolios = pd.DataFrame(rng.dirichlet(np.ones(len(tickers)), size=50), columns=tickers)
+
+    result = tester.run(portfolios)
+    assert result.pnl.shape == (50, 2) and (result.coverage == 1).all().all()
+    for i in (0, 17, 49):
+        for name, (start, end) in WINDOWS.items():
+            pnl, drawdown = reference(prices, portfolios.loc[i], start, end)
+            assert np.isclose(result.pnl.at[i, name], pnl)
+            assert np.isclose(result.max_drawdown.at[i, name], drawdown)
+    np.testing.assert_allclose(result.pnl.to_numpy(), portfolios.to_numpy() @ tester.shocks.to_numpy().T)
+
+    # A single portfolio, and scenarios the history does not reach are left out
+    single = StressTester(PricePanel.from_frame(prices), tickers, windows={**WINDOWS, "2008": ("2008-09-02", "2009-03-10")})
+    summary = single.run(portfolios.loc[3]).summary()
+    assert list(summary.index) == ["crash", "rally"]
+    with pytest.raises(ValueError):
+        single.run(pd.Series({"T0": 0.5, "ZZZ": 0.5}))
+
+
+def test_unlisted_assets_follow_the_market_and_factor_shocks_use_exposures(make_prices):
+    prices = stress_prices(make_prices)
+    prices["NEW"] = prices["^GSPC"].copy()
+    prices.loc[:"2020-03-01", "NEW"] = np.nan
+    prices["LEV"] = 100 * np.cumprod(1 + 2 * prices["^GSPC"].pct_change().fillna(0))
+    tester = StressTester(
+        PricePanel.from_frame(prices), ["T0", "NEW", "LEV"], windows=WINDOWS,
+        factor_shocks={"Equities -20%": {"^GSPC": -0.2}}
+    )
+    shocks = tester.shocks
+    market_crash = prices.loc["2020-03-23", "^GSPC"] / prices.loc["2020-02-19", "^GSPC"] - 1
+    assert np.isclose(shocks.at["crash", "NEW"], market_crash, rtol=1e-3)
+    assert np.isclose(shocks.at["Equities -20%", "LEV"], -0.4)
+    assert np.isclose(shocks.at["Equities -20%", "T0"], -0.2 * 0.5, atol=0.02)
+
+    result = tester.run(pd.Series({"T0": 0.5, "NEW": 0.5}))
+    assert np.isclose(result.coverage.at[0, "crash"], 0.5) and result.coverage.at[0, "rally"] == 1
+    assert np.isclose(result.max_drawdown.at[0, "Equities -20%"], -result.pnl.at[0, "Equities -20%"])
+
+
+def test_hundreds_of_portfolios_in_one_pass(make_prices):
+    prices = stress_prices(make_prices, n_assets=300)
+    tickers = [c for c in prices.columns if c != "^GSPC"]
+    windows = {f"w{i}": (str(d.date()), str((d + pd.Timedelta(days=60)).date()))
+               for i, d in enumerate(pd.date_range("2019-02-01", periods=30, freq="3W"))}
+    tester = StressTester(PricePanel.from_frame(prices), tickers, windows=windows)
+    portfolios = pd.DataFrame(np.random.default_rng(2).dirichlet(np.ones(300), size=500), columns=tickers)
+    start = time.perf_counter()
+    result = tester.run(portfolios)
+    assert time.perf_counter() - start < 1.0
+    assert result.pnl.shape == (500, 30) and (result.max_drawdown >= 0).all().all()
+
+
+if __name__ == "__main__":
+    from tests.conftest import synthetic_prices
+    test_batched_pnl_and_drawdown_match_per_portfolio_replay(synthetic_prices)
+    test_unlisted_assets_follow_the_market_and_factor_shocks_use_exposures(synthetic_prices)
+    test_hundreds_of_portfolios_in_one_pass(synthetic_prices)
@@ -0,0 +1,92 @@
+import cvxpy as cp
+import numpy as np
+import pandas as pd
+
+from src.core.optimizer import PortfolioOptimizer
+from src.core.tail_risk import CVaROptimizer, simulated_scenarios
+
+
+def full_lp_cvar(returns: np.ndarray, alpha: float, max_weight: float) -> float:
+    # Reference: the Rockafellar-Uryasev LP with one row per scenario
+    n_scenarios, n_assets = returns.shape
+    w, var, excess = cp.Variable(n_assets, nonneg=True), cp.Variable(), cp.Variable(n_scenarios, nonneg=True)
+    problem = cp.Problem(
+        cp.Minimize(var + cp.sum(excess) / ((1 - alpha) * n_scenarios)),
+        [excess >= -returns @ w - var, cp.sum(w) == 1, w <= max_weight]
+    )
+    problem.solve(solver="CLARABEL")
+    return problem.value
+
+
+def test_matches_full_lp_across_alphas(make_returns):
+    scenarios = make_returns(n_assets=8, n_days=1500, tail_df=4, factor_vol=0.011)
+    optimizer = CVaROptimizer(scenarios, max_weight=0.3)
+    for alpha in (0.95, 0.99, 0.9):
+        weights = optimizer.min_cvar(alpha)
+        assert np.isclose(weights.sum(), 1) and (weights <= 0.3 + 1e-9).all()
+        assert np.isclose(optimizer.cvar(weights, alpha), full_lp_cvar(scenarios.to_numpy(), alpha, 0.3), rtol=1e-5)
+    # Far fewer rows than scenarios ever enter the LP
+    assert optimizer._active.sum() < len(scenarios) / 2
+
+    sampled = CVaROptimizer(scenarios, max_weight=0.3, n_scenarios=500, seed=1)
+    assert len(sampled.returns) == 500
+    assert optimizer.cvar(sampled.min_cvar(0.95)) < 1.1 * optimizer.cvar(optimizer.min_cvar(0.95))
+
+
+def test_target_return_and_drawdown_constraints(make_returns):
+    scenarios = make_returns(n_assets=8, n_days=1500, tail_df=4, factor_vol=0.011)
+    optimizer = CVaROptimizer(scenarios)
+    unconstrained = optimizer.min_cvar(0.95)
+
+    limit = 0.9 * optimizer.max_drawdown(unconstrained)
+    capped = optimizer.min_cvar(0.95, max_drawdown=limit)
+    assert optimizer.max_drawdown(capped) <= limit + 1e-8
+    assert optimizer.cvar(capped) >= optimizer.cvar(unconstrained) - 1e-12
+
+    targets = np.linspace(optimizer.mu @ unconstrained, optimizer.mu.max(), 5)
+    frontier = optimizer.frontier(targets)
+    assert (frontier["expected_annual_return"] >= frontier["target_return"] - 1e-8).all()
+    assert frontier["cvar"].is_monotonic_increasing
+
+
+def test_unconverged_row_generation_raises(make_returns):
+    scenarios = make_returns(n_assets=8, n_days=1500, tail_df=4, factor_vol=0.011)
+    reference = CVaROptimizer(scenarios)
+    limit = 0.9 * reference.max_drawdown(reference.min_cvar(0.95))
+
+    optimizer = CVaROptimizer(scenarios, max_iterations=1)
+    try:
+        optimizer.min_cvar(0.95, max_drawdown=limit)
+    except ValueError as error:
+        assert "did not converge" in str(error)
+    else:
+        raise AssertionError("expected ValueError")
+
+    # The rows found so far are kept, so more iterations finish the job
+    optimizer.max_iterations = 100
+    assert optimizer.max_drawdown(optimizer.min_cvar(0.95, max_drawdown=limit)) <= limit + 1e-8
+
+
+def test_optimizer_and_simulated_scenarios():
+    tickers = ["AAPL", "MSFT", "GOOGL"]
+    mu = pd.Series([0.12, 0.10, 0.11], index=tickers)
+    cov = pd.DataFrame([[0.04, 0.006, 0.008], [0.006, 0.03, 0.005], [0.008, 0.005, 0.035]], index=tickers, columns=tickers)
+    scenarios = simulated_scenarios(mu, cov, n_scenarios=5000, seed=0)
+    assert scenarios.shape == (5000, 3)
+    assert np.allclose(scenarios.cov() * 252, cov, atol=0.004)
+
+    optimizer = PortfolioOptimizer(mu, cov)
+    weights = optimizer.minimize_cvar(scenarios, alpha=0.95, max_weight=0.5)
+    assert np.isclose(weights.sum(), 1, atol=1e-4) and weights.max() <= 0.5 + 1e-4
+    # With normal scenarios minimum CVaR lands close to minimum variance
+    min_vol = optimizer.minimize_volatility(max_weight=0.5)
+    assert np.allclose(weights, min_vol, atol=0.1)
+    assert (optimizer.minimize_cvar(scenarios, max_assets=2) > 0).sum() == 2
+
+
+if __name__ == "__main__":
+    from tests.conftest import synthetic_returns
+    test_matches_full_lp_across_alphas(synthetic_returns)
+    test_target_return_and_drawdown_constraints(synthetic_returns)
+    test_unconverged_row_generation_raises(synthetic_returns)
+    test_optimizer_and_simulated_scenarios()